@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Startup Benchmark - guards the cold-start cost of search.py
+Usage: python bench_startup.py [--runs 5] [--budget-ms 40]
+
+Runs `python -X importtime search.py "<query>" --no-daemon` several times and
+reports the median import time of the modules search.py pulls in (interpreter
+startup and `site` excluded) plus the median wall time per call. Exits 1 when
+the import time is over budget, or when a module that only some commands need
+(numpy, design_system, the daemon server, ...) leaks into a plain search.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SEARCH = os.path.join(SCRIPTS_DIR, "search.py")
+
+# Modules that must stay out of the plain `search.py "<query>"` path
+LAZY_MODULES = ["numpy", "design_system", "http.server", "http.client", "json"]
+
+
+def parse_importtime(stderr):
+    """{module: cumulative_us} for top-level imports from -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):  # nested import, already counted by its parent
+            continue
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def all_imported(stderr):
+    return {line.rsplit("|", 1)[1].strip() for line in stderr.splitlines()
+            if line.startswith("import time:") and "cumulative" not in line}
+
+
+def measure(query, args):
+    cmd = [sys.executable, "-X", "importtime", SEARCH, query, "--no-daemon", *args]
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=SCRIPTS_DIR)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"search.py failed:\n{proc.stderr}")
+    top_level = parse_importtime(proc.stderr)
+    # site and the encodings it drags in are paid by every Python process
+    startup = {"site", "encodings", "_distutils_hack"}
+    import_us = sum(us for name, us in top_level.items() if name not in startup)
+    return import_us / 1000, wall * 1000, all_imported(proc.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="search.py cold-start benchmark")
+    parser.add_argument("--query", default="glassmorphism dark mode", help="Query to search for")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to time (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=40.0, help="Median import-time budget in ms (default: 40)")
+    args = parser.parse_args()
+
+    # One unmeasured run so the on-disk index exists and the page cache is warm
+    measure(args.query, [])
+
+    imports, walls, leaked = [], [], set()
+    for _ in range(args.runs):
+        import_ms, wall_ms, modules = measure(args.query, [])
+        imports.append(import_ms)
+        walls.append(wall_ms)
+        leaked |= modules & set(LAZY_MODULES)
+
+    import_ms = statistics.median(imports)
+    print(f"search.py imports: {import_ms:.1f} ms median (budget {args.budget_ms:.0f} ms)")
+    print(f"search.py wall:    {statistics.median(walls):.1f} ms median over {args.runs} runs")
+
+    failed = False
+    if import_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {import_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if leaked:
+        print(f"FAIL: eagerly imported on the search path: {', '.join(sorted(leaked))}")
+        failed = True
+    sys.exit(1 if failed else 0)
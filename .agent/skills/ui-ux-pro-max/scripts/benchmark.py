@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - search core and design-system generator on synthetic corpora
+Usage: python benchmark.py [--sizes 1000,10000,100000] [--queries 300] [-o results.json]
+       python benchmark.py --baseline previous.json [--threshold 0.25]
+
+For every size, a synthetic copy of each domain CSV (and the react stack) is
+written to a temp directory with that many rows, drawn from the real data's
+vocabulary. A fresh worker process is then pointed at it via UIPROMAX_DATA_DIR
+and measures:
+  - BM25.fit time, peak traced memory and index size for the style corpus
+  - cold index build (fit + write) and warm index load from disk
+  - latency percentiles for _search_csv, search (auto-domain), search_stack
+    and DesignSystemGenerator.generate
+  - batch throughput of search_many against one query at a time
+  - max RSS of the whole worker
+
+Results are written as JSON. With --baseline, every metric is compared with
+the previous run and the script exits 1 when one regressed by more than
+--threshold (default 25%). Compare runs from the same machine, and raise the
+threshold on shared or noisy hosts.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REAL_DATA_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "data")
+BENCH_STACK = "react"
+SEED = 1234
+
+# Metrics where a larger number is better; every other metric is a cost
+HIGHER_IS_BETTER = {"batch_qps", "single_qps", "batch_speedup"}
+
+
+# ============ SYNTHETIC CORPORA ============
+def _vocabulary(core):
+    """Every token in the real CSVs, most frequent first, plus filler words"""
+    counts = {}
+    tokenize = core.BM25().tokenize
+    for name in os.listdir(REAL_DATA_DIR):
+        if name.endswith(".csv"):
+            with open(os.path.join(REAL_DATA_DIR, name), encoding="utf-8") as f:
+                for token in tokenize(f.read()):
+                    counts[token] = counts.get(token, 0) + 1
+    words = sorted(counts, key=counts.get, reverse=True)
+    rng = random.Random(SEED)
+    # Larger corpora need a longer vocabulary tail, as real text would have
+    words += ["".join(rng.choice("abcdefghiklmnoprstuvy") for _ in range(rng.randint(4, 10))) for _ in range(20000)]
+    return words
+
+
+def _write_corpus(path, columns, search_cols, size, words, rng):
+    # Zipf-like: a few words are everywhere, most are rare
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for _ in range(size):
+            row = {}
+            for col in columns:
+                n = rng.randint(3, 12) if col in search_cols else rng.randint(1, 4)
+                row[col] = " ".join(rng.choices(words, cum_weights=cum_weights, k=n))
+            writer.writerow(row)
+
+
+def build_corpora(directory, size, core):
+    """Write a synthetic data directory with `size` rows per domain"""
+    rng = random.Random(SEED + size)
+    words = _vocabulary(core)
+    for config in core.CSV_CONFIG.values():
+        columns = list(dict.fromkeys(config["search_cols"] + config["output_cols"]))
+        _write_corpus(os.path.join(directory, config["file"]), columns, config["search_cols"], size, words, rng)
+
+    stack_cols = core._STACK_COLS
+    os.makedirs(os.path.join(directory, "stacks"), exist_ok=True)
+    columns = list(dict.fromkeys(stack_cols["search_cols"] + stack_cols["output_cols"]))
+    _write_corpus(os.path.join(directory, core.STACK_CONFIG[BENCH_STACK]["file"]), columns,
+                  stack_cols["search_cols"], size, words, rng)
+
+    # Reasoning rules are real data, not a corpus; copy them as they are
+    shutil.copy(os.path.join(REAL_DATA_DIR, "ui-reasoning.csv"), directory)
+    return words
+
+
+def make_queries(words, count, rng):
+    common = words[:2000]
+    return [" ".join(rng.sample(common, rng.randint(1, 4))) for _ in range(count)]
+
+
+# ============ WORKER (runs inside the synthetic data directory) ============
+def _percentiles(samples_s):
+    ordered = sorted(samples_s)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 4)
+
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 4)}
+
+
+def _time_each(fn, items):
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return _percentiles(samples)
+
+
+def _best_of(fn, repeat=3):
+    """Fastest of a few runs; single-shot timings are mostly scheduler noise"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_worker(n_queries):
+    import resource
+    import tracemalloc
+    import core
+    from design_system import DesignSystemGenerator
+
+    rng = random.Random(SEED)
+    queries = make_queries(_vocabulary(core), n_queries, rng)
+    style = core.CSV_CONFIG["style"]
+    style_path = core.DATA_DIR / style["file"]
+    metrics = {}
+
+    # Fit on its own, with its memory traced (tracing is off for every timing below)
+    documents = [" ".join(str(row.get(col, "")) for col in style["search_cols"]) for row in core._load_csv(style_path)]
+    metrics["fit_s"] = round(_best_of(lambda: core.BM25().fit(documents)), 4)
+    tracemalloc.start()
+    bm25 = core.BM25()
+    bm25.fit(documents)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metrics["fit_peak_mb"] = round(peak / 1e6, 2)
+    metrics["index_mb"] = round(current / 1e6, 2)
+    del bm25, documents
+
+    # Cold build (parse + fit + persist), then a warm load of the persisted index
+    started = time.perf_counter()
+    core.load_index(style_path, style["search_cols"])
+    metrics["index_build_s"] = round(time.perf_counter() - started, 4)
+
+    def load():
+        core.clear_caches()
+        core.load_index(style_path, style["search_cols"])
+
+    metrics["index_load_s"] = round(_best_of(load), 4)
+
+    # Warm every index used below so the latencies measure querying only
+    core.build_indexes()
+
+    metrics["search_csv"] = _time_each(
+        lambda q: core._search_csv(style_path, style["search_cols"], style["output_cols"], q, core.MAX_RESULTS), queries)
+    core.clear_caches()
+    core.build_indexes()
+    metrics["search"] = _time_each(lambda q: core.search(q), queries)
+    metrics["search_stack"] = _time_each(lambda q: core.search_stack(q, BENCH_STACK), queries)
+
+    started = time.perf_counter()
+    for q in queries:
+        core._search_csv(style_path, style["search_cols"], style["output_cols"], q, core.MAX_RESULTS)
+    single = time.perf_counter() - started
+    started = time.perf_counter()
+    core.search_many(queries, "style")
+    metrics["batch_first_s"] = round(time.perf_counter() - started, 4)  # includes building the matrix
+    started = time.perf_counter()
+    core.search_many(queries, "style")
+    batch = time.perf_counter() - started
+    metrics["single_qps"] = round(len(queries) / single, 1)
+    metrics["batch_qps"] = round(len(queries) / batch, 1)
+    metrics["batch_speedup"] = round(single / batch, 2)
+
+    generator = DesignSystemGenerator()
+    metrics["generate"] = _time_each(generator.generate, queries[:max(10, len(queries) // 5)])
+
+    maxrss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics["max_rss_mb"] = round(maxrss_kb / 1024, 1)  # Linux reports KiB
+    return metrics
+
+
+# ============ COMPARISON ============
+def _flatten(metrics, prefix=""):
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Lines describing every metric that got worse by more than threshold"""
+    regressions = []
+    for size, metrics in current["results"].items():
+        old = _flatten(baseline.get("results", {}).get(size, {}))
+        for name, value in _flatten(metrics).items():
+            previous = old.get(name)
+            if not previous or not value:
+                continue
+            leaf = name.rsplit(".", 1)[-1]
+            ratio = previous / value if leaf in HIGHER_IS_BETTER else value / previous
+            if ratio > 1 + threshold:
+                regressions.append(f"{size} rows: {name} {previous} -> {value} ({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def _print_summary(size, m):
+    print(f"\n== {size} rows ==")
+    print(f"  fit {m['fit_s']}s (peak {m['fit_peak_mb']} MB, index {m['index_mb']} MB) | "
+          f"index build {m['index_build_s']}s, load {m['index_load_s']}s")
+    for name in ("search_csv", "search", "search_stack", "generate"):
+        p = m[name]
+        print(f"  {name:<13} p50 {p['p50_ms']:>9} ms  p95 {p['p95_ms']:>9} ms  p99 {p['p99_ms']:>9} ms")
+    print(f"  batch {m['batch_qps']} q/s vs single {m['single_qps']} q/s ({m['batch_speedup']}x) | "
+          f"first batch {m['batch_first_s']}s | max RSS {m['max_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Rows per domain, comma-separated")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per latency measurement (default: 300)")
+    parser.add_argument("--output", "-o", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression vs baseline (default: 0.25 = 25%%)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(args.queries), sys.stdout)
+        sys.exit(0)
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    import core
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        directory = tempfile.mkdtemp(prefix=f"uipromax-bench-{size}-")
+        try:
+            started = time.perf_counter()
+            build_corpora(directory, size, core)
+            print(f"Generated {size}-row corpora in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", "--queries", str(args.queries)],
+                capture_output=True, text=True, cwd=SCRIPTS_DIR,
+                env=dict(os.environ, UIPROMAX_DATA_DIR=directory)
+            )
+            if proc.returncode != 0:
+                sys.exit(f"Benchmark worker failed for {size} rows:\n{proc.stderr}")
+            results[str(size)] = json.loads(proc.stdout)
+            _print_summary(size, results[str(size)])
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": numpy_version,
+            "machine": platform.machine(),
+            "queries": args.queries,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
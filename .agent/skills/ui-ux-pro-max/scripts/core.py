@@ -5,14 +5,34 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import hashlib
+import heapq
+import mmap
+import os
+import pickle
 import re
+import sys
+import tempfile
+import threading
+from array import array
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import OrderedDict, deque
+
+# NumPy is optional (search_many falls back to per-query scoring) and is the
+# single most expensive import, so it is only loaded the first time a batch
+# of queries needs it; see _numpy().
+np = None
+_numpy_checked = False
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+# UIPROMAX_DATA_DIR points the engine at another copy of the CSVs (e.g. benchmark corpora)
+DATA_DIR = Path(os.environ.get("UIPROMAX_DATA_DIR") or Path(__file__).parent.parent / "data")
+INDEX_DIR = DATA_DIR / ".index"
+INDEX_VERSION = 3
 MAX_RESULTS = 3
+INDEX_CACHE_SIZE = 32      # fitted indexes kept in memory (one per CSV/column set)
+RESULT_CACHE_SIZE = 512    # memoized (domain, query, max_results) responses
 
 CSV_CONFIG = {
     "style": {
@@ -93,73 +113,538 @@ AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
 # ============ BM25 IMPLEMENTATION ============
+# Runs of word characters, at least 3 long: the same tokens as replacing
+# punctuation with spaces, splitting, and dropping words of 2 chars or fewer
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+# Array attributes of a fitted BM25, serialized as-is
+_BM25_ARRAYS = ("doc_tokens", "doc_offsets", "doc_lengths", "idf", "doc_freqs",
+                "post_offsets", "post_docs", "post_tfs")
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """
+    BM25 ranking algorithm for text search.
+
+    Tokens are interned to integer ids (vocab), and everything else is held in
+    flat arrays indexed by id or document: the tokenized corpus as doc_tokens
+    sliced by doc_offsets, and the postings of term t as
+    post_docs/post_tfs[post_offsets[t]:post_offsets[t + 1]], in document order.
+    idf, doc_freqs, doc_lengths and norms are dense arrays. This avoids keeping
+    a Python string per token occurrence and a tuple per posting. An index
+    loaded from disk holds read-only memoryviews over the mapped index file
+    instead of arrays (see _read_index).
+    """
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.vocab = {}                    # token -> term id
+        self.doc_tokens = array('I')       # term ids of every document, back to back
+        self.doc_offsets = array('I', [0])
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array('d')              # by term id
+        self.doc_freqs = array('I')        # by term id
+        self.post_offsets = array('I', [0])
+        self.post_docs = array('I')
+        self.post_tfs = array('I')
+        self.norms = array('d')
         self.N = 0
+        self._matrix = None
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return _TOKEN_RE.findall(str(text).lower())
 
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        vocab = self.vocab
+        for doc in documents:
+            for token in self.tokenize(doc):
+                term = vocab.get(token)
+                if term is None:
+                    term = vocab[token] = len(vocab)
+                self.doc_tokens.append(term)
+            self.doc_offsets.append(len(self.doc_tokens))
+        self.N = len(self.doc_offsets) - 1
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        offsets = self.doc_offsets
+        self.doc_lengths = array('I', (offsets[i + 1] - offsets[i] for i in range(self.N)))
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        postings = [[] for _ in range(len(vocab))]
+        for idx in range(self.N):
+            term_freqs = {}
+            for term in self.doc_tokens[offsets[idx]:offsets[idx + 1]]:
+                term_freqs[term] = term_freqs.get(term, 0) + 1
+            for term, tf in term_freqs.items():
+                postings[term].append((idx, tf))
+
+        for term_postings in postings:
+            for idx, tf in term_postings:
+                self.post_docs.append(idx)
+                self.post_tfs.append(tf)
+            self.post_offsets.append(len(self.post_docs))
+            freq = len(term_postings)
+            self.doc_freqs.append(freq)
+            self.idf.append(log((self.N - freq + 0.5) / (freq + 0.5) + 1))
+
+        self._compute_norms()
+
+    def _compute_norms(self):
+        """Per-document length normalization, the query-independent part of the BM25 denominator"""
+        self.norms = array('d', (self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths))
+
+    def to_state(self):
+        """Fitted index as plain data, for serialization (see _write_index)"""
+        state = {name: getattr(self, name) for name in _BM25_ARRAYS}
+        state.update(k1=self.k1, b=self.b, avgdl=self.avgdl, N=self.N, terms=list(self.vocab))
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a fitted index without re-tokenizing anything; arrays may be memoryviews"""
+        bm25 = cls(state["k1"], state["b"])
+        for name in _BM25_ARRAYS:
+            setattr(bm25, name, state[name])
+        bm25.vocab = dict(zip(state["terms"], range(len(state["terms"]))))
+        bm25.avgdl = state["avgdl"]
+        bm25.N = state["N"]
+        if bm25.N:
+            bm25._compute_norms()
+        return bm25
+
+    def _accumulate(self, query):
+        """Sum BM25 contributions over the postings of each query token; untouched docs score 0"""
+        scores = {}
+        numerator_scale = self.k1 + 1
+        norms = self.norms
+        offsets, docs, tfs = self.post_offsets, self.post_docs, self.post_tfs
+        for token in self.tokenize(query):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            idf = self.idf[term]
+            start, end = offsets[term], offsets[term + 1]
+            for idx, tf in zip(docs[start:end], tfs[start:end]):
+                scores[idx] = scores.get(idx, 0) + idf * (tf * numerator_scale) / (tf + norms[idx])
+        return scores
 
     def score(self, query):
         """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        scores = self._accumulate(query)
+        return sorted(((idx, scores.get(idx, 0)) for idx in range(self.N)), key=lambda x: x[1], reverse=True)
+
+    def ranked(self, query):
+        """Every (idx, score) pair with score > 0, best first, ties broken by document order"""
+        return sorted(self._accumulate(query).items(), key=lambda x: (-x[1], x[0]))
+
+    def top_k(self, query, k):
+        """Best k (idx, score) pairs with score > 0, ties broken by document order"""
+        scores = self._accumulate(query)
+        return heapq.nlargest(k, scores.items(), key=lambda x: (x[1], -x[0]))
+
+    def top_k_many(self, queries, k):
+        """top_k for a batch of queries; vectorized when NumPy is available"""
+        if _numpy() is None or self.N == 0:
+            return [self.top_k(query, k) for query in queries]
+        if self._matrix is None:
+            self._matrix = BM25Matrix(self)
+        return self._matrix.top_k_many(queries, k)
+
+
+def _numpy():
+    """Imports NumPy on first use; returns None when it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+
+class BM25Matrix:
+    """
+    Term-major CSR matrix of precomputed BM25 weights (requires NumPy).
+
+    Row t holds weight(t, d) = idf(t) * tf * (k1 + 1) / (tf + norm(d)) for every
+    document d containing term t, so scoring a batch of queries is one sparse
+    (queries x terms) @ (terms x docs) product followed by a per-row top-k.
+    Only the (query, document) cells the product touches are materialized.
+    Contributions are added in the same order as BM25._accumulate, which keeps
+    the scores bit-for-bit identical to the scalar path.
+    """
+
+    def __init__(self, bm25, chunk_size=256):
+        self.tokenize = bm25.tokenize
+        self.N = bm25.N
+        self.chunk_size = chunk_size
+        self.vocab = bm25.vocab  # term id == matrix row
+
+        self.indptr = np.array(bm25.post_offsets, dtype=np.int64)
+        self.indices = np.array(bm25.post_docs, dtype=np.int64)
+        tf = np.array(bm25.post_tfs, dtype=np.float64)
+        norms = np.array(bm25.norms, dtype=np.float64)
+        idfs = np.repeat(np.array(bm25.idf, dtype=np.float64), np.diff(self.indptr))
+        self.data = idfs * (tf * (bm25.k1 + 1)) / (tf + norms[self.indices])
+
+    def _query_terms(self, queries):
+        """(query row, term id) for every known token occurrence, in query order"""
+        rows = []
+        terms = []
+        for row, query in enumerate(queries):
+            for token in self.tokenize(query):
+                term = self.vocab.get(token)
+                if term is not None:
+                    rows.append(row)
+                    terms.append(term)
+        return np.array(rows, dtype=np.int64), np.array(terms, dtype=np.int64)
+
+    def _score_chunk(self, queries):
+        """
+        Sparse scores for a chunk of queries: (rows, docs, scores) for every
+        (query, document) pair that shares at least one term, sorted by query
+        then document. Memory grows with the postings the queries touch, not
+        with len(queries) * N.
+        """
+        rows, terms = self._query_terms(queries)
+        if len(terms) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float64)
+
+        # Expand each (query, term) pair into that term's postings slice
+        starts = self.indptr[terms]
+        lengths = self.indptr[terms + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(lengths.sum())
+        keys = np.repeat(rows, lengths) * self.N + self.indices[positions]
+
+        # One slot per distinct (query, doc); np.add.at adds in input order
+        keys, slots = np.unique(keys, return_inverse=True)
+        scores = np.zeros(len(keys), dtype=np.float64)
+        np.add.at(scores, slots, self.data[positions])
+        return keys // self.N, keys % self.N, scores
+
+    def top_k_many(self, queries, k):
+        results = []
+        k = min(k, self.N)
+        for start in range(0, len(queries), self.chunk_size):
+            chunk = queries[start:start + self.chunk_size]
+            rows, docs, scores = self._score_chunk(chunk)
+            bounds = np.searchsorted(rows, np.arange(len(chunk) + 1))
+            for row in range(len(chunk)):
+                row_docs = docs[bounds[row]:bounds[row + 1]]
+                row_scores = scores[bounds[row]:bounds[row + 1]]
+                if k <= 0 or len(row_docs) == 0:
+                    results.append([])
+                    continue
+                if len(row_docs) > k:
+                    # Keep everything tied with the k-th best score so ties
+                    # resolve below exactly like top_k
+                    kth = row_scores[np.argpartition(-row_scores, k - 1)[k - 1]]
+                    keep = row_scores >= kth
+                    row_docs, row_scores = row_docs[keep], row_scores[keep]
+                order = np.lexsort((row_docs, -row_scores))[:k]
+                results.append([(int(row_docs[i]), float(row_scores[i])) for i in order])
+        return results
+
+
+# ============ KEYWORD MATCHING ============
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of substrings.
+
+    matches(text) returns every pattern that occurs anywhere in text - the same
+    answer as [p for p in patterns if p in text] - in a single pass over text,
+    however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._empty = False
+        for pattern in patterns:
+            if not pattern:
+                self._empty = True  # "" is a substring of everything
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            if pattern not in self._out[node]:
+                self._out[node] += (pattern,)
+
+        # Breadth-first so every fail link points at an already finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def matches(self, text):
+        """Set of patterns occurring in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = {""} if self._empty else set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+# ============ IN-PROCESS CACHES ============
+class LRUCache:
+    """Small thread-safe LRU map with hit/miss counters"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_INDEX_CACHE = LRUCache(INDEX_CACHE_SIZE)
+_RESULT_CACHE = LRUCache(RESULT_CACHE_SIZE)
+_ROUTE_CACHE = LRUCache(RESULT_CACHE_SIZE)  # query -> ranked domains
+
+
+def cache_stats():
+    """Hit/miss counters for the index, query-result and domain-routing caches"""
+    return {"index": _INDEX_CACHE.stats(), "results": _RESULT_CACHE.stats(), "routes": _ROUTE_CACHE.stats()}
+
+
+def clear_caches():
+    _INDEX_CACHE.clear()
+    _RESULT_CACHE.clear()
+    _ROUTE_CACHE.clear()
+
+
+def _copy_response(response):
+    """Callers may mutate what they get back, so never hand out the cached rows themselves"""
+    copied = dict(response)
+    if "results" in copied:
+        copied["results"] = [dict(row) for row in copied["results"]]
+    return copied
+
+
+def _memoized(key, filepath, compute):
+    """Serve a response from the result memo while the underlying CSV is unchanged"""
+    try:
+        stat = filepath.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return compute()
+
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return _copy_response(cached[1])
+
+    response = compute()
+    if "error" not in response:
+        _RESULT_CACHE.put(key, (stamp, _copy_response(response)))
+    return response
+
+
+# ============ PERSISTED INDEXES ============
+def _load_csv(filepath):
+    """Load CSV and return list of dicts"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+def _index_path(filepath, search_cols):
+    """One index file per CSV and search-column set, e.g. .index/stacks-react-1a2b3c4d.idx"""
+    name = filepath.relative_to(DATA_DIR).with_suffix("").as_posix().replace("/", "-")
+    cols = hashlib.sha1("\x1f".join(search_cols).encode("utf-8")).hexdigest()[:8]
+    return INDEX_DIR / f"{name}-{cols}.idx"
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+def _file_sha1(filepath):
+    with open(filepath, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
 
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+def _build_index(filepath, search_cols):
+    """Parse the CSV and fit BM25 over the search columns"""
+    data = _load_csv(filepath)
+    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    bm25 = BM25()
+    bm25.fit(documents)
+    return data, bm25
+
+
+# Index file layout: magic, header length (8 bytes), pickled header (CSV stamp,
+# rows, vocab, BM25 scalars, array layout), then the raw BM25 arrays, each
+# starting on an 8-byte boundary so they can be used straight from an mmap.
+_INDEX_MAGIC = b"UIPMIDX\0"
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _read_index(index_path, filepath, stat):
+    """
+    Return the stored payload if it still matches the CSV, else None. The BM25
+    arrays are not read: they are memoryviews over a read-only mmap of the
+    file, so the OS pages postings in as queries touch them.
+    """
+    try:
+        with open(index_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:8] != _INDEX_MAGIC:
+            return None
+        header_len = int.from_bytes(mapped[8:16], "little")
+        payload = pickle.loads(mapped[16:16 + header_len])
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+
+    if payload.get("version") != INDEX_VERSION or payload.get("byteorder") != sys.byteorder:
+        return None
+    if not (payload["mtime_ns"] == stat.st_mtime_ns and payload["size"] == stat.st_size):
+        # mtime changes on checkout/copy without the content changing, so fall back to the hash
+        if payload["size"] != stat.st_size or payload["sha1"] != _file_sha1(filepath):
+            return None
+
+    view = memoryview(mapped)
+    data_start = _aligned(16 + header_len)
+    for name, (typecode, itemsize, offset, count) in payload["arrays"].items():
+        start = data_start + offset
+        if array(typecode).itemsize != itemsize or start + count * itemsize > len(mapped):
+            return None
+        payload["bm25"][name] = view[start:start + count * itemsize].cast(typecode)
+    return payload
+
+
+def _write_index(index_path, filepath, stat, data, bm25):
+    state = bm25.to_state()
+    arrays = [(name, state.pop(name)) for name in _BM25_ARRAYS]
+    layout = {}
+    offset = 0
+    for name, values in arrays:
+        layout[name] = (values.typecode, values.itemsize, offset, len(values))
+        offset += _aligned(len(values) * values.itemsize)
+    header = pickle.dumps({
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha1": _file_sha1(filepath),
+        "rows": data,
+        "bm25": state,
+        "arrays": layout,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        # Unique per call, so threads building the same index never share a temp file
+        fd, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, prefix=f".{index_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_INDEX_MAGIC)
+                f.write(len(header).to_bytes(8, "little"))
+                f.write(header)
+                f.write(bytes(_aligned(16 + len(header)) - 16 - len(header)))
+                for _, values in arrays:
+                    size = len(values) * values.itemsize
+                    f.write(values.tobytes())
+                    f.write(bytes(_aligned(size) - size))
+            os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; other users can share the index
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass  # Read-only install: keep working, just without the on-disk index
+
+
+def load_index(filepath, search_cols):
+    """
+    Return (rows, fitted BM25) for a CSV. Indexes are kept in an in-process LRU
+    keyed by path and mtime; on a miss the serialized index is loaded from
+    INDEX_DIR when it is current, and rebuilt (and saved) otherwise.
+    """
+    stat = filepath.stat()
+    cache_key = (str(filepath), tuple(search_cols), stat.st_mtime_ns, stat.st_size)
+    cached = _INDEX_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    index_path = _index_path(filepath, search_cols)
+    payload = _read_index(index_path, filepath, stat)
+    if payload is not None:
+        index = payload["rows"], BM25.from_state(payload["bm25"])
+    else:
+        data, bm25 = _build_index(filepath, search_cols)
+        _write_index(index_path, filepath, stat, data, bm25)
+        index = data, bm25
+
+    _INDEX_CACHE.put(cache_key, index)
+    return index
+
+
+def build_indexes():
+    """Build the on-disk index for every domain and stack; returns the paths written"""
+    targets = [(DATA_DIR / c["file"], c["search_cols"]) for c in CSV_CONFIG.values()]
+    targets += [(DATA_DIR / c["file"], _STACK_COLS["search_cols"]) for c in STACK_CONFIG.values()]
+    built = []
+    for filepath, search_cols in targets:
+        if filepath.exists():
+            load_index(filepath, search_cols)
+            built.append(str(_index_path(filepath, search_cols)))
+    return built
 
 
 def _search_csv(filepath, search_cols, output_cols, query, max_results):
@@ -167,52 +652,95 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    data, bm25 = load_index(filepath, search_cols)
+    return _format_results(data, bm25.top_k(query, max_results), output_cols)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
+def _format_results(data, ranked, output_cols):
+    """Get top results with score > 0"""
     results = []
-    for idx, score in ranked[:max_results]:
+    for idx, score in ranked:
         if score > 0:
             row = data[idx]
             results.append({col: row.get(col, "") for col in output_cols if col in row})
-
     return results
 
 
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+FALLBACK_DOMAIN = "style"
+
+
+def _build_domain_router(domain_keywords):
+    """
+    keyword -> domains listing it, and one automaton over every keyword, so a
+    query is scored against all domains in a single pass
+    """
+    keyword_domains = {}
+    for domain, keywords in domain_keywords.items():
+        for kw in keywords:
+            keyword_domains.setdefault(kw, []).append(domain)
+    return keyword_domains, KeywordAutomaton(keyword_domains)
+
+
+_KEYWORD_DOMAINS, _DOMAIN_ROUTER = _build_domain_router(DOMAIN_KEYWORDS)
+_DOMAIN_ORDER = {domain: i for i, domain in enumerate(DOMAIN_KEYWORDS)}
+
+
+def rank_domains(query, top_n=None):
+    """
+    Rank domains by how many of their keywords occur in the query.
+
+    Returns [(domain, confidence), ...] best first, where confidence is the
+    domain's share of all keyword hits; ties keep DOMAIN_KEYWORDS order.
+    A query that matches nothing returns [(FALLBACK_DOMAIN, 0.0)].
+    """
+    if top_n is not None and top_n < 1:
+        raise ValueError(f"top_n must be at least 1, got {top_n}")
+    ranked = _ROUTE_CACHE.get(query)
+    if ranked is None:
+        scores = {}
+        for kw in _DOMAIN_ROUTER.matches(query.lower()):
+            for domain in _KEYWORD_DOMAINS[kw]:
+                scores[domain] = scores.get(domain, 0) + 1
+        if scores:
+            total = sum(scores.values())
+            order = sorted(scores, key=lambda d: (-scores[d], _DOMAIN_ORDER[d]))
+            ranked = tuple((domain, round(scores[domain] / total, 3)) for domain in order)
+        else:
+            ranked = ((FALLBACK_DOMAIN, 0.0),)
+        _ROUTE_CACHE.put(query, ranked)
+    return list(ranked[:top_n])
+
+
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
+    return rank_domains(query, 1)[0][0]
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+def search(query, domain=None, max_results=MAX_RESULTS, top_domains=1):
+    """
+    Main search function with auto-domain detection. With top_domains > 1 and
+    no domain given, the query runs against each of the best-ranked domains
+    (see rank_domains) and the results are merged, grouped by domain.
+    """
+    if top_domains < 1:
+        raise ValueError(f"top_domains must be at least 1, got {top_domains}")
     if domain is None:
-        domain = detect_domain(query)
+        ranked = rank_domains(query, top_domains)
+        if len(ranked) > 1:
+            return _search_domains(query, ranked, max_results)
+        domain = ranked[0][0]
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -220,17 +748,62 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    def compute():
+        results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+        return {
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(results),
+            "results": results
+        }
 
+    return _memoized((domain, query, max_results), filepath, compute)
+
+
+def _search_domains(query, ranked, max_results):
+    """Merge search() over several (domain, confidence) pairs, best domain first"""
+    responses = [search(query, domain, max_results) for domain, _ in ranked]
+    results = []
+    for response in responses:
+        results.extend({"Domain": response["domain"], **row} for row in response.get("results", []))
     return {
-        "domain": domain,
+        "domain": ", ".join(domain for domain, _ in ranked),
+        "domains": [{"domain": domain, "confidence": confidence} for domain, confidence in ranked],
         "query": query,
-        "file": config["file"],
+        "file": ", ".join(r["file"] for r in responses if "file" in r),
         "count": len(results),
         "results": results
     }
 
 
+def search_many(queries, domain, max_results=MAX_RESULTS):
+    """
+    Run a batch of queries against one domain with a single index load.
+    Returns one result dict per query, identical to calling search() for each.
+    """
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = DATA_DIR / config["file"]
+
+    if not filepath.exists():
+        return [{"error": f"File not found: {filepath}", "domain": domain} for _ in queries]
+
+    data, bm25 = load_index(filepath, config["search_cols"])
+    batches = bm25.top_k_many(list(queries), max_results)
+
+    responses = []
+    for query, ranked in zip(queries, batches):
+        results = _format_results(data, ranked, config["output_cols"])
+        responses.append({
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(results),
+            "results": results
+        })
+    return responses
+
+
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
@@ -241,13 +814,83 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    def compute():
+        results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+        return {
+            "domain": "stack",
+            "stack": stack,
+            "query": query,
+            "file": STACK_CONFIG[stack]["file"],
+            "count": len(results),
+            "results": results
+        }
+
+    return _memoized((f"stack:{stack}", query, max_results), filepath, compute)
+
+
+def load_stack_index(stacks=None):
+    """
+    One BM25 index over the guidelines of every stack (or the given ones), so
+    IDF is corpus-wide and scores are comparable across stacks. Returns
+    (rows, stack of each row, fitted BM25); cached until a stack CSV changes.
+    """
+    # A stack listed twice would be indexed twice, doubling its rows and skewing IDF
+    stacks = [s for s in dict.fromkeys(stacks or AVAILABLE_STACKS) if (DATA_DIR / STACK_CONFIG[s]["file"]).exists()]
+    stamps = []
+    for stack in stacks:
+        stat = (DATA_DIR / STACK_CONFIG[stack]["file"]).stat()
+        stamps.append((stack, stat.st_mtime_ns, stat.st_size))
+    cache_key = ("stacks", tuple(stamps))
+    cached = _INDEX_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    rows, tags, documents = [], [], []
+    search_cols = _STACK_COLS["search_cols"]
+    for stack in stacks:
+        data, _ = load_index(DATA_DIR / STACK_CONFIG[stack]["file"], search_cols)
+        rows.extend(data)
+        tags.extend([stack] * len(data))
+        documents.extend(" ".join(str(row.get(col, "")) for col in search_cols) for row in data)
+    bm25 = BM25()
+    bm25.fit(documents)
+
+    index = rows, tags, bm25
+    _INDEX_CACHE.put(cache_key, index)
+    return index
+
+
+def search_stacks(query, stacks=None, max_results=MAX_RESULTS):
+    """
+    Federated search across several stacks (default: all) in one unified index.
+    `results` is globally ranked, with a Stack column and up to max_results
+    per stack; `by_stack` groups the same rows per stack, best stack first.
+    """
+    unknown = [s for s in (stacks or []) if s not in STACK_CONFIG]
+    if unknown:
+        return {"error": f"Unknown stack: {', '.join(unknown)}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    rows, tags, bm25 = load_stack_index(stacks)
+    searched = list(dict.fromkeys(tags))
+
+    results = []
+    by_stack = {}
+    for idx, score in bm25.ranked(query):
+        group = by_stack.setdefault(tags[idx], [])
+        if score <= 0 or len(group) >= max_results:
+            continue
+        row = rows[idx]
+        result = {"Stack": tags[idx], **{col: row.get(col, "") for col in _STACK_COLS["output_cols"] if col in row}}
+        group.append(result)
+        results.append(result)
 
     return {
         "domain": "stack",
-        "stack": stack,
+        "stack": ", ".join(searched),
+        "stacks": searched,
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
+        "file": ", ".join(STACK_CONFIG[s]["file"] for s in searched),
         "count": len(results),
-        "results": results
+        "results": results,
+        "by_stack": {stack: group for stack, group in by_stack.items() if group}
     }
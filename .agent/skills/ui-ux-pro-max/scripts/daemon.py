@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Daemon - keeps every search index hot in a long-running process
+
+Usage: python search.py --daemon            # run in the foreground
+       python search.py --stop-daemon       # ask a running daemon to exit
+
+search.py talks to the daemon automatically when it is running and falls back
+to in-process search otherwise. The daemon listens on 127.0.0.1 only; set
+UIPROMAX_DAEMON_PORT to change the port.
+
+Any local process, and any web page via the browser, can reach a loopback
+port, so every request must carry the token the daemon writes at startup to
+~/.cache/uipromax/daemon-<port>.token (mode 0600), and POST bodies must be
+application/json. The daemon only searches and renders; it never writes
+files, so persisting a design system always runs in the caller's process.
+"""
+
+import os
+import socket
+
+DEFAULT_PORT = 47821
+HOST = "127.0.0.1"
+CONNECT_TIMEOUT = 0.05   # a missing daemon must cost almost nothing
+REQUEST_TIMEOUT = 30.0
+TOKEN_HEADER = "X-UIProMax-Token"
+
+
+def daemon_port():
+    return int(os.environ.get("UIPROMAX_DAEMON_PORT", DEFAULT_PORT))
+
+
+def token_path(port=None):
+    return os.path.join(os.path.expanduser("~"), ".cache", "uipromax", f"daemon-{port or daemon_port()}.token")
+
+
+def _read_token(port=None):
+    try:
+        with open(token_path(port), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# ============ CLIENT ============
+def call_daemon(op, payload):
+    """Run op on the daemon; returns its JSON response, or None if no daemon answered"""
+    # No token file means no daemon of ours; then probe with a bare socket:
+    # http.client and json are only worth importing once one is listening.
+    token = _read_token()
+    if token is None:
+        return None
+    try:
+        sock = socket.create_connection((HOST, daemon_port()), timeout=CONNECT_TIMEOUT)
+    except OSError:
+        return None
+    import http.client
+    import json
+
+    conn = http.client.HTTPConnection(HOST, daemon_port())
+    conn.sock = sock
+    try:
+        sock.settimeout(REQUEST_TIMEOUT)
+        body = json.dumps(payload).encode("utf-8")
+        conn.request("POST", f"/{op}", body, {"Content-Type": "application/json", TOKEN_HEADER: token})
+        response = conn.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+
+
+# ============ SERVER ============
+def _handlers():
+    from core import search, search_stack, search_stacks
+    from design_system import generate_design_system
+
+    def design_system(p):
+        # Render only: persist and output_dir are not part of the protocol
+        return {"output": generate_design_system(p["query"], p.get("project_name"), p.get("output_format", "ascii"))}
+
+    return {
+        "search": lambda p: search(p["query"], p.get("domain"), p.get("max_results", 3), p.get("top_domains", 1)),
+        "search_stack": lambda p: search_stack(p["query"], p["stack"], p.get("max_results", 3)),
+        "search_stacks": lambda p: search_stacks(p["query"], p.get("stacks"), p.get("max_results", 3)),
+        "design_system": design_system,
+    }
+
+
+def _write_token(path):
+    """Create a fresh random token readable only by this user"""
+    import secrets
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def serve(port=None):
+    """Warm every index, then serve search requests until /shutdown"""
+    import hmac
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from core import build_indexes, cache_stats, load_stack_index
+
+    build_indexes()
+    load_stack_index()
+    handlers = _handlers()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            sent = self.headers.get(TOKEN_HEADER, "")
+            if hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8")):
+                return True
+            self._reply(403, {"error": "Missing or wrong daemon token"})
+            return False
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "pid": os.getpid(), "cache": cache_stats()})
+            else:
+                self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            # Browsers can send text/plain or form bodies cross-origin without a preflight
+            if self.headers.get_content_type() != "application/json":
+                self._reply(415, {"error": "Content-Type must be application/json"})
+                return
+            op = self.path.lstrip("/")
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "Invalid JSON"})
+                return
+
+            if op == "shutdown":
+                self._reply(200, {"status": "stopping"})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            if op not in handlers:
+                self._reply(404, {"error": f"Unknown operation: {op}"})
+                return
+            try:
+                self._reply(200, handlers[op](payload))
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    port = port or daemon_port()
+    server = ThreadingHTTPServer((HOST, port), Handler)
+    path = token_path(port)
+    token = _write_token(path)
+    print(f"UI Pro Max daemon listening on http://{HOST}:{port} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if _read_token(port) == token:
+            os.unlink(path)
+
+
+def stop_daemon():
+    """Returns True if a running daemon acknowledged the shutdown"""
+    return call_daemon("shutdown", {}) is not None
+
+
+if __name__ == "__main__":
+    serve()
@@ -11,18 +11,30 @@ Usage:
     # With persistence (Master + Overrides pattern)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
+
+    # Many projects at once (see generate_batch for the manifest format)
+    results = generate_batch(load_batch_manifest("skins.json"), output_dir="out")
 """
 
 import csv
+import hashlib
 import json
+import multiprocessing
 import os
+import re
+import stat
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, build_indexes, CSV_CONFIG, DATA_DIR, KeywordAutomaton
 
 
 # ============ CONFIGURATION ============
 REASONING_FILE = "ui-reasoning.csv"
+MANIFEST_FILE = ".manifest.json"  # per-project record of what each persisted file was built from
+MANIFEST_VERSION = 1
 
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
@@ -32,75 +44,46 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Used when no reasoning rule matches the product category
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
 
-# ============ DESIGN SYSTEM GENERATOR ============
-class DesignSystemGenerator:
-    """Generates design system recommendations from aggregated searches."""
-
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
-
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
-
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
-
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
 
-        return {}
+# ============ REASONING RULES ============
+class ReasoningRules:
+    """
+    ui-reasoning.csv compiled for lookup.
 
-    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
-        """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
+    A category resolves to the first rule (in file order) that matches exactly,
+    else partially, else on a keyword, as before - but via a dict and two
+    KeywordAutomaton passes instead of three scans that re-split every rule.
+    Decision_Rules JSON is parsed once and each category's answer is memoized.
+    """
 
+    def __init__(self, rows: list):
+        self.rows = rows
+        self._categories = [rule.get("UI_Category", "").lower() for rule in rows]
+        self._exact = {}          # lowercased UI_Category -> first rule index
+        self._keyword_first = {}  # UI_Category keyword -> first rule index using it
+        for i, ui_cat in enumerate(self._categories):
+            self._exact.setdefault(ui_cat, i)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self._keyword_first.setdefault(kw, i)
+        self._category_matcher = KeywordAutomaton(self._exact)
+        self._keyword_matcher = KeywordAutomaton(self._keyword_first)
+        self._reasoning = [self._compile(rule) for rule in rows]
+        self._cache = {}  # lowercased category -> reasoning dict
+
+    @staticmethod
+    def _compile(rule: dict) -> dict:
         # Parse decision rules JSON
         decision_rules = {}
         try:
@@ -119,6 +102,131 @@ class DesignSystemGenerator:
             "severity": rule.get("Severity", "MEDIUM")
         }
 
+    def find(self, category: str):
+        """Index of the rule matching category, or None."""
+        category_lower = category.lower()
+
+        # Try exact match first
+        exact = self._exact.get(category_lower)
+        if exact is not None:
+            return exact
+
+        # Try partial match: rule category inside ours, or ours inside it
+        hits = [self._exact[ui_cat] for ui_cat in self._category_matcher.matches(category_lower)]
+        contained = next((i for i, ui_cat in enumerate(self._categories) if category_lower in ui_cat), None)
+        if contained is not None:
+            hits.append(contained)
+        if hits:
+            return min(hits)
+
+        # Try keyword match
+        hits = [self._keyword_first[kw] for kw in self._keyword_matcher.matches(category_lower)]
+        return min(hits) if hits else None
+
+    def reasoning(self, category: str) -> dict:
+        """Reasoning for a category (DEFAULT_REASONING if no rule matches)."""
+        key = category.lower()
+        reasoning = self._cache.get(key)
+        if reasoning is None:
+            index = self.find(category)
+            reasoning = DEFAULT_REASONING if index is None else self._reasoning[index]
+            self._cache[key] = reasoning
+        # Callers get their own copy so the memoized one can never be edited
+        # (decision rules are a flat {condition: action} map of strings)
+        return dict(reasoning, style_priority=list(reasoning["style_priority"]),
+                    decision_rules=dict(reasoning["decision_rules"]))
+
+
+_REASONING_CACHE = {}  # csv path -> ((mtime_ns, size), ReasoningRules)
+
+
+def load_reasoning_rules(filepath=None) -> ReasoningRules:
+    """Load and compile reasoning rules, reusing the compiled copy until the CSV changes."""
+    filepath = Path(filepath or DATA_DIR / REASONING_FILE)
+    try:
+        st = filepath.stat()
+    except OSError:
+        return ReasoningRules([])
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _REASONING_CACHE.get(str(filepath))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        rules = ReasoningRules(list(csv.DictReader(f)))
+    _REASONING_CACHE[str(filepath)] = (stamp, rules)
+    return rules
+
+
+# ============ DESIGN SYSTEM GENERATOR ============
+class DesignSystemGenerator:
+    """Generates design system recommendations from aggregated searches."""
+
+    def __init__(self, parallel: bool = True):
+        self.parallel = parallel
+        self.rules = load_reasoning_rules()
+        self.reasoning_data = self.rules.rows
+
+    def _style_query(self, query: str, style_priority: list = None) -> str:
+        """For style, also search with priority keywords."""
+        if not style_priority:
+            return query
+        priority_query = " ".join(style_priority[:2])
+        return f"{query} {priority_query}"
+
+    def _timed_search(self, query: str, domain: str, timings: dict) -> dict:
+        started = time.perf_counter()
+        result = search(query, domain, SEARCH_CONFIG[domain]["max_results"])
+        timings[domain] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def _search_all(self, query: str) -> tuple:
+        """
+        Run every domain search needed by generate(). Only style depends on
+        another result (the product category picks its priority keywords), so
+        in parallel mode product, color, landing and typography run
+        concurrently and style starts as soon as product returns.
+
+        Returns (search_results, category, reasoning, timings in ms).
+        """
+        timings = {}
+        independent = [domain for domain in SEARCH_CONFIG if domain != "style"]
+
+        def categorize(product_result):
+            started = time.perf_counter()
+            product_results = product_result.get("results", [])
+            category = "General"
+            if product_results:
+                category = product_results[0].get("Product Type", "General")
+            reasoning = self._apply_reasoning(category, {})
+            timings["reasoning"] = round((time.perf_counter() - started) * 1000, 3)
+            return category, reasoning
+
+        if self.parallel:
+            with ThreadPoolExecutor(max_workers=len(independent)) as pool:
+                futures = {domain: pool.submit(self._timed_search, query, domain, timings) for domain in independent}
+                category, reasoning = categorize(futures["product"].result())
+                style_query = self._style_query(query, reasoning.get("style_priority", []))
+                results = {"style": self._timed_search(style_query, "style", timings)}
+                results.update((domain, future.result()) for domain, future in futures.items())
+        else:
+            results = {"product": self._timed_search(query, "product", timings)}
+            category, reasoning = categorize(results["product"])
+            style_query = self._style_query(query, reasoning.get("style_priority", []))
+            results["style"] = self._timed_search(style_query, "style", timings)
+            for domain in independent[1:]:
+                results[domain] = self._timed_search(query, domain, timings)
+
+        return results, category, reasoning, timings
+
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        index = self.rules.find(category)
+        return self.reasoning_data[index] if index is not None else {}
+
+    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
+        """Apply reasoning rules to search results."""
+        return self.rules.reasoning(category)
+
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
         if not results:
@@ -162,20 +270,11 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
-        category = "General"
-        if product_results:
-            category = product_results[0].get("Product Type", "General")
+        started = time.perf_counter()
 
-        # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
-        style_priority = reasoning.get("style_priority", [])
-
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Steps 1-3: product search -> category -> reasoning rules, and every
+        # other domain search (style with the reasoning's priority hints)
+        search_results, category, reasoning, timings = self._search_all(query)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -232,7 +331,8 @@ class DesignSystemGenerator:
             "key_effects": combined_effects,
             "anti_patterns": reasoning.get("anti_patterns", ""),
             "decision_rules": reasoning.get("decision_rules", {}),
-            "severity": reasoning.get("severity", "MEDIUM")
+            "severity": reasoning.get("severity", "MEDIUM"),
+            "timings": dict(timings, total=round((time.perf_counter() - started) * 1000, 3))
         }
 
 
@@ -487,7 +587,238 @@ def generate_design_system(query: str, project_name: str = None, output_format:
     return format_ascii_box(design_system)
 
 
+# ============ BATCH MODE ============
+def load_batch_manifest(path: str) -> list:
+    """
+    Read a batch manifest: a JSON list of entries (or {"projects": [...]}) like
+
+        {"query": "sportsbook dark", "project": "Skin A", "pages": ["dashboard", {"name": "checkout", "query": "..."}]}
+
+    Returns entries normalized to {"query", "project", "pages": [(page, page_query), ...]}.
+    A page without its own query uses the entry's query, as --persist --page does.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = manifest.get("projects", [])
+
+    entries = []
+    for entry in manifest:
+        if not entry.get("query"):
+            raise ValueError(f"Manifest entry without a query: {entry}")
+        pages = []
+        for page in entry.get("pages", []):
+            if isinstance(page, str):
+                pages.append((page, entry["query"]))
+            else:
+                pages.append((page["name"], page.get("query", entry["query"])))
+        entries.append({"query": entry["query"], "project": entry.get("project"), "pages": pages})
+    return entries
+
+
+def _generate_entry(entry: dict, output_dir: str = None) -> dict:
+    """Generate and persist one batch entry; errors are reported, not raised."""
+    project_name = entry.get("project") or entry["query"].upper()
+    try:
+        # Everything the entry is generated from is known up front, so an
+        # entry whose inputs and files are unchanged skips generate() entirely
+        design_system_dir = _project_dir(project_name, output_dir)
+        manifest = _read_manifest(design_system_dir / MANIFEST_FILE)
+        request = _request_key(entry["query"], project_name, entry.get("pages", []),
+                               _data_hashes(manifest.get("data", {})))
+        result = _unchanged_result(design_system_dir, manifest, request)
+        if result is None:
+            # Entries already run side by side, so each one searches sequentially
+            design_system = DesignSystemGenerator(parallel=False).generate(entry["query"], entry.get("project"))
+            result = _persist(design_system, entry.get("pages", []), output_dir, request)
+    except Exception as e:
+        return {"status": "error", "query": entry["query"], "project": entry.get("project"), "error": str(e)}
+    result["query"] = entry["query"]
+    result["project"] = project_name
+    return result
+
+
+def generate_batch(entries: list, output_dir: str = None, workers: int = None) -> list:
+    """
+    Generate and persist many design systems in one run.
+
+    Search indexes and reasoning rules are loaded once up front; on platforms
+    that fork, every worker process inherits them already in memory. Files
+    are written atomically and skipped when only the timestamp would change.
+    An entry whose query, project, pages, data CSVs and generator code all
+    match its last run, and whose files are untouched, is not regenerated.
+
+    Each project may appear only once: entries for the same project would
+    write the same directory and manifest concurrently.
+
+    Args:
+        entries: Entries as returned by load_batch_manifest
+        output_dir: Optional output directory (defaults to current working directory)
+        workers: Worker processes (default: CPU count; 1 runs in-process)
+
+    Returns:
+        One persist result per entry, in manifest order
+
+    Raises:
+        ValueError: if two entries resolve to the same project directory
+    """
+    seen = {}
+    for i, entry in enumerate(entries, 1):
+        slug = slugify(entry.get("project") or entry["query"].upper())
+        if slug in seen:
+            raise ValueError(f"Entries {seen[slug]} and {i} both write design-system/{slug}/; "
+                             f"merge their pages into one entry or rename a project")
+        seen[slug] = i
+
+    build_indexes()
+    load_reasoning_rules()
+
+    workers = min(workers or os.cpu_count() or 1, len(entries))
+    if workers <= 1:
+        return [_generate_entry(entry, output_dir) for entry in entries]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(_generate_entry, entries, [output_dir] * len(entries)))
+
+
 # ============ PERSISTENCE FUNCTIONS ============
+# The timestamp line changes on every run, so it is left out of content hashes
+_GENERATED_LINE = re.compile(r"^(> )?\*\*Generated:\*\*.*$", re.MULTILINE)
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha1(_GENERATED_LINE.sub("", content).encode("utf-8")).hexdigest()
+
+
+def _file_content_hash(path: Path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return _content_hash(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+_code_hash = None
+
+
+def _generator_code_hash() -> str:
+    """sha1 of the code a design system is generated by, so an upgrade regenerates everything."""
+    global _code_hash
+    if _code_hash is None:
+        here = Path(__file__).resolve().parent
+        _code_hash = _hash_text("".join(_hash_text((here / name).read_text(encoding="utf-8"))
+                                        for name in ("core.py", "design_system.py")))
+    return _code_hash
+
+
+def _request_key(query: str, project_name: str, pages: list, data: dict) -> str:
+    """Hash of every input of a persisted design system, computable before generating it."""
+    return _hash_text(json.dumps({
+        "query": query,
+        "project": project_name,
+        "pages": [[page, page_query or ""] for page, page_query in pages],
+        "data": {name: h["sha1"] for name, h in data.items()},
+        "code": _generator_code_hash(),
+    }, sort_keys=True))
+
+
+def _unchanged_result(design_system_dir: Path, manifest: dict, request: str):
+    """The persist result for a request whose files are all still as recorded, else None."""
+    recorded = manifest.get("request") or {}
+    if recorded.get("key") != request:
+        return None
+    files = manifest.get("files", {})
+    paths = []
+    for name in recorded.get("files", []):
+        path = design_system_dir / name
+        if name not in files or _file_content_hash(path) != files[name]["output"]:
+            return None
+        paths.append(str(path))
+    return {
+        "status": "success",
+        "design_system_dir": str(design_system_dir),
+        "created_files": paths,
+        "unchanged_files": list(paths),
+        "generated": False,
+    }
+
+
+def _data_hashes(previous: dict) -> dict:
+    """
+    sha1 of every CSV that feeds a design system or its page overrides, as
+    {file: {"mtime_ns", "size", "sha1"}}. Files whose mtime and size match
+    the previous manifest keep their recorded hash instead of being re-read.
+    """
+    files = sorted({c["file"] for c in CSV_CONFIG.values()} | {REASONING_FILE})
+    hashes = {}
+    for name in files:
+        filepath = DATA_DIR / name
+        try:
+            st = filepath.stat()
+        except OSError:
+            continue
+        old = previous.get(name, {})
+        if old.get("mtime_ns") == st.st_mtime_ns and old.get("size") == st.st_size:
+            hashes[name] = old
+            continue
+        with open(filepath, 'rb') as f:
+            hashes[name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                            "sha1": hashlib.sha1(f.read()).hexdigest()}
+    return hashes
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def slugify(name: str, default: str = "default") -> str:
+    """File-system-safe name: lowercase [a-z0-9-] only, so no separators or '..' survive."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or default
+
+
+# Read once at import: os.umask() can only be read by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Atomically replace path with content unless only the timestamp would change."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if _content_hash(f.read()) == _content_hash(content):
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = 0o666 & ~_UMASK  # what a plain open() would have created
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp creates 0600 files; keep the permissions the file had (or would get)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+
 def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
@@ -499,43 +830,79 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
         page_query: Optional query string for intelligent page override generation
     
     Returns:
-        dict with created file paths and status
+        dict with status, every file path (created_files), the ones left
+        untouched because only their timestamp would have changed (unchanged_files)
+        and whether the design system was generated for this call (generated)
     """
+    return _persist(design_system, [(page, page_query)] if page else [], output_dir)
+
+
+def _project_dir(project_name: str, output_dir: str = None) -> Path:
     base_dir = Path(output_dir) if output_dir else Path.cwd()
-    
+    return base_dir / "design-system" / slugify(project_name)
+
+
+def _persist(design_system: dict, pages: list, output_dir: str = None, request: str = None) -> dict:
+    """
+    Write MASTER.md plus one override file per (page, page_query).
+
+    Per file, the manifest records what it was built from, so only the files
+    whose inputs changed are re-rendered; the design system itself has
+    already been generated by then. `request` (see _request_key) lets a later
+    batch run skip generation altogether when nothing changed.
+    """
     # Use project name for project-specific folder
-    project_name = design_system.get("project_name", "default")
-    project_slug = project_name.lower().replace(' ', '-')
-    
-    design_system_dir = base_dir / "design-system" / project_slug
+    design_system_dir = _project_dir(design_system.get("project_name", "default"), output_dir)
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    unchanged_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
-    
-    master_file = design_system_dir / "MASTER.md"
-    
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
-    
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+
+    # A file is rebuilt only when what it was built from changed: the design
+    # system itself, the page and its query, or any of the data CSVs
+    manifest_path = design_system_dir / MANIFEST_FILE
+    manifest = _read_manifest(manifest_path)
+    data = _data_hashes(manifest.get("data", {}))
+    shared_inputs = {
+        "design_system": _hash_text(json.dumps({k: v for k, v in design_system.items() if k != "timings"}, sort_keys=True)),
+        "data": _hash_text(json.dumps({name: h["sha1"] for name, h in data.items()}, sort_keys=True)),
+    }
+
+    # Generate and write MASTER.md, then any page override files with intelligent content
+    targets = [("MASTER.md", shared_inputs, lambda: format_master_md(design_system))]
+    for page, page_query in pages:
+        inputs = dict(shared_inputs, page=_hash_text(page), query=_hash_text(page_query or ""))
+        targets.append((f"pages/{slugify(page, 'page')}.md", inputs,
+                        lambda page=page, page_query=page_query: format_page_override_md(design_system, page, page_query)))
+
+    files = manifest.get("files", {})
+    for name, inputs, render in targets:
+        path = design_system_dir / name
+        created_files.append(str(path))
+        recorded = files.get(name)
+        if recorded and recorded["inputs"] == inputs and _file_content_hash(path) == recorded["output"]:
+            unchanged_files.append(str(path))
+            continue
+        content = render()
+        if not _write_if_changed(path, content):
+            unchanged_files.append(str(path))
+        files[name] = {"inputs": inputs, "output": _content_hash(content)}
+
+    recorded = {"version": MANIFEST_VERSION, "data": data, "files": files}
+    if request:
+        recorded["request"] = {"key": request, "files": [name for name, _, _ in targets]}
+    _write_if_changed(manifest_path, json.dumps(recorded, indent=2, sort_keys=True) + "\n")
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "unchanged_files": unchanged_files,
+        "generated": True,
     }
 
 
@@ -7,24 +7,44 @@ Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-r
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
+         (auto-detected when --domain is omitted; --top-domains N merges the N best)
 Stacks: html-tailwind, react, nextjs
+       python search.py "<query>" --stacks all|react,vue   # one ranked search across stacks
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Batch (one manifest of projects, generated in a process pool):
+  --batch        JSON manifest: [{"query": ..., "project": ..., "pages": [...]}, ...]
+  --workers      Worker processes for --batch (default: CPU count)
+
+Index:
+  --build-index  Prebuild data/.index/ (otherwise built lazily on first search)
+
+Daemon (keeps indexes hot between calls; used automatically when running):
+  --daemon       Run the search daemon in the foreground
+  --stop-daemon  Stop a running daemon
+  --no-daemon    Always search in-process
 """
 
 import argparse
 import sys
-import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack, search_stacks
+from daemon import call_daemon
 
-# Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
-if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-if sys.stderr.encoding and sys.stderr.encoding.lower() != 'utf-8':
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Cold start matters here: every agent call is a fresh process. Anything only
+# one code path needs (design_system, the daemon server, json) is
+# imported inside that path; run scripts/bench_startup.py after touching imports.
+
+
+def _force_utf8():
+    """Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)"""
+    import io
+    if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    if sys.stderr.encoding and sys.stderr.encoding.lower() != 'utf-8':
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 
 def format_output(result):
@@ -53,12 +73,62 @@ def format_output(result):
     return "\n".join(output)
 
 
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def run_search(query, domain, max_results, use_daemon=True, top_domains=1):
+    """Search via the daemon when one is running, otherwise in-process"""
+    if use_daemon:
+        result = call_daemon("search", {"query": query, "domain": domain, "max_results": max_results,
+                                        "top_domains": top_domains})
+        if result is not None:
+            return result
+    return search(query, domain, max_results, top_domains)
+
+
+def run_search_stack(query, stack, max_results, use_daemon=True):
+    if use_daemon:
+        result = call_daemon("search_stack", {"query": query, "stack": stack, "max_results": max_results})
+        if result is not None:
+            return result
+    return search_stack(query, stack, max_results)
+
+
+def run_search_stacks(query, stacks, max_results, use_daemon=True):
+    if use_daemon:
+        result = call_daemon("search_stacks", {"query": query, "stacks": stacks, "max_results": max_results})
+        if result is not None:
+            return result
+    return search_stacks(query, stacks, max_results)
+
+
+def run_design_system(query, project_name, output_format, persist, page, output_dir, use_daemon=True):
+    # The daemon never writes files, so persisting always runs in this process
+    if use_daemon and not persist:
+        result = call_daemon("design_system", {
+            "query": query, "project_name": project_name, "output_format": output_format
+        })
+        if result is not None:
+            return result["output"]
+    from design_system import generate_design_system
+    return generate_design_system(query, project_name, output_format,
+                                  persist=persist, page=page, output_dir=output_dir)
+
+
 if __name__ == "__main__":
+    _force_utf8()
+
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stacks", type=str, default=None, help="Federated search across stacks: 'all' or a comma-separated list (e.g. react,vue)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--top-domains", type=_positive_int, default=1, help="Without --domain, search the N best-matching domains and merge (default: 1)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
@@ -68,37 +138,86 @@ if __name__ == "__main__":
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Batch generation
+    parser.add_argument("--batch", type=str, default=None, metavar="MANIFEST", help="Generate and persist every design system in a JSON manifest")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --batch (default: CPU count)")
+    # Index maintenance
+    parser.add_argument("--build-index", action="store_true", help="Prebuild the on-disk search index for every domain and stack")
+    # Daemon
+    parser.add_argument("--daemon", action="store_true", help="Run the search daemon (keeps all indexes hot in memory)")
+    parser.add_argument("--stop-daemon", action="store_true", help="Stop a running search daemon")
+    parser.add_argument("--no-daemon", action="store_true", help="Search in-process even if a daemon is running")
 
     args = parser.parse_args()
 
+    if args.build_index:
+        from core import build_indexes
+        for path in build_indexes():
+            print(f"Indexed: {path}")
+        sys.exit(0)
+    if args.daemon:
+        from daemon import serve
+        serve()
+        sys.exit(0)
+    if args.stop_daemon:
+        from daemon import stop_daemon
+        print("Daemon stopped" if stop_daemon() else "No daemon running")
+        sys.exit(0)
+    if args.batch:
+        from design_system import generate_batch, load_batch_manifest
+        failed = 0
+        for result in generate_batch(load_batch_manifest(args.batch), args.output_dir, args.workers):
+            if result["status"] != "success":
+                failed += 1
+                print(f"❌ {result['project'] or result['query']}: {result['error']}")
+                continue
+            written = len(result["created_files"]) - len(result["unchanged_files"])
+            regenerated = "" if result["generated"] else ", inputs unchanged"
+            print(f"✅ {result['design_system_dir']} ({written} written, {len(result['unchanged_files'])} unchanged{regenerated})")
+        sys.exit(1 if failed else 0)
+    use_daemon = not args.no_daemon
+    if args.query is None:
+        parser.error("the following arguments are required: query")
+
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(
+        result = run_design_system(
             args.query, 
             args.project_name, 
             args.format,
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            use_daemon=use_daemon
         )
         print(result)
         
         # Print persistence confirmation
         if args.persist:
-            project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
+            from design_system import slugify
+            project_slug = slugify(args.project_name) if args.project_name else "default"
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
             print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
             if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
+                page_filename = slugify(args.page, "page")
                 print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
+    # Federated search across stacks
+    elif args.stacks:
+        stacks = None if args.stacks == "all" else [s.strip() for s in args.stacks.split(",") if s.strip()]
+        result = run_search_stacks(args.query, stacks, args.max_results, use_daemon)
+        if args.json:
+            import json
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print(format_output(result))
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = run_search_stack(args.query, args.stack, args.max_results, use_daemon)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -106,7 +225,7 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = run_search(args.query, args.domain, args.max_results, use_daemon, args.top_domains)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
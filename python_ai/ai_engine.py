@@ -3,6 +3,8 @@ import xgboost as xgb
 from sklearn.model_selection import train_test_split
 import os
 import random
+from odds_ingest import DEFAULT_STATS, get_snapshot
+from metrics import MODEL_BATCH_SIZE, MODEL_PREDICT
 
 # --- 1. BETTING STRATEGY ENGINE ---
 class BettingEngine:
@@ -44,6 +46,8 @@ class SportsPredictionModel:
         # We initialize the XGBoost Classifier
         self.model = xgb.XGBClassifier(n_estimators=100, learning_rate=0.1, objective='binary:logistic')
         self.is_trained = False
+        self.is_warm = False
+        self.feature_names = None
         
     def train(self, csv_path):
         if not os.path.exists(csv_path):
@@ -55,6 +59,7 @@ class SportsPredictionModel:
             data = pd.read_csv(csv_path)
             X = data.drop('is_home_win', axis=1) # The Stats/Features
             y = data['is_home_win']              # Target (1 = Win, 0 = Loss)
+            self.feature_names = list(X.columns)
             
             # Splitting data for training vs testing
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -79,9 +84,39 @@ class SportsPredictionModel:
             print("Warning: Model is untrained, reverting to 50% probability.")
             return 0.5 
             
-        df = pd.DataFrame([game_features])
+        # Snapshot stats are read-only mappings in whatever key order the feed used,
+        # so copy into a dict and pin the training column order (as predict_batch does)
+        df = pd.DataFrame([dict(game_features)], columns=self.feature_names)
         # Returns the probability of the Positive Class [1] (Home Win)
-        return float(self.model.predict_proba(df)[:, 1][0])
+        with MODEL_PREDICT.time():
+            probability = float(self.model.predict_proba(df)[:, 1][0])
+        MODEL_BATCH_SIZE.observe(1)
+        return probability
+
+    def predict_batch(self, features_list):
+        """Scores many games with a single predict_proba call; returns one probability per game."""
+        if not features_list:
+            return []
+        if not self.is_trained:
+            return [0.5] * len(features_list)
+
+        # Feature dicts can arrive in any key order (e.g. from JSON), so pin the training column order
+        df = pd.DataFrame(features_list, columns=self.feature_names)
+        with MODEL_PREDICT.time():
+            probabilities = self.model.predict_proba(df)[:, 1]
+        MODEL_BATCH_SIZE.observe(len(features_list))
+        return [float(p) for p in probabilities]
+
+    def warm_up(self):
+        """
+        Runs one throwaway prediction so XGBoost builds its predictor and
+        pandas/numpy code paths are paged in before the first real request.
+        """
+        if not self.is_trained:
+            return False
+        self.predict_probability(DEFAULT_STATS)
+        self.is_warm = True
+        return True
 
 # --- 3. SYNTHETIC DATA GENERATOR ---
 # Because there is no raw CSV provided, we will synthesize a historical dataset so
@@ -116,11 +151,15 @@ def build_synthetic_data(csv_name="historical_sports_data.csv"):
 # --- 4. FETCHING UPCOMING GAMES ---
 def get_upcoming_games():
     """
-    Simulates fetching matches from an API like Arena or Outlier.
-    To make these real, you would use BeautifulSoup or Selenium here 
-    to scrape the live stats and odds for tonight's games.
+    Returns tonight's games from the latest odds snapshot published by the
+    background ingestor (see odds_ingest.py). This never touches the network,
+    so request handlers can call it freely. Until a snapshot exists we fall
+    back to a built-in demo slate.
     """
-    print("📡 Fetching today's upcoming games and sports odds...")
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.games:
+        return snapshot.games
+
     return [
         {"match": "Lakers vs Celtics", "odds": 1.95, "stats": {"home_win_rate": 0.65, "away_win_rate": 0.55, "avg_points_diff": 4.5}},
         {"match": "Man City vs Arsenal", "odds": 2.40, "stats": {"home_win_rate": 0.70, "away_win_rate": 0.80, "avg_points_diff": -1.2}},
@@ -0,0 +1,173 @@
+"""
+Database settings for concurrent serving on SQLite.
+
+Every new connection gets the PRAGMAs below, so readers never wait on the
+writer (WAL) and a briefly held lock is waited out instead of raising
+"database is locked":
+
+    journal_mode=WAL       readers and the writer no longer block each other
+    synchronous=NORMAL     fsync at checkpoints only; safe with WAL
+    mmap_size              reads come straight from the page cache
+    busy_timeout           wait for the lock instead of failing immediately
+
+All writes from request threads and jobs go through one SerializedWriter
+thread, so at most one connection per process ever holds the write lock.
+
+Tune with environment variables:
+
+    PICKLABS_SQLITE_TUNING      0 disables the PRAGMAs and the writer thread (default 1)
+    PICKLABS_SQLITE_MMAP_MB     memory-mapped I/O size in MB         (default 256)
+    PICKLABS_SQLITE_BUSY_MS     busy timeout in ms                   (default 5000)
+    PICKLABS_DB_POOL_SIZE       pooled connections per worker        (default: PICKLABS_THREADS + 2)
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+
+def tuning_enabled():
+    return os.environ.get("PICKLABS_SQLITE_TUNING", "1") != "0"
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS sized for one worker: its request threads plus the writer."""
+    if not uri.startswith("sqlite") or ":memory:" in uri or not tuning_enabled():
+        return {}
+    # gunicorn runs PICKLABS_THREADS request threads per worker; one more for
+    # the writer and one spare for background jobs
+    pool_size = int(os.environ.get("PICKLABS_DB_POOL_SIZE", int(os.environ.get("PICKLABS_THREADS", "4")) + 2))
+    busy_seconds = int(os.environ.get("PICKLABS_SQLITE_BUSY_MS", "5000")) / 1000.0
+    return {
+        "pool_size": pool_size,
+        "max_overflow": pool_size,
+        "pool_pre_ping": False,
+        "connect_args": {"check_same_thread": False, "timeout": busy_seconds},
+    }
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    mmap_bytes = int(os.environ.get("PICKLABS_SQLITE_MMAP_MB", "256")) * 1024 * 1024
+    busy_ms = int(os.environ.get("PICKLABS_SQLITE_BUSY_MS", "5000"))
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={mmap_bytes}")
+    cursor.execute(f"PRAGMA busy_timeout={busy_ms}")
+    cursor.close()
+
+
+def init_db(app, db):
+    """Applies engine options and connection PRAGMAs, then binds db to the app."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {}).update(engine_options(uri))
+    db.init_app(app)
+
+    if uri.startswith("sqlite") and tuning_enabled():
+        from sqlalchemy import event
+
+        with app.app_context():
+            event.listen(db.engine, "connect", _set_pragmas)
+
+
+# Columns added to existing tables after their first release. create_all()
+# only creates missing tables, so databases created earlier get them here.
+ADDED_COLUMNS = {
+    "picks": [("sport", "VARCHAR(20)"), ("graded_at", "DATETIME")],
+}
+
+
+def upgrade_schema(db):
+    """Adds any missing ADDED_COLUMNS and their indexes. Safe to run on every start."""
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                # Same name create_all() gives an index=True column
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{name} ON {table} ({name})"))
+
+
+class SerializedWriter:
+    """
+    Runs every database write on one thread, one job at a time.
+
+    A job is a callable run inside an app context; it must take plain ids and
+    values rather than ORM instances from the caller's session. Its changes
+    are committed when it returns and rolled back if it raises, and submit()
+    hands back a Future for its result. With tuning disabled, call() runs the
+    job inline on the caller's thread instead.
+    """
+
+    def __init__(self, app, db, inline=None):
+        self.app = app
+        self.db = db
+        self.inline = (not tuning_enabled()) if inline is None else inline
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.jobs = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own writer
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name="db-writer", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _execute(self, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+            self.db.session.commit()
+            return result
+        except Exception:
+            self.db.session.rollback()
+            raise
+        finally:
+            self.jobs += 1
+
+    def _run(self):
+        while True:
+            fn, args, kwargs, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.app.app_context():
+                try:
+                    future.set_result(self._execute(fn, args, kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Runs fn on the writer and waits for its result.
+
+        The caller's own transaction is ended first, so the caller must not
+        have unflushed changes. Ending it returns the caller's pooled
+        connection while it waits. Otherwise a pool's worth of request
+        threads, each holding a connection and waiting on the writer, would
+        leave the writer none to run the job on. The caller's objects reload
+        on next access, and they then include the write.
+        """
+        from flask import has_app_context
+
+        if self.inline:
+            if has_app_context():
+                return self._execute(fn, args, kwargs)
+            with self.app.app_context():
+                return self._execute(fn, args, kwargs)
+        if has_app_context():
+            self.db.session.rollback()
+        return self.submit(fn, *args, **kwargs).result()
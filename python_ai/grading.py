@@ -1,11 +1,32 @@
-from models import db, Pick, User
+from datetime import datetime
 
+from sqlalchemy import func
+
+from metrics import PhaseTimer
+from models import db, Betlist, Pick, User
+from query_audit import audited
+
+# Called with the ids of creators whose graded picks or ROI just changed (e.g. the leaderboard)
+roi_listeners = []
+
+@audited("grading")
 def auto_grade_bets():
     """Runs nightly to grade pending bets and update creator ROIs."""
     print("🚦 Initiating PickLabs Automated Grading Protocol...")
+    timer = PhaseTimer("grading")
 
     # 1. Ask the database for EVERY bet that hasn't been graded yet
-    pending_picks = Pick.query.filter_by(status='Pending').all()
+    # The creator id comes along in the same query, for roi_listeners; an outer
+    # join, so picks that are not on a betlist are still graded
+    pending = (
+        db.session.query(Pick, Betlist.user_id)
+        .outerjoin(Betlist, Betlist.id == Pick.betlist_id)
+        .filter(Pick.status == 'Pending')
+        .all()
+    )
+    pending_picks = [pick for pick, _ in pending]
+    graded_user_ids = {user_id for _, user_id in pending if user_id is not None}
+    timer.mark("load_pending")
     
     if not pending_picks:
         print("✅ No pending bets to grade tonight.")
@@ -16,7 +37,9 @@ def auto_grade_bets():
     # final_scores = requests.get("https://v3.api-sports.io/games/finished...").json()
     
     # --- MOCK GRADING LOGIC FOR EXAMPLE ---
+    graded_at = datetime.utcnow()
     for pick in pending_picks:
+        pick.graded_at = graded_at
         # Here, your code compares the `pick.prop_type` to the `final_scores`
         # Let's pretend the Python logic determined this pick was a WIN.
         
@@ -30,34 +53,57 @@ def auto_grade_bets():
             pick.status = 'Lost'
             # They lost their risked unit
             pick.units_won = -1.0 
+    timer.mark("grade")
 
     # 3. Save all the new statuses to the database securely
     db.session.commit()
+    timer.mark("commit")
     print(f"✅ Successfully graded {len(pending_picks)} bets.")
 
     # 4. Recalculate the ROI for all creators who had bets graded tonight
-    update_all_user_rois()
+    update_all_user_rois(changed_user_ids=graded_user_ids)
+    timer.mark("update_rois")
 
-def update_all_user_rois():
-    """Calculates the total ROI for every public creator."""
+@audited("update_rois")
+def update_all_user_rois(changed_user_ids=()):
+    """
+    Calculates the total ROI for every public creator, then tells roi_listeners
+    about every creator whose ROI moved plus any `changed_user_ids`.
+    """
+    timer = PhaseTimer("update_rois")
+    changed = set(changed_user_ids)
     users = User.query.filter_by(is_public=True).all()
+    timer.mark("load_users")
     
+    # One grouped query over every graded pick, instead of walking each
+    # user's betlists and their picks one relationship query at a time
+    totals = {
+        user_id: (risked, profit)
+        for user_id, risked, profit in db.session.query(
+            Betlist.user_id,
+            func.coalesce(func.sum(Pick.units_risked), 0.0),
+            func.coalesce(func.sum(Pick.units_won), 0.0),
+        ).join(Pick, Pick.betlist_id == Betlist.id)
+        .filter(Pick.status != 'Pending')
+        .group_by(Betlist.user_id)
+    }
     for user in users:
-        total_risked = 0.0
-        total_profit = 0.0
-        
-        # Look at every single bet this user has ever put in a Betlist
-        for betlist in user.betlists:
-            for pick in betlist.picks:
-                if pick.status != 'Pending':
-                    total_risked += pick.units_risked
-                    total_profit += pick.units_won
+        total_risked, total_profit = totals.get(user.id, (0.0, 0.0))
                     
         # Prevent division by zero if they have no graded bets
         if total_risked > 0:
             # ROI Math Formula
-            new_roi = (total_profit / total_risked) * 100
-            user.verified_roi = round(new_roi, 2)
+            new_roi = round((total_profit / total_risked) * 100, 2)
+            if user.verified_roi != new_roi:
+                changed.add(user.id)
+            user.verified_roi = new_roi
+    timer.mark("compute")
             
     db.session.commit()
+    timer.mark("commit")
+
+    if changed:
+        for listener in roi_listeners:
+            listener(changed)
+        timer.mark("notify")
     print("📈 All Creator ROIs updated successfully.")
@@ -0,0 +1,72 @@
+"""
+Gunicorn settings for serving the PickLabs API.
+
+The app is preloaded in the master so the XGBoost model is trained and
+warmed once, then shared copy-on-write with every forked worker. Tune
+with environment variables:
+
+    PICKLABS_BIND           address to listen on        (default 0.0.0.0:8005)
+    PICKLABS_WORKERS        worker processes            (default: CPU count)
+    PICKLABS_THREADS        threads per worker          (default 4)
+    PICKLABS_MODEL_THREADS  XGBoost threads per worker  (default 1)
+    PICKLABS_TIMEOUT        worker timeout in seconds   (default 30)
+    PICKLABS_MAX_STREAMS    open /api/stream clients per worker (default: threads - 1)
+
+Each /api/stream client holds one request thread for as long as it is
+connected, so one worker can serve at most PICKLABS_MAX_STREAMS dashboards
+(the default leaves one thread free for the rest of the API); further
+stream requests get a 503 with Retry-After. Idle stream threads only wait on
+a queue, so for hundreds of dashboards run a second instance for streams
+alone with many threads, e.g.
+
+    PICKLABS_BIND=0.0.0.0:8006 PICKLABS_WORKERS=1 PICKLABS_THREADS=500 \
+        gunicorn -c gunicorn.conf.py wsgi:app
+
+and route /api/stream to it at the proxy.
+
+With PICKLABS_ODDS_SOURCES set, only one worker fetches odds; the others
+read its snapshots from a file (see odds_ingest.SharedIngestion).
+"""
+import gc
+import multiprocessing
+import os
+import tempfile
+
+bind = os.environ.get("PICKLABS_BIND", "0.0.0.0:8005")
+workers = int(os.environ.get("PICKLABS_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("PICKLABS_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.environ.get("PICKLABS_TIMEOUT", "30"))
+preload_app = True
+
+# This file is read in the master, so the workers inherit both settings
+os.environ.setdefault("PICKLABS_MAX_STREAMS", str(max(threads - 1, 1)))
+os.environ.setdefault("PICKLABS_ODDS_SHARED", os.path.join(tempfile.gettempdir(), f"picklabs-odds-{os.getpid()}.json"))
+
+
+def when_ready(server):
+    # Everything allocated while loading the app is long-lived. Moving it out of
+    # the GC's tracked generations stops collections in the workers from
+    # touching (and so copying) the shared pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from server import ai_model, app, db, start_background_services
+
+    # Connections opened in the master while the app loaded must not be shared
+    # across processes; each worker opens its own from a fresh pool.
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    # Each worker already runs several request threads; letting every worker's
+    # XGBoost also grab every core oversubscribes the CPU and hurts p99.
+    ai_model.model.set_params(n_jobs=int(os.environ.get("PICKLABS_MODEL_THREADS", "1")))
+    start_background_services()
+
+
+def on_exit(server):
+    shared = os.environ["PICKLABS_ODDS_SHARED"]
+    for path in (shared, shared + ".lock"):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import Future
+
+
+def coerce_features(features):
+    """
+    Float-valued copy of one game's features. Raises ValueError for anything
+    predict_proba could not score, so a bad request fails on its own thread
+    instead of inside a batch shared with other callers.
+    """
+    if not isinstance(features, Mapping):
+        raise ValueError("stats must be an object of numeric features")
+    coerced = {}
+    for name, value in features.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"stats.{name} must be a number")
+        try:
+            coerced[str(name)] = float(value)
+        except ValueError:
+            raise ValueError(f"stats.{name} must be a number") from None
+    return coerced
+
+
+class InferenceBatcher:
+    """
+    Coalesces predictions from many request threads into one predict_proba call.
+
+    Callers submit a feature dict and get a Future back. A single scheduler
+    thread takes the first waiting request, keeps collecting until either
+    `max_batch` requests are queued or `max_latency_ms` has passed since that
+    first request arrived, then scores the whole batch at once and resolves
+    every caller's future. If the batch call fails, its games are re-scored
+    one by one so only the callers whose features broke it see the error.
+
+    Callers should wait with `result(timeout=batcher.result_timeout)` and score
+    on their own thread if that expires; see /api/predict.
+    """
+
+    def __init__(self, ai_model, max_batch=64, max_latency_ms=5.0, result_timeout_ms=2000.0):
+        self.ai_model = ai_model
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.result_timeout = result_timeout_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.batches = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_inference = 0.0
+        self.batch_sizes = {}  # batch size -> number of batches of that size
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        # scheduler the first time it is used. A scheduler that died is
+        # replaced and picks up the requests still queued for it.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._reset_stats()
+            elif self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, features):
+        """
+        Queues one game's features; the Future resolves to the home win probability.
+        Raises ValueError right away for features that are not numeric.
+        """
+        features = coerce_features(features)
+        self._ensure_started()
+        future = Future()
+        self._queue.put((features, future, time.perf_counter()))
+        return future
+
+    def predict(self, features, timeout=None):
+        return self.submit(features).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued: under a
+                # backlog the first request is always "late", and waiting for nothing
+                # more must not shrink every batch to a single game.
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, batch):
+        """One probability, or the exception that scoring raised, per queued game."""
+        features_list = [features for features, _, _ in batch]
+        try:
+            return self.ai_model.predict_batch(features_list)
+        except Exception:
+            if len(batch) == 1:
+                raise
+        # Some game's features broke the batch; find it without failing the rest
+        results = []
+        for features in features_list:
+            try:
+                results.append(self.ai_model.predict_batch([features])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                probabilities = self._score(batch)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            waits = [started - queued_at for _, _, queued_at in batch]
+            size = len(batch)
+            self.batches += 1
+            self.requests += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.total_wait += sum(waits)
+            self.max_wait = max(self.max_wait, max(waits))
+            self.total_inference += finished - started
+
+            for (_, future, _), probability in zip(batch, probabilities):
+                if isinstance(probability, Exception):
+                    future.set_exception(probability)
+                else:
+                    future.set_result(probability)
+
+    def stats(self):
+        batches = self.batches or 1
+        requests = self.requests or 1
+        return {
+            "max_batch": self.max_batch,
+            "max_latency_ms": self.max_latency * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / batches, 2),
+            "max_batch_size": self.max_batch_seen,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "avg_queue_wait_ms": round(self.total_wait / requests * 1000, 3),
+            "max_queue_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_inference_ms": round(self.total_inference / batches * 1000, 3),
+            "queue_depth": self._queue.qsize(),
+        }
+
+
+def batcher_from_env(ai_model):
+    return InferenceBatcher(
+        ai_model,
+        max_batch=int(os.environ.get("PICKLABS_BATCH_MAX_SIZE", "64")),
+        max_latency_ms=float(os.environ.get("PICKLABS_BATCH_MAX_LATENCY_MS", "5")),
+        result_timeout_ms=float(os.environ.get("PICKLABS_BATCH_TIMEOUT_MS", "2000")),
+    )
@@ -0,0 +1,324 @@
+"""
+The creator leaderboard, materialized in memory.
+
+Graded picks are aggregated per public creator for each window (7d, 30d,
+season, all) and sport, once. Each requested (window, sport, min_picks)
+board is then kept as a SortedList of keys, so top-K is a slice and "rank
+of user X" is a bisect; moving one creator is O(log n). When grading or
+update_all_user_rois changes a creator's numbers, only that creator is
+re-queried and moved.
+
+Grading in another process (e.g. `flask --app server grade`) is picked up
+on read: every few seconds the newest graded_at is compared against the
+last one folded in, and only creators with newer picks are refreshed.
+A full rebuild every PICKLABS_LEADERBOARD_REBUILD_S seconds (default 600)
+slides the 7d/30d windows forward. A creator whose is_public or username
+changes in this process is taken off every board as soon as the commit lands
+and re-queried on the next read (see refresh_on_profile_change). The season
+starts at PICKLABS_SEASON_START (YYYY-MM-DD, default Jan 1 of this year).
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sortedcontainers import SortedList
+from sqlalchemy import case, func
+
+from models import db, Betlist, Pick, User
+
+WINDOWS = ("7d", "30d", "season", "all")
+ALL_SPORTS = "ALL"
+DEFAULT_MIN_PICKS = 10
+MAX_BOARDS = 64  # distinct (window, sport, min_picks) boards kept sorted at once
+MAX_INCREMENTAL_USERS = 500
+
+
+def window_starts(now=None):
+    """The first graded_at included in each window; None means no lower bound."""
+    now = now or datetime.utcnow()
+    season = os.environ.get("PICKLABS_SEASON_START")
+    return {
+        "7d": now - timedelta(days=7),
+        "30d": now - timedelta(days=30),
+        "season": datetime.fromisoformat(season) if season else datetime(now.year, 1, 1),
+        "all": None,
+    }
+
+
+class RankedBoard:
+    """Entries kept sorted by (-roi, -picks, user_id), so rank lookups are a bisect."""
+
+    def __init__(self):
+        self._keys = SortedList()
+        self._by_user = {}  # user id -> sort key
+
+    @staticmethod
+    def _key(entry):
+        return (-entry["roi"], -entry["picks"], entry["user_id"])
+
+    def upsert(self, entry):
+        self.remove(entry["user_id"])
+        key = self._key(entry)
+        self._keys.add(key)
+        self._by_user[entry["user_id"]] = key
+
+    def remove(self, user_id):
+        key = self._by_user.pop(user_id, None)
+        if key is not None:
+            self._keys.remove(key)
+
+    def rank(self, user_id):
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        return self._keys.bisect_left(key) + 1
+
+    def top(self, k):
+        return [key[2] for key in self._keys[:k]]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Leaderboard:
+    def __init__(self, rebuild_seconds=600.0, check_seconds=5.0):
+        self.rebuild_seconds = rebuild_seconds
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()  # guards the structures below
+        # One thread re-queries at a time, so a rebuild and a refresh_users()
+        # from roi_listeners cannot interleave their query and their swap-in
+        self._refresh_lock = threading.RLock()
+        self._stats = {}    # (window, sport) -> {user id: entry}
+        self._boards = {}   # (window, sport, min_picks) -> RankedBoard
+        self._stale_users = set()  # taken off the boards, re-queried on the next read
+        self._watermark = None  # newest graded_at folded in
+        self._built_at = None
+        self._checked_at = 0.0
+        self.refreshed_users = 0
+
+    # --- Aggregation ---
+    def _query(self, user_ids=None):
+        """{(window, sport): {user id: entry}} for public creators, optionally only `user_ids`."""
+        starts = window_starts()
+        columns = []
+        for window in WINDOWS:
+            start = starts[window]
+            graded = Pick.graded_at >= start if start is not None else None
+            for value in (Pick.units_risked, Pick.units_won, 1):
+                expr = value if graded is None else case((graded, value), else_=0)
+                columns.append(func.sum(expr))
+
+        query = (
+            db.session.query(Betlist.user_id, User.username, Pick.sport, *columns)
+            .join(Pick, Pick.betlist_id == Betlist.id)
+            .join(User, User.id == Betlist.user_id)
+            .filter(User.is_public.is_(True), Pick.status != 'Pending')
+            .group_by(Betlist.user_id, User.username, Pick.sport)
+        )
+        if user_ids is not None:
+            query = query.filter(Betlist.user_id.in_(list(user_ids)))
+
+        totals = {}  # (window, sport) -> {user id: [username, risked, won, picks]}
+        for user_id, username, sport, *sums in query:
+            sports = (ALL_SPORTS, sport.upper()) if sport else (ALL_SPORTS,)
+            for i, window in enumerate(WINDOWS):
+                risked, won, picks = sums[i * 3:i * 3 + 3]
+                if not picks:
+                    continue
+                for s in sports:
+                    row = totals.setdefault((window, s), {}).setdefault(user_id, [username, 0.0, 0.0, 0])
+                    row[1] += risked or 0.0
+                    row[2] += won or 0.0
+                    row[3] += picks
+
+        return {
+            key: {
+                user_id: {
+                    "user_id": user_id,
+                    "username": username,
+                    "roi": round(won / risked * 100, 2),
+                    "profit": round(won, 2),
+                    "picks": picks,
+                }
+                for user_id, (username, risked, won, picks) in rows.items() if risked > 0
+            }
+            for key, rows in totals.items()
+        }
+
+    def _latest_graded_at(self):
+        return db.session.query(func.max(Pick.graded_at)).scalar()
+
+    # --- Refreshing ---
+    def rebuild(self):
+        with self._refresh_lock:
+            watermark = self._latest_graded_at()
+            stats = self._query()
+            with self._lock:
+                self._stats = stats
+                self._boards = {}
+                self._watermark = watermark
+                self._built_at = time.monotonic()
+                self._checked_at = self._built_at
+
+    def refresh_users(self, user_ids):
+        """Re-aggregates only these creators and moves them on every materialized board."""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        with self._refresh_lock:
+            if self._built_at is None:
+                return
+            if len(user_ids) > MAX_INCREMENTAL_USERS:
+                # Past this, one full pass is cheaper than a huge IN list
+                self.rebuild()
+                return
+            fresh = self._query(user_ids)
+            self._apply(user_ids, fresh)
+        self.refreshed_users += len(user_ids)
+
+    def _apply(self, user_ids, fresh):
+        with self._lock:
+            for key in set(self._stats) | set(fresh):
+                rows = self._stats.setdefault(key, {})
+                for user_id in user_ids:
+                    entry = fresh.get(key, {}).get(user_id)
+                    if entry is None:
+                        rows.pop(user_id, None)
+                    else:
+                        rows[user_id] = entry
+            for (window, sport, min_picks), board in self._boards.items():
+                rows = self._stats.get((window, sport), {})
+                for user_id in user_ids:
+                    entry = rows.get(user_id)
+                    if entry is not None and entry["picks"] >= min_picks:
+                        board.upsert(entry)
+                    else:
+                        board.remove(user_id)
+
+    def invalidate_users(self, user_ids):
+        """
+        Takes these creators off every board at once and re-queries them on the
+        next read. Runs no SQL, so it is safe to call from a commit hook.
+        """
+        user_ids = set(user_ids)
+        with self._lock:
+            for rows in self._stats.values():
+                for user_id in user_ids:
+                    rows.pop(user_id, None)
+            for board in self._boards.values():
+                for user_id in user_ids:
+                    board.remove(user_id)
+            self._stale_users |= user_ids
+
+    def _refresh_stale(self):
+        with self._lock:
+            stale, self._stale_users = self._stale_users, set()
+        self.refresh_users(stale)
+
+    def _catch_up(self):
+        """Folds in picks graded since the watermark, e.g. by a grading run in another process."""
+        latest = self._latest_graded_at()
+        if latest is None or (self._watermark is not None and latest <= self._watermark):
+            return
+        query = (
+            db.session.query(Betlist.user_id).join(Pick, Pick.betlist_id == Betlist.id)
+            .filter(Pick.graded_at.isnot(None)).distinct()
+        )
+        if self._watermark is not None:
+            query = query.filter(Pick.graded_at > self._watermark)
+        self.refresh_users(user_id for (user_id,) in query)
+        self._watermark = latest
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._built_at is None:
+            with self._refresh_lock:
+                if self._built_at is None:
+                    self.rebuild()
+            return
+        due = now - self._checked_at >= self.check_seconds
+        if not due and not self._stale_users:
+            return
+        # Readers keep serving the current boards while one thread refreshes
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if due:
+                self._checked_at = now
+                if now - self._built_at >= self.rebuild_seconds:
+                    self.rebuild()
+                else:
+                    self._catch_up()
+            # Also after a rebuild: its query may have run before the change committed
+            self._refresh_stale()
+        finally:
+            self._refresh_lock.release()
+
+    # --- Reading ---
+    def _board(self, window, sport, min_picks):
+        key = (window, sport, min_picks)
+        board = self._boards.get(key)
+        if board is None:
+            board = RankedBoard()
+            for entry in self._stats.get((window, sport), {}).values():
+                if entry["picks"] >= min_picks:
+                    board.upsert(entry)
+            if len(self._boards) >= MAX_BOARDS:
+                self._boards.pop(next(iter(self._boards)))
+            self._boards[key] = board
+        return board
+
+    def top(self, window="season", sport=ALL_SPORTS, min_picks=DEFAULT_MIN_PICKS, limit=25):
+        """(total creators on the board, [entry with "rank"] for the best `limit`)."""
+        self._ensure_fresh()
+        sport = sport.upper()
+        with self._lock:
+            board = self._board(window, sport, min_picks)
+            rows = self._stats.get((window, sport), {})
+            return len(board), [dict(rows[user_id], rank=i + 1) for i, user_id in enumerate(board.top(limit))]
+
+    def rank(self, user_id, window="season", sport=ALL_SPORTS, min_picks=DEFAULT_MIN_PICKS):
+        """(total creators on the board, the user's entry with "rank", or None if not ranked)."""
+        self._ensure_fresh()
+        sport = sport.upper()
+        with self._lock:
+            board = self._board(window, sport, min_picks)
+            rank = board.rank(user_id)
+            if rank is None:
+                return len(board), None
+            return len(board), dict(self._stats[(window, sport)][user_id], rank=rank)
+
+
+def refresh_on_profile_change(leaderboard, user_model):
+    """
+    Once a commit that changed a user's is_public or username (or deleted the
+    user) lands, takes them off the leaderboard until the next read re-queries
+    them, instead of waiting for the next full rebuild.
+    """
+    from sqlalchemy import event, inspect
+    from sqlalchemy.orm import Session
+
+    def _remember(mapper, connection, target):
+        state = inspect(target)
+        if state.deleted or any(state.attrs[name].history.has_changes() for name in ("is_public", "username")):
+            session = Session.object_session(target)
+            if session is not None:
+                session.info.setdefault("leaderboard_user_ids", set()).add(target.id)
+
+    def _after_commit(session):
+        user_ids = session.info.pop("leaderboard_user_ids", None)
+        if user_ids:
+            leaderboard.invalidate_users(user_ids)
+
+    def _after_rollback(session):
+        session.info.pop("leaderboard_user_ids", None)
+
+    event.listen(user_model, "after_update", _remember)
+    event.listen(user_model, "after_delete", _remember)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+
+
+def leaderboard_from_env():
+    return Leaderboard(rebuild_seconds=float(os.environ.get("PICKLABS_LEADERBOARD_REBUILD_S", "600")))
@@ -0,0 +1,78 @@
+import json
+import queue
+import threading
+
+
+class UpdateBroadcaster:
+    """
+    Fans one computed update out to every connected Server-Sent Events client.
+    Each event is serialized once and the same frame is pushed onto every
+    subscriber's queue, so the cost of an update does not grow with the
+    number of open dashboards.
+
+    Every connected client holds one request thread for as long as it stays
+    connected, so `max_subscribers` (0 = unlimited) caps how many threads
+    streams may take; subscribe() returns None once the cap is reached.
+    """
+
+    def __init__(self, max_queue=100, heartbeat_seconds=15, max_subscribers=0):
+        self.max_queue = max_queue
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._next_id = 0
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event, payload):
+        """Formats one SSE frame and queues it for every subscriber."""
+        with self._lock:
+            self._next_id += 1
+            frame = format_sse(event, payload, self._next_id)
+            subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait(frame)
+            except queue.Full:
+                # A client that cannot keep up is dropped; it will reconnect
+                # and receive a fresh snapshot instead of a backlog.
+                self.unsubscribe(q)
+
+    def stream(self, q, initial_frame=None):
+        """Generator of SSE frames for one client, with keep-alive comments."""
+        try:
+            if initial_frame:
+                yield initial_frame
+            # A dropped subscriber ends its stream; EventSource reconnects on its own
+            while q in self._subscribers:
+                try:
+                    yield q.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+
+def format_sse(event, payload, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
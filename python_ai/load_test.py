@@ -0,0 +1,509 @@
+"""
+Offline load test for the PickLabs API.
+
+    python load_test.py [--concurrency 32] [--requests 500] [--slate-size 50]
+                        [--users 1000] [--betlists 3000] [--picks 5] [--follows 20] [--saves 10]
+                        [--endpoints predictions,predict,save,library] [-o results.json]
+                        [--metrics-overhead [--overhead-rounds 3]]
+
+Boots server.py in a child process against a fresh, seeded SQLite database in
+a temp directory, with the model trained on synthetic history so inference is
+real. A synthetic odds snapshot of --slate-size games is published so
+/api/predictions and /api/predict score that many games per request (add
+--board to serve /api/predictions from the cached prediction board instead).
+
+Each endpoint is then driven by --concurrency async clients for --requests
+requests (or --duration seconds), and the report gives throughput, p50/p95/p99
+latency, SQL statements per request and model time per request. Logged-in
+routes use a signed session cookie for a random seeded user. Nothing leaves
+127.0.0.1.
+
+--metrics-overhead alternates runs against a server started with
+PICKLABS_METRICS=0 (no /metrics request or SQL hooks) and one with them on,
+--overhead-rounds times each, and compares the best run of each kind: how much
+the hooks add to mean latency and take off throughput. The target is under 1%,
+which is below the noise of a single run, so keep the machine otherwise idle
+and use --requests in the thousands.
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BENCH_SECRET_KEY = "picklabs-load-test"
+SEED = 1234
+ENDPOINTS = ["predictions", "predict", "save", "library"]
+
+
+# --- 1. SEEDING (runs inside the server process) ---
+def seed_database(db, users, betlists, picks, follows, saves, rng):
+    """
+    Bulk-inserts users, betlists (with `picks` picks each), `follows` followed
+    users per user and `saves` saved betlists per user. Returns the user ids.
+    """
+    from models import User, Betlist, Pick, followers, saved_betlists
+
+    db.session.execute(User.__table__.insert(), [{
+        "username": f"bench_user_{i}",
+        "email": f"bench_user_{i}@example.com",
+        "is_public": i % 2 == 0,
+        "verified_roi": round(rng.uniform(-20, 20), 2),
+    } for i in range(users)])
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.username.like("bench_user_%"))]
+
+    db.session.execute(Betlist.__table__.insert(), [{
+        "user_id": rng.choice(user_ids),
+        "title": f"Bench Betlist {i}",
+        "description": "Synthetic betlist seeded by load_test.py",
+    } for i in range(betlists)])
+    betlist_ids = [row[0] for row in db.session.query(Betlist.id).filter(Betlist.title.like("Bench Betlist %"))]
+
+    if betlist_ids and picks:
+        db.session.execute(Pick.__table__.insert(), [{
+            "betlist_id": betlist_id,
+            "game_id": f"bench-game-{rng.randrange(500)}",
+            "player_name": f"Player {rng.randrange(300)}",
+            "prop_type": f"Over {rng.randint(10, 40)}.5 Points",
+            "sportsbook": rng.choice(["DraftKings", "FanDuel", "BetMGM"]),
+            "odds": rng.choice(["+110", "-110", "+150", "-200"]),
+            "units_risked": 1.0,
+            "sport": rng.choice(["NBA", "NFL", "EPL"]),
+            **_graded(rng),
+        } for betlist_id in betlist_ids for _ in range(picks)])
+
+    if len(user_ids) > 1 and follows:
+        db.session.execute(followers.insert(), [
+            {"follower_id": user_id, "followed_id": followed_id}
+            for user_id in user_ids
+            for followed_id in rng.sample(user_ids, min(follows, len(user_ids) - 1)) if followed_id != user_id
+        ])
+
+    if betlist_ids and saves:
+        db.session.execute(saved_betlists.insert(), [
+            {"user_id": user_id, "betlist_id": betlist_id}
+            for user_id in user_ids
+            for betlist_id in rng.sample(betlist_ids, min(saves, len(betlist_ids)))
+        ])
+
+    db.session.commit()
+    return user_ids
+
+
+def _graded(rng):
+    """Pick outcome columns: pending, or won/lost some time in the last 90 days."""
+    status = rng.choice(["Pending", "Won", "Lost"])
+    if status == "Pending":
+        return {"status": status, "units_won": 0.0, "graded_at": None}
+    return {
+        "status": status,
+        "units_won": 1.0 if status == "Won" else -1.0,
+        "graded_at": datetime.utcnow() - timedelta(days=rng.uniform(0, 90)),
+    }
+
+
+def synthetic_slate(size, rng):
+    """`size` games with random team stats, shaped like odds_ingest.parse_json_feed output."""
+    return [{
+        "game_id": f"bench-{i}",
+        "sport": "NBA",
+        "home": f"Home {i}",
+        "away": f"Away {i}",
+        "odds": round(rng.uniform(1.5, 3.2), 2),
+        "stats": {
+            "home_win_rate": round(rng.uniform(0.2, 0.8), 3),
+            "away_win_rate": round(rng.uniform(0.2, 0.8), 3),
+            "avg_points_diff": round(rng.uniform(-10, 10), 2),
+        },
+    } for i in range(size)]
+
+
+# --- 2. THE SERVER UNDER TEST ---
+def _instrument(server):
+    """
+    Counts SQL statements and model time per request and returns them in
+    X-Bench-* response headers. Work done on the inference batcher or the
+    database writer thread has no request context and is not counted; batcher
+    time shows up in /api/inference/stats instead.
+    """
+    from flask import g, has_request_context
+    from sqlalchemy import event
+
+    app, db, ai_model = server.app, server.db, server.ai_model
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.bench_sql_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "bench_sql_started" in g:
+            g.bench_queries += 1
+            g.bench_sql_s += time.perf_counter() - g.bench_sql_started
+
+    def timed(fn):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if has_request_context():
+                    g.bench_inference_s += time.perf_counter() - started
+        return wrapper
+
+    ai_model.predict_batch = timed(ai_model.predict_batch)
+    ai_model.predict_probability = timed(ai_model.predict_probability)
+
+    @app.before_request
+    def _start():
+        g.bench_queries = 0
+        g.bench_sql_s = 0.0
+        g.bench_inference_s = 0.0
+
+    @app.after_request
+    def _report(response):
+        response.headers["X-Bench-Queries"] = str(g.get("bench_queries", 0))
+        response.headers["X-Bench-Sql-Ms"] = f"{g.get('bench_sql_s', 0.0) * 1000:.3f}"
+        response.headers["X-Bench-Inference-Ms"] = f"{g.get('bench_inference_s', 0.0) * 1000:.3f}"
+        return response
+
+
+def serve(args):
+    """Child process: train, seed, publish the slate, then serve until killed."""
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no access log line per request
+    rng = random.Random(SEED)
+    random.seed(SEED)  # build_synthetic_data draws from the global RNG
+    from ai_engine import build_synthetic_data
+    build_synthetic_data()
+
+    import server
+    from odds_ingest import OddsSnapshot, normalize, publish_snapshot
+
+    with server.app.app_context():
+        started = time.perf_counter()
+        user_ids = seed_database(server.db, args.users, args.betlists, args.picks, args.follows, args.saves, rng)
+        seed_s = time.perf_counter() - started
+
+    if args.slate_size:
+        rows = normalize({"book": "bench", "market": "moneyline"}, synthetic_slate(args.slate_size, rng))
+        snapshot = OddsSnapshot(rows, {"bench:moneyline": {"status": "ok", "rows": len(rows)}})
+        publish_snapshot(snapshot)
+        if args.board:
+            server.odds_store.apply(snapshot)
+
+    _instrument(server)
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    print("READY " + json.dumps({"port": httpd.server_port, "user_ids": user_ids, "seed_s": round(seed_s, 3)}), flush=True)
+    httpd.serve_forever()
+
+
+def start_server(args, workdir, with_metrics=True):
+    env = dict(
+        os.environ,
+        PICKLABS_DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        PICKLABS_SECRET_KEY=BENCH_SECRET_KEY,
+        PICKLABS_METRICS="1" if with_metrics else "0",
+        PYTHONUNBUFFERED="1",
+    )
+    env.pop("PICKLABS_ODDS_SOURCES", None)  # the synthetic slate must not be replaced by live odds
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve",
+           "--users", str(args.users), "--betlists", str(args.betlists), "--picks", str(args.picks),
+           "--follows", str(args.follows), "--saves", str(args.saves), "--slate-size", str(args.slate_size)]
+    if args.board:
+        cmd.append("--board")
+    log_path = os.path.join(workdir, "server.log")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=log, text=True)
+
+    # Training output goes to stdout first; the READY line carries the port and seeded user ids
+    for line in proc.stdout:
+        if line.startswith("READY "):
+            # Keep draining so later prints from the server can never fill the pipe and block it
+            threading.Thread(target=proc.stdout.read, daemon=True).start()
+            return proc, json.loads(line[len("READY "):])
+    proc.wait()
+    with open(log_path) as log:
+        raise SystemExit(f"server.py failed to start:\n{log.read()}")
+
+
+# --- 3. THE LOAD GENERATOR ---
+def session_cookie(user_id):
+    """A Flask session cookie that flask-login accepts as `user_id` being logged in."""
+    from flask import Flask
+
+    app = Flask("load_test")
+    app.secret_key = BENCH_SECRET_KEY
+    return app.session_interface.get_signing_serializer(app).dumps({"_user_id": str(user_id), "_fresh": True})
+
+
+def build_request(endpoint, ctx, rng):
+    """(method, path, json body, cookie user id) for one request to `endpoint`."""
+    if endpoint == "predictions":
+        return "GET", "/api/predictions", None, None
+    if endpoint == "predict":
+        games = [{"id": row["game_id"], "odds": row["odds"], "stats": row["stats"]} for row in ctx["slate"]]
+        return "POST", "/api/predict", {"games": games, "bankroll": 1000}, None
+    if endpoint == "save":
+        return "POST", f"/save_betlist/{rng.randint(1, ctx['betlists'])}", None, rng.choice(ctx["user_ids"])
+    if endpoint == "library":
+        return "GET", "/my-library", None, rng.choice(ctx["user_ids"])
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+async def _client(session, base_url, endpoint, ctx, rng, budget, samples, errors):
+    while budget.take():
+        method, path, body, user_id = build_request(endpoint, ctx, rng)
+        headers = {"Cookie": f"session={ctx['cookies'][user_id]}"} if user_id is not None else None
+        started = time.perf_counter()
+        try:
+            async with session.request(method, base_url + path, json=body, headers=headers) as resp:
+                await resp.read()
+                elapsed = time.perf_counter() - started
+                if resp.status >= 400:
+                    errors[str(resp.status)] = errors.get(str(resp.status), 0) + 1
+                    continue
+                samples.append((
+                    elapsed,
+                    int(resp.headers.get("X-Bench-Queries", 0)),
+                    float(resp.headers.get("X-Bench-Sql-Ms", 0)),
+                    float(resp.headers.get("X-Bench-Inference-Ms", 0)),
+                ))
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+
+class Budget:
+    """Hands out requests until either the count or the deadline is used up."""
+
+    def __init__(self, requests, duration):
+        self.remaining = requests
+        self.deadline = time.perf_counter() + duration if duration else None
+
+    def take(self):
+        if self.deadline is not None:
+            return time.perf_counter() < self.deadline
+        self.remaining -= 1
+        return self.remaining >= 0
+
+
+async def run_endpoint(base_url, endpoint, ctx, args):
+    import aiohttp
+
+    rng = random.Random(SEED)
+    samples, errors = [], {}
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    # Each request carries its own user's cookie, so nothing may be remembered between them
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as session:
+        # A few unmeasured requests so lazy imports and template compilation are out of the numbers
+        await asyncio.gather(*(_client(session, base_url, endpoint, ctx, rng, Budget(3, None), [], {})
+                               for _ in range(min(args.concurrency, 4))))
+        budget = Budget(args.requests, args.duration)
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(session, base_url, endpoint, ctx, rng, budget, samples, errors)
+                               for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(samples, errors, elapsed)
+
+
+async def fetch_json(base_url, path):
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(base_url + path) as resp:
+            return await resp.json()
+
+
+# --- 4. REPORTING ---
+def _pct(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def summarize(samples, errors, elapsed):
+    if not samples:
+        return {"requests": 0, "errors": errors}
+    latencies = sorted(s[0] * 1000 for s in samples)
+    n = len(samples)
+    return {
+        "requests": n,
+        "errors": errors,
+        "throughput_rps": round(n / elapsed, 1),
+        "latency_ms": {
+            "p50": round(_pct(latencies, 50), 2),
+            "p95": round(_pct(latencies, 95), 2),
+            "p99": round(_pct(latencies, 99), 2),
+            "mean": round(sum(latencies) / n, 2),
+            "max": round(latencies[-1], 2),
+        },
+        "queries_per_request": {
+            "mean": round(sum(s[1] for s in samples) / n, 2),
+            "max": max(s[1] for s in samples),
+        },
+        "sql_ms_per_request": round(sum(s[2] for s in samples) / n, 3),
+        "inference_ms_per_request": round(sum(s[3] for s in samples) / n, 3),
+    }
+
+
+def batcher_delta(before, after):
+    """Inference batcher activity between two /api/inference/stats readings."""
+    batches = after["batches"] - before["batches"]
+    requests = after["requests"] - before["requests"]
+    if not batches:
+        return {"batches": 0, "games": 0}
+    inference_ms = after["avg_inference_ms"] * after["batches"] - before["avg_inference_ms"] * before["batches"]
+    return {
+        "batches": batches,
+        "games": requests,
+        "avg_batch_size": round(requests / batches, 2),
+        "avg_inference_ms": round(inference_ms / batches, 3),
+    }
+
+
+def print_report(report):
+    cfg = report["config"]
+    print(f"\n--- 🏋️ PickLabs load test: concurrency {cfg['concurrency']}, slate {cfg['slate_size']} games, "
+          f"{cfg['users']} users / {cfg['betlists']} betlists{'' if cfg['metrics'] else ', metrics off'} ---")
+    for endpoint, r in report["endpoints"].items():
+        if not r["requests"]:
+            print(f"  {endpoint:<12} no successful requests, errors={r['errors']}")
+            continue
+        lat = r["latency_ms"]
+        print(f"  {endpoint:<12} {r['throughput_rps']:>8} req/s  p50 {lat['p50']:>8} ms  p95 {lat['p95']:>8} ms  "
+              f"p99 {lat['p99']:>8} ms | {r['queries_per_request']['mean']:>5} queries/req "
+              f"({r['sql_ms_per_request']} ms) | model {r['inference_ms_per_request']} ms/req"
+              + (f" | errors {r['errors']}" if r["errors"] else ""))
+        if "batcher" in r:
+            b = r["batcher"]
+            if b["batches"]:
+                print(f"  {'':<12} batcher: {b['batches']} batches, avg {b['avg_batch_size']} games, "
+                      f"{b['avg_inference_ms']} ms per predict_proba")
+
+
+def metrics_overhead(without, with_metrics):
+    """
+    Per endpoint, what the metrics hooks add, in percent: the best mean latency
+    and best throughput of the runs with hooks against those of the runs without.
+    """
+    def best(reports, endpoint):
+        runs = [r["endpoints"][endpoint] for r in reports if r["endpoints"][endpoint]["requests"]]
+        if not runs:
+            return None
+        return min(r["latency_ms"]["mean"] for r in runs), max(r["throughput_rps"] for r in runs)
+
+    overhead = {}
+    for endpoint in without[0]["endpoints"]:
+        off, on = best(without, endpoint), best(with_metrics, endpoint)
+        if off is None or on is None:
+            continue
+        overhead[endpoint] = {
+            "mean_ms": [off[0], on[0]],
+            "latency_pct": round((on[0] / off[0] - 1) * 100, 2),
+            "throughput_pct": round((on[1] / off[1] - 1) * 100, 2),
+        }
+    return overhead
+
+
+def print_overhead(overhead):
+    print("\n--- ⏱️ Metrics hooks overhead (PICKLABS_METRICS=0 -> 1) ---")
+    for endpoint, o in overhead.items():
+        off_ms, on_ms = o["mean_ms"]
+        print(f"  {endpoint:<12} mean {off_ms} -> {on_ms} ms ({o['latency_pct']:+}%)  "
+              f"throughput {o['throughput_pct']:+}%")
+
+
+async def main(args, with_metrics=True):
+    workdir = tempfile.mkdtemp(prefix="picklabs-load-")
+    proc = None
+    try:
+        started = time.perf_counter()
+        proc, info = start_server(args, workdir, with_metrics)
+        print(f"🚀 server.py up in {time.perf_counter() - started:.1f}s (seeding took {info['seed_s']}s)", file=sys.stderr)
+
+        base_url = f"http://127.0.0.1:{info['port']}"
+        rng = random.Random(SEED)
+        ctx = {
+            "user_ids": info["user_ids"] or [1],
+            "betlists": max(args.betlists, 1),
+            "slate": synthetic_slate(args.slate_size, rng),
+        }
+        ctx["cookies"] = {user_id: session_cookie(user_id) for user_id in ctx["user_ids"]}
+
+        results = {}
+        for endpoint in args.endpoints.split(","):
+            before = await fetch_json(base_url, "/api/inference/stats") if endpoint == "predict" else None
+            results[endpoint] = await run_endpoint(base_url, endpoint, ctx, args)
+            if before is not None:
+                after = await fetch_json(base_url, "/api/inference/stats")
+                results[endpoint]["batcher"] = batcher_delta(before["batcher"], after["batcher"])
+
+        return {
+            "config": dict({k: v for k, v in vars(args).items() if k not in ("serve", "output")},
+                           metrics=with_metrics),
+            "endpoints": results,
+        }
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline load test for the PickLabs API")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--duration", type=float, default=None, help="Run each endpoint for this many seconds instead")
+    parser.add_argument("--slate-size", type=int, default=50, help="Games per /api/predictions and /api/predict request")
+    parser.add_argument("--board", action="store_true", help="Serve /api/predictions from the cached prediction board")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--betlists", type=int, default=3000)
+    parser.add_argument("--picks", type=int, default=5, help="Picks per betlist")
+    parser.add_argument("--follows", type=int, default=20, help="Users followed per user")
+    parser.add_argument("--saves", type=int, default=10, help="Betlists saved per user")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--output", "-o", default=None, help="Write the report as JSON here")
+    parser.add_argument("--metrics-overhead", action="store_true",
+                        help="Alternate runs without and with the /metrics hooks and compare")
+    parser.add_argument("--overhead-rounds", type=int, default=3, help="Runs of each kind for --metrics-overhead")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        sys.exit(0)
+
+    unknown = set(args.endpoints.split(",")) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(sorted(unknown))}")
+
+    if args.metrics_overhead:
+        # Alternate so slow drift on the machine hits both kinds of run alike
+        runs = {False: [], True: []}
+        for _ in range(max(args.overhead_rounds, 1)):
+            for with_metrics in (False, True):
+                runs[with_metrics].append(asyncio.run(main(args, with_metrics)))
+                print_report(runs[with_metrics][-1])
+        report = runs[True][-1]
+        report["metrics_overhead"] = metrics_overhead(runs[False], runs[True])
+        print_overhead(report["metrics_overhead"])
+    else:
+        report = asyncio.run(main(args))
+        print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
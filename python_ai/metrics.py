@@ -0,0 +1,344 @@
+"""
+In-process metrics for the PickLabs API, exposed in the Prometheus text format at /metrics.
+
+Every metric lives in this process only, so under gunicorn each worker reports
+its own numbers; scrape the workers individually or aggregate in Prometheus.
+
+The request and SQL hooks cost roughly 20 us per request, about 1% of
+/my-library. `python load_test.py --metrics-overhead` measures it against the
+real endpoints, alternating runs with PICKLABS_METRICS=0 (no request or SQL
+hooks) and runs with them on. Streamed responses (/api/stream) are not latency
+samples.
+
+Slow requests can also be profiled. Set PICKLABS_PROFILE_SLOW_MS and every
+request slower than that writes its sampled stacks as a flame-graph-ready
+`.folded` file (one "frame;frame;frame count" line per stack) to
+PICKLABS_PROFILE_DIR (default ./profiles). PICKLABS_PROFILE_INTERVAL_MS sets
+the sampling interval (default 10).
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+# --- 1. METRIC TYPES ---
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> count
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram. Observing is a bisect plus two additions under a
+    lock, cheap enough to sit on every request and every SQL statement.
+    """
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+
+# --- 2. THE METRICS ---
+REQUEST_LATENCY = Histogram(
+    "picklabs_request_duration_seconds", "Request latency by route", ["route", "method", "status"])
+REQUEST_QUERIES = Histogram(
+    "picklabs_request_db_queries", "SQL statements executed per request", ["route"], buckets=COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram(
+    "picklabs_request_db_seconds", "Time spent in SQL statements per request", ["route"])
+DB_QUERY_DURATION = Histogram(
+    "picklabs_db_query_duration_seconds", "Duration of individual SQL statements", buckets=QUERY_BUCKETS)
+MODEL_PREDICT = Histogram(
+    "picklabs_model_predict_seconds", "Time spent in XGBoost predict_proba per call")
+MODEL_BATCH_SIZE = Histogram(
+    "picklabs_model_batch_size", "Games scored per predict_proba call", buckets=BATCH_BUCKETS)
+CACHE_LOOKUPS = Counter(
+    "picklabs_cache_lookups_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"])
+JOB_PHASE = Histogram(
+    "picklabs_job_phase_seconds", "Duration of each phase of background jobs", ["job", "phase"])
+
+REGISTRY = [REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, DB_QUERY_DURATION,
+            MODEL_PREDICT, MODEL_BATCH_SIZE, CACHE_LOOKUPS, JOB_PHASE]
+
+
+def record_cache(cache, hit, count=1):
+    CACHE_LOOKUPS.inc(count, cache=cache, result="hit" if hit else "miss")
+
+
+class PhaseTimer:
+    """
+    Times consecutive phases of a background job without wrapping them in blocks:
+
+        timer = PhaseTimer("grading")
+        ...                         # load
+        timer.mark("load_pending")  # records the time since the timer started
+        ...                         # grade
+        timer.mark("grade")         # records the time since the previous mark
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        JOB_PHASE.observe(now - self._last, job=self.job, phase=phase)
+        self._last = now
+
+
+def _cache_ratios():
+    hits, totals = {}, {}
+    with CACHE_LOOKUPS._lock:
+        for (cache, result), count in CACHE_LOOKUPS._values.items():
+            totals[cache] = totals.get(cache, 0) + count
+            if result == "hit":
+                hits[cache] = hits.get(cache, 0) + count
+    lines = ["# HELP picklabs_cache_hit_ratio Share of lookups served from cache since start",
+             "# TYPE picklabs_cache_hit_ratio gauge"]
+    for cache, total in sorted(totals.items()):
+        lines.append(f'picklabs_cache_hit_ratio{{cache="{cache}"}} {round(hits.get(cache, 0) / total, 4)}')
+    return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_cache_ratios())
+    return "\n".join(lines) + "\n"
+
+
+# --- 3. SLOW-REQUEST PROFILER ---
+class SlowRequestProfiler:
+    """
+    Samples the stacks of threads that are serving a request, and writes them
+    as folded stacks when the request turns out slower than `threshold_ms`.
+    Only request threads are walked, once per `interval_ms`, so the cost
+    stays flat no matter how many background threads the process runs.
+    """
+
+    def __init__(self, threshold_ms, directory="profiles", interval_ms=10.0):
+        self.threshold = threshold_ms / 1000.0
+        self.directory = directory
+        self.interval = interval_ms / 1000.0
+        self._active = {}  # thread id -> {folded stack: samples}
+        self._lock = threading.Lock()
+        self._pid = None
+        self.dumped = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own sampler
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._active = {}
+                os.makedirs(self.directory, exist_ok=True)
+                threading.Thread(target=self._run, name="slow-request-profiler", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                stacks[folded] = stacks.get(folded, 0) + 1
+
+    def begin(self):
+        self._ensure_started()
+        self._active[threading.get_ident()] = {}
+
+    def discard(self):
+        self._active.pop(threading.get_ident(), None)
+
+    def end(self, label, elapsed):
+        stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or elapsed < self.threshold:
+            return None
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        path = os.path.join(self.directory, f"{int(time.time() * 1000)}-{os.getpid()}-{safe_label}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for folded, count in sorted(stacks.items()):
+                f.write(f"{folded} {count}\n")
+        self.dumped += 1
+        return path
+
+
+def profiler_from_env():
+    threshold = os.environ.get("PICKLABS_PROFILE_SLOW_MS")
+    if not threshold:
+        return None
+    return SlowRequestProfiler(
+        float(threshold),
+        directory=os.environ.get("PICKLABS_PROFILE_DIR", "profiles"),
+        interval_ms=float(os.environ.get("PICKLABS_PROFILE_INTERVAL_MS", "10")),
+    )
+
+
+# --- 4. FLASK AND SQLALCHEMY HOOKS ---
+class _RequestStats:
+    __slots__ = ("started", "queries", "db_time", "status", "streamed")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.status = None
+        self.streamed = False
+
+
+def init_app(app, profiler=None):
+    """
+    Times every request by route, and counts the SQL statements each request
+    runs. Statements outside a request (grading jobs, startup) only feed the
+    per-statement duration histogram.
+    """
+    from flask import g, has_request_context, request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = g.get("metrics") if has_request_context() else None
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(Engine, "handle_error")
+    def _failed_cursor(exception_context):
+        # after_cursor_execute never fires for a statement that raised; drop its
+        # start time so it cannot be paired with a later statement on this
+        # pooled connection
+        if exception_context.connection is not None:
+            try:
+                exception_context.connection.info.pop("metrics_started", None)
+            except Exception:
+                pass  # the connection is already closed or invalidated
+
+    # Everything per request lives on one object in g: each g/request access
+    # goes through a context-local proxy, and these hooks run on every request
+    @app.before_request
+    def _start_request():
+        g.metrics = _RequestStats()
+        if profiler is not None:
+            profiler.begin()
+
+    @app.after_request
+    def _remember_status(response):
+        stats = g.get("metrics")
+        if stats is not None:
+            stats.status = response.status_code
+            stats.streamed = response.is_streamed
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        stats = g.pop("metrics", None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats.started
+        rule, method = request.url_rule, request.method
+        route = rule.rule if rule is not None else "<unmatched>"
+        if stats.status is None:
+            stats.status = 500 if exc is not None else 200
+        # An open SSE stream lasts as long as the client stays connected and is
+        # idle by design; it is neither a latency sample nor a slow request
+        if not stats.streamed:
+            REQUEST_LATENCY.observe(elapsed, route=route, method=method, status=stats.status)
+        REQUEST_QUERIES.observe(stats.queries, route=route)
+        REQUEST_DB_TIME.observe(stats.db_time, route=route)
+        if profiler is not None:
+            if stats.streamed:
+                profiler.discard()
+            else:
+                profiler.end(f"{method} {route}", elapsed)
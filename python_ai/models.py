@@ -1,4 +1,5 @@
 from datetime import datetime
+from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
@@ -16,7 +17,7 @@ saved_betlists = db.Table('saved_betlists',
 )
 
 # --- THE UPDATED USER TABLE ---
-class User(db.Model):
+class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False) # e.g., @MarcusLocks
@@ -81,3 +82,30 @@ class Pick(db.Model):
     # We also need to know how much risk/reward was attached to calculate ROI
     units_risked = db.Column(db.Float, default=1.0)
     units_won = db.Column(db.Float, default=0.0)
+
+    # Needed for per-sport and 7d/30d/season leaderboards (see leaderboard.py)
+    sport = db.Column(db.String(20), index=True) # e.g., "NBA"
+    graded_at = db.Column(db.DateTime, index=True)
+
+
+# --- WRITE JOBS ---
+# These take plain ids so they can run on the database writer thread
+# (see db_config.SerializedWriter) without borrowing the caller's session.
+def toggle_saved_betlist(user_id, betlist_id):
+    """Saves the betlist to the user's library, or removes it if already saved. Returns True if now saved."""
+    match = (saved_betlists.c.user_id == user_id) & (saved_betlists.c.betlist_id == betlist_id)
+    if db.session.execute(db.select(saved_betlists.c.user_id).where(match).limit(1)).first():
+        db.session.execute(saved_betlists.delete().where(match))
+        return False
+    db.session.execute(saved_betlists.insert().values(user_id=user_id, betlist_id=betlist_id))
+    return True
+
+
+def toggle_follow(follower_id, followed_id):
+    """Follows the user, or unfollows if already following. Returns True if now following."""
+    match = (followers.c.follower_id == follower_id) & (followers.c.followed_id == followed_id)
+    if db.session.execute(db.select(followers.c.follower_id).where(match).limit(1)).first():
+        db.session.execute(followers.delete().where(match))
+        return False
+    db.session.execute(followers.insert().values(follower_id=follower_id, followed_id=followed_id))
+    return True
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+
+import aiohttp
+
+# Neutral features used when no source supplies team stats for a game,
+# so the model still returns a sensible (close to 50%) probability.
+DEFAULT_STATS = {"home_win_rate": 0.5, "away_win_rate": 0.5, "avg_points_diff": 0.0}
+
+
+# --- 1. PARSERS (run inside the thread/process pool) ---
+def parse_json_feed(body):
+    """
+    Parses a JSON odds feed into raw rows.
+    Expected shape: {"events": [{"id", "sport", "home", "away", "price", "stats"?}]}
+    where `price` is the decimal odds on the home side.
+    """
+    payload = json.loads(body)
+    rows = []
+    for event in payload.get("events", []):
+        rows.append({
+            "game_id": str(event["id"]),
+            "sport": event.get("sport", ""),
+            "home": event["home"],
+            "away": event["away"],
+            "odds": float(event["price"]),
+            "stats": event.get("stats"),
+        })
+    return rows
+
+
+def parse_html_table(body):
+    """
+    Scrapes an HTML odds board with BeautifulSoup.
+    Each game is a <tr data-game-id=".." data-sport=".."> with
+    <td class="home">, <td class="away"> and <td class="price"> cells.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body, "html.parser")
+    rows = []
+    for tr in soup.select("tr[data-game-id]"):
+        price = tr.select_one("td.price")
+        home = tr.select_one("td.home")
+        away = tr.select_one("td.away")
+        if not (price and home and away):
+            continue
+        rows.append({
+            "game_id": tr["data-game-id"],
+            "sport": tr.get("data-sport", ""),
+            "home": home.get_text(strip=True),
+            "away": away.get_text(strip=True),
+            "odds": float(price.get_text(strip=True)),
+            "stats": None,
+        })
+    return rows
+
+
+PARSERS = {
+    "json": parse_json_feed,
+    "html": parse_html_table,
+}
+
+
+# --- 2. SHARED GAME / MARKET SCHEMA ---
+def normalize(source, raw_rows):
+    """Stamps raw parser rows with the book and market they came from."""
+    return [{
+        "game_id": row["game_id"],
+        "sport": row["sport"],
+        "match": f"{row['home']} vs {row['away']}",
+        "market": source["market"],
+        "book": source["book"],
+        "odds": row["odds"],
+        "stats": row["stats"],
+    } for row in raw_rows]
+
+
+def build_games(rows):
+    """
+    Folds market rows into the game list the prediction routes consume.
+    `odds` is the best moneyline price across books, which keeps the
+    {"match", "odds", "stats"} shape that get_upcoming_games has always returned.
+    """
+    games = {}
+    for row in rows:
+        game = games.setdefault(row["game_id"], {
+            "id": row["game_id"],
+            "sport": row["sport"],
+            "match": row["match"],
+            "odds": None,
+            "stats": None,
+            "markets": {},
+        })
+        game["markets"].setdefault(row["market"], {})[row["book"]] = row["odds"]
+        if row["stats"] and not game["stats"]:
+            game["stats"] = row["stats"]
+
+    for game in games.values():
+        prices = game["markets"].get("moneyline") or next(iter(game["markets"].values()))
+        game["odds"] = max(prices.values())
+        game["stats"] = game["stats"] or dict(DEFAULT_STATS)
+    return list(games.values())
+
+
+def freeze(value):
+    """Read-only deep copy: dicts become MappingProxyType views, lists become tuples."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain dict/list copy of a frozen value, e.g. for jsonify."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class OddsSnapshot:
+    """
+    One ingestion pass, shared by every request thread. Rows, games and latency
+    are frozen (see freeze), so a reader cannot change what another one sees;
+    copy with dict(...) or thaw() before modifying.
+    """
+
+    def __init__(self, rows, latency, fetched_at=None):
+        self.rows = freeze(rows)
+        self.games = freeze(build_games(rows))
+        self.latency = freeze(latency)
+        self.fetched_at = fetched_at or time.time()
+
+    def to_json(self):
+        return json.dumps({"rows": thaw(self.rows), "latency": thaw(self.latency), "fetched_at": self.fetched_at})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data["rows"], data["latency"], data["fetched_at"])
+
+
+# The latest snapshot is swapped in with a single reference assignment, so
+# request threads can read it at any time without taking a lock.
+_current_snapshot = None
+
+
+def publish_snapshot(snapshot):
+    global _current_snapshot
+    _current_snapshot = snapshot
+
+
+def get_snapshot():
+    return _current_snapshot
+
+
+# --- 3. THE INGESTOR ---
+def source_name(source):
+    return f"{source['book']}:{source['market']}"
+
+
+def load_sources(path):
+    """Loads the list of {"book", "market", "url", "format"} sources from JSON."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class OddsIngestor:
+    def __init__(self, sources, max_connections=20, timeout=10.0, parse_workers=4, use_processes=False):
+        self.sources = sources
+        self.max_connections = max_connections
+        self.timeout = timeout
+        # BeautifulSoup parsing is CPU-bound, so keep it off the event loop
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.parse_pool = executor_cls(max_workers=parse_workers)
+        self.listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def _fetch_one(self, session, source):
+        loop = asyncio.get_running_loop()
+        name = source_name(source)
+        started = time.perf_counter()
+        try:
+            async with session.get(source["url"]) as resp:
+                resp.raise_for_status()
+                body = await resp.text()
+            fetched = time.perf_counter()
+
+            parser = PARSERS[source.get("format", "json")]
+            raw_rows = await loop.run_in_executor(self.parse_pool, partial(parser, body))
+            parsed = time.perf_counter()
+
+            return normalize(source, raw_rows), {
+                "status": "ok",
+                "rows": len(raw_rows),
+                "fetch_ms": round((fetched - started) * 1000, 2),
+                "parse_ms": round((parsed - fetched) * 1000, 2),
+            }
+        except Exception as e:
+            print(f"⚠️ Odds source {name} failed: {e}")
+            return [], {
+                "status": "error",
+                "error": str(e),
+                "rows": 0,
+                "fetch_ms": round((time.perf_counter() - started) * 1000, 2),
+                "parse_ms": 0.0,
+            }
+
+    def _session(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def ingest_once(self, session=None):
+        """Fetches every source concurrently and publishes a fresh snapshot."""
+        if session is None:
+            async with self._session() as session:
+                return await self.ingest_once(session)
+
+        results = await asyncio.gather(*(self._fetch_one(session, s) for s in self.sources))
+
+        rows = []
+        latency = {}
+        for source, (source_rows, stats) in zip(self.sources, results):
+            rows.extend(source_rows)
+            latency[source_name(source)] = stats
+
+        snapshot = OddsSnapshot(rows, latency)
+        publish_snapshot(snapshot)
+        for listener in self.listeners:
+            listener(snapshot)
+        return snapshot
+
+    async def _run_forever(self, interval):
+        # One pooled session for the life of the loop keeps connections warm between passes
+        async with self._session() as session:
+            while not self._stop.is_set():
+                await self.ingest_once(session)
+                await asyncio.get_running_loop().run_in_executor(None, self._stop.wait, interval)
+
+    def start(self, interval=30.0):
+        """Runs the ingestion loop on a background thread with its own event loop."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._run_forever(interval)),
+            name="odds-ingestor",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.parse_pool.shutdown(wait=False)
+
+
+# --- 4. ONE INGESTOR PER HOST ---
+class SharedIngestion:
+    """
+    Runs a single OddsIngestor for every gunicorn worker on the host instead of
+    one per worker. The workers race for an exclusive flock on `<path>.lock`;
+    the holder ingests and writes each snapshot to `path` (atomic rename). The
+    others poll the file's mtime and publish whatever it holds, calling the
+    same listeners. When the leader exits the OS drops its lock, and the next
+    follower to poll takes over.
+    """
+
+    def __init__(self, path, sources, interval=30.0, listeners=(), poll_seconds=1.0):
+        self.path = path
+        self.sources = sources
+        self.interval = interval
+        self.listeners = list(listeners)
+        self.poll_seconds = poll_seconds
+        self.ingestor = None
+        self._lock_file = None
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self.ingestor is not None
+
+    def _try_lead(self):
+        import fcntl
+
+        if self._lock_file is None:
+            self._lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self.ingestor = OddsIngestor(self.sources)
+        self.ingestor.listeners.extend(self.listeners)
+        self.ingestor.listeners.append(self._write)
+        self.ingestor.start(self.interval)
+        print(f"📡 Worker {os.getpid()} is ingesting odds for {len(self.sources)} sources every {self.interval:.0f}s")
+        return True
+
+    def _write(self, snapshot):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(snapshot.to_json())
+        os.replace(tmp, self.path)
+
+    def _follow(self):
+        """Publishes the leader's latest snapshot if the file changed since the last poll."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = OddsSnapshot.from_json(f.read())
+        except (OSError, ValueError):
+            return  # not written yet, or caught mid-replace; the next poll retries
+        self._mtime = mtime
+        publish_snapshot(snapshot)
+        for listener in self.listeners:
+            listener(snapshot)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._try_lead():
+                return  # the ingestor's own thread takes it from here
+            self._follow()
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="odds-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.ingestor:
+            self.ingestor.stop()
+        if self._lock_file:
+            self._lock_file.close()
+
+
+def start_ingestion_from_env(listeners=()):
+    """
+    Starts background ingestion when PICKLABS_ODDS_SOURCES points at a sources file.
+    Without it, get_upcoming_games keeps serving the built-in demo slate.
+    Each listener is called with every new snapshot from the ingestion thread.
+
+    When PICKLABS_ODDS_SHARED names a snapshot file (gunicorn.conf.py sets one
+    per master), only one process on the host fetches and the rest read its
+    snapshots; see SharedIngestion.
+    """
+    sources_path = os.environ.get("PICKLABS_ODDS_SOURCES")
+    if not sources_path:
+        return None
+    interval = float(os.environ.get("PICKLABS_ODDS_INTERVAL", "30"))
+    shared_path = os.environ.get("PICKLABS_ODDS_SHARED")
+    if shared_path:
+        shared = SharedIngestion(shared_path, load_sources(sources_path), interval, listeners)
+        shared.start()
+        return shared
+    ingestor = OddsIngestor(load_sources(sources_path))
+    ingestor.listeners.extend(listeners)
+    ingestor.start(interval)
+    print(f"📡 Odds ingestion running for {len(ingestor.sources)} sources every {interval:.0f}s")
+    return ingestor
+
+
+# --- 5. OFFLINE FIXTURES ---
+class FixtureServer:
+    """
+    A local stand-in for the sportsbooks: serves recorded pages from a directory
+    over HTTP so the whole pipeline can be exercised offline.
+    """
+
+    def __init__(self, directory, port=0):
+        handler = partial(_QuietHandler, directory=directory)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def fixture_sources(directory, base_url):
+    """Builds a source list from fixture files named <book>_<market>.<json|html>."""
+    sources = []
+    for filename in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(filename)
+        if ext not in (".json", ".html") or "_" not in stem:
+            continue
+        book, market = stem.split("_", 1)
+        sources.append({
+            "book": book,
+            "market": market,
+            "url": f"{base_url}/{filename}",
+            "format": ext[1:],
+        })
+    return sources
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run one odds ingestion pass")
+    parser.add_argument("--sources", help="JSON file listing live sources")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(__file__), "fixtures", "odds"),
+                        help="Directory of recorded pages to serve locally (used when --sources is omitted)")
+    args = parser.parse_args()
+
+    if args.sources:
+        snapshot = asyncio.run(OddsIngestor(load_sources(args.sources)).ingest_once())
+    else:
+        with FixtureServer(args.fixtures) as server:
+            ingestor = OddsIngestor(fixture_sources(args.fixtures, server.url))
+            snapshot = asyncio.run(ingestor.ingest_once())
+
+    print(f"\n--- 📡 {len(snapshot.games)} games from {len(snapshot.latency)} sources ---")
+    for name, stats in snapshot.latency.items():
+        print(f"  {name:<28} {stats['status']:<6} rows={stats['rows']:<4} "
+              f"fetch={stats['fetch_ms']:.1f}ms parse={stats['parse_ms']:.1f}ms")
+    for game in snapshot.games:
+        print(f"  🏟  {game['match']} @ {game['odds']}")
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+
+
+class OddsSnapshotStore:
+    """
+    Keeps the last known price for every (game, market, book) and diffs each new
+    snapshot against it. Only rows whose price actually moved are handed to
+    subscribers, so predictions and staking can skip the untouched games.
+    """
+
+    def __init__(self, history_size=500):
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._prices = {}     # (game_id, market, book) -> latest decimal odds
+        self._history = {}    # (game_id, market, book) -> deque of (timestamp, odds)
+        self._games = {}      # game_id -> game dict from the latest snapshot
+        self._subscribers = []
+        self.ticks = 0
+
+    def subscribe(self, callback):
+        """Registers callback(changes) to receive every non-empty change list."""
+        self._subscribers.append(callback)
+
+    def apply(self, snapshot):
+        """
+        Diffs a snapshot against the stored prices and returns the changed rows.
+        Each change is the snapshot row plus `previous` odds and a `change` kind:
+        "new", "moved" or "removed". Rows from sources that failed this tick are
+        left alone rather than reported as removed.
+        """
+        ts = snapshot.fetched_at
+        failed = {name for name, stats in snapshot.latency.items() if stats["status"] != "ok"}
+        changes = []
+
+        with self._lock:
+            seen = set()
+            for row in snapshot.rows:
+                key = (row["game_id"], row["market"], row["book"])
+                seen.add(key)
+                previous = self._prices.get(key)
+                if previous == row["odds"]:
+                    continue
+                self._prices[key] = row["odds"]
+                self._record(key, ts, row["odds"])
+                changes.append(dict(row, previous=previous, change="new" if previous is None else "moved"))
+
+            for key in list(self._prices):
+                game_id, market, book = key
+                if key in seen or f"{book}:{market}" in failed:
+                    continue
+                previous = self._prices.pop(key)
+                self._record(key, ts, None)
+                changes.append({
+                    "game_id": game_id, "market": market, "book": book,
+                    "odds": None, "previous": previous, "change": "removed"
+                })
+
+            # Games whose team stats changed must be re-predicted even if no price moved
+            games = {game["id"]: game for game in snapshot.games}
+            moved = changed_game_ids(changes)
+            for game_id, game in games.items():
+                old = self._games.get(game_id)
+                if old is not None and old["stats"] != game["stats"] and game_id not in moved:
+                    changes.append({
+                        "game_id": game_id, "market": "stats", "book": None,
+                        "odds": game["odds"], "previous": old["odds"], "change": "moved"
+                    })
+            # A game only served by a failed source keeps its last known state
+            live_ids = {key[0] for key in self._prices}
+            previous_games = self._games
+            self._games = {game_id: game for game_id, game in games.items() if game_id in live_ids}
+            for game_id in live_ids - self._games.keys():
+                if game_id in previous_games:
+                    self._games[game_id] = previous_games[game_id]
+            self.ticks += 1
+
+        if changes:
+            for callback in self._subscribers:
+                callback(changes)
+        return changes
+
+    def _record(self, key, ts, odds):
+        series = self._history.get(key)
+        if series is None:
+            series = self._history[key] = deque(maxlen=self.history_size)
+        series.append((ts, odds))
+
+    def game(self, game_id):
+        return self._games.get(game_id)
+
+    def games(self):
+        return list(self._games.values())
+
+    def history(self, game_id, market=None, book=None, since=None):
+        """
+        Returns the line-movement series for a game as
+        {"market:book": [(timestamp, odds), ...]}, optionally filtered.
+        A None price marks the point where the book pulled the line.
+        """
+        result = {}
+        with self._lock:
+            for (g, m, b), series in self._history.items():
+                if g != game_id or (market and m != market) or (book and b != book):
+                    continue
+                points = [p for p in series if since is None or p[0] >= since]
+                if points:
+                    result[f"{m}:{b}"] = points
+        return result
+
+    def prune(self, max_age_seconds=86400):
+        """Drops history for lines that have been pulled for longer than max_age_seconds."""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            for key in list(self._history):
+                series = self._history[key]
+                if key not in self._prices and series and series[-1][0] < cutoff:
+                    del self._history[key]
+
+
+def changed_game_ids(changes):
+    return {change["game_id"] for change in changes}
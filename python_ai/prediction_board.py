@@ -0,0 +1,109 @@
+import threading
+
+from ai_engine import BettingEngine
+from metrics import record_cache
+from odds_store import changed_game_ids
+
+
+def predict_game(ai_model, betting_engine, game, ai_win_prob=None):
+    """
+    Runs the model and the 3 staking strategies for a single game.
+    This is the per-game work behind /api/predictions. Pass `ai_win_prob`
+    when the probability was already scored as part of a batch.
+    """
+    odds = game['odds']
+
+    # Calculate AI Win Probability
+    if ai_win_prob is None:
+        ai_win_prob = ai_model.predict_probability(game['stats'])
+
+    # Calculate 3 Strategy Bets
+    kelly_amount = betting_engine.kelly_bet(ai_win_prob, odds)
+    fixed_amount = betting_engine.fixed_unit_bet(unit_percent=0.02)
+    target_amount = betting_engine.target_profit_bet(target_amount=50, odds=odds)
+
+    # Calculate edge
+    edge = (odds - 1) * ai_win_prob - (1 - ai_win_prob)
+
+    return {
+        "id": game.get('id', game['match']),
+        "match": game['match'],
+        "odds": odds,
+        "ai_probability": round(ai_win_prob * 100, 1),
+        "edge": round(edge * 100, 2),
+        "suggestions": {
+            "kelly": kelly_amount,
+            "fixed": fixed_amount,
+            "target": target_amount
+        }
+    }
+
+
+def predict_many(ai_model, betting_engine, games):
+    """Scores a list of games with one model call, then sizes stakes for each."""
+    probabilities = ai_model.predict_batch([game['stats'] for game in games])
+    return [predict_game(ai_model, betting_engine, game, p) for game, p in zip(games, probabilities)]
+
+
+class PredictionBoard:
+    """
+    The cached /api/predictions board. It subscribes to an OddsSnapshotStore and
+    re-predicts only the games that appear in a change list; every other game
+    keeps its previous result.
+    """
+
+    def __init__(self, ai_model, store, bankroll=1000):
+        self.ai_model = ai_model
+        self.store = store
+        self.bankroll = bankroll
+        self.betting_engine = BettingEngine(bankroll)
+        self._lock = threading.Lock()
+        self._predictions = {}  # game_id -> prediction dict
+        self.recomputed = 0
+        # listener(updated, removed) is called only when a game's output actually changed
+        self.listeners = []
+        store.subscribe(self.on_changes)
+
+    def on_changes(self, changes):
+        game_ids = changed_game_ids(changes)
+        # Every game on the board that did not move is a reused prediction
+        reused = max(len(self._predictions) - len(game_ids & self._predictions.keys()), 0)
+        record_cache("prediction_board_games", True, reused)
+        record_cache("prediction_board_games", False, len(game_ids))
+        return self._recompute(game_ids)
+
+    def refresh_all(self):
+        """Re-predicts every game, e.g. after the model has been retrained."""
+        return self._recompute([game["id"] for game in self.store.games()])
+
+    def _recompute(self, game_ids):
+        games = []
+        removed = []
+        for game_id in game_ids:
+            game = self.store.game(game_id)
+            if game is None:
+                removed.append(game_id)
+            else:
+                games.append(game)
+        results = predict_many(self.ai_model, self.betting_engine, games)
+        updated = {game["id"]: result for game, result in zip(games, results)}
+        self.recomputed += len(updated)
+
+        with self._lock:
+            removed = [game_id for game_id in removed if self._predictions.pop(game_id, None) is not None]
+            updated = {game_id: result for game_id, result in updated.items()
+                       if self._predictions.get(game_id) != result}
+            self._predictions.update(updated)
+
+        if updated or removed:
+            for listener in self.listeners:
+                listener(updated, removed)
+        return updated, removed
+
+    def has_data(self):
+        return self.store.ticks > 0
+
+    def predictions(self):
+        """The current board, in the order the games appear in the odds feed."""
+        with self._lock:
+            return [self._predictions[game["id"]] for game in self.store.games() if game["id"] in self._predictions]
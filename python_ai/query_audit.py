@@ -0,0 +1,170 @@
+"""
+N+1 detection and query budgets for the ORM layer (development and CI only).
+
+The lazy='dynamic' relationships in models.py make it easy to run one query
+per row without noticing. This module counts the SQL statements issued inside
+a request or job and groups them by shape (the statement with whitespace and
+IN-lists collapsed), so a statement run once per row stands out.
+
+    PICKLABS_QUERY_AUDIT=1 python server.py
+
+logs every request or audited job that repeats one statement shape at least
+PICKLABS_QUERY_AUDIT_REPEAT times (default 3). Budgets can be asserted anywhere:
+
+    with assert_max_queries(3, "GET /my-library"):
+        client.get("/my-library")
+
+tests/test_query_budgets.py does exactly that for every endpoint and job, so
+one going over budget or repeating a statement shape fails the test suite.
+"""
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger("picklabs.queries")
+
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement):
+    """Collapses whitespace and `IN (?, ?, ...)` lists so the same query with different sizes groups together."""
+    return _IN_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryLog:
+    """The statements issued on one thread while a track_queries() block was open."""
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def shapes(self):
+        return Counter(statement_shape(s) for s in self.statements)
+
+    def repeated(self, threshold=3):
+        """[(shape, times)] for every shape run at least `threshold` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes().most_common() if n >= threshold]
+
+    def report(self, threshold=3):
+        lines = [f"{self.label}: {self.count} statements"]
+        for shape, n in self.repeated(threshold):
+            lines.append(f"  {n}x {shape}")
+        return "\n".join(lines)
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    for log in getattr(_local, "logs", ()):
+        log.statements.append(statement)
+
+
+def _install():
+    global _installed
+    if _installed:
+        return
+    with _install_lock:
+        if not _installed:
+            from sqlalchemy import event
+            from sqlalchemy.engine import Engine
+
+            event.listen(Engine, "before_cursor_execute", _record)
+            _installed = True
+
+
+@contextmanager
+def track_queries(label="queries"):
+    """Records every statement this thread issues inside the block; yields the QueryLog."""
+    _install()
+    log = QueryLog(label)
+    logs = getattr(_local, "logs", None)
+    if logs is None:
+        logs = _local.logs = []
+    logs.append(log)
+    try:
+        yield log
+    finally:
+        logs.remove(log)
+
+
+@contextmanager
+def assert_max_queries(budget, label="queries", repeat_threshold=None):
+    """
+    Raises QueryBudgetExceeded when the block issues more than `budget`
+    statements, or (with `repeat_threshold`) repeats any statement shape
+    that many times.
+    """
+    with track_queries(label) as log:
+        yield log
+    if log.count > budget:
+        raise QueryBudgetExceeded(f"over budget of {budget}: " + log.report(repeat_threshold or 2))
+    if repeat_threshold and log.repeated(repeat_threshold):
+        raise QueryBudgetExceeded("repeated statements (N+1?): " + log.report(repeat_threshold))
+
+
+# --- DEVELOPMENT MODE ---
+def enabled():
+    return os.environ.get("PICKLABS_QUERY_AUDIT", "").lower() in ("1", "true", "yes")
+
+
+def _repeat_threshold():
+    return int(os.environ.get("PICKLABS_QUERY_AUDIT_REPEAT", "3"))
+
+
+def _warn_if_repeated(log):
+    threshold = _repeat_threshold()
+    if log.repeated(threshold):
+        logger.warning("Possible N+1 in %s", log.report(threshold))
+
+
+def audited(label):
+    """Decorates a background job so its statements are audited in development mode."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            with track_queries(label) as log:
+                result = fn(*args, **kwargs)
+            _warn_if_repeated(log)
+            return result
+        return wrapper
+    return decorator
+
+
+def audit_app(app):
+    """In development mode, audits every request and logs the ones with repeated statement shapes."""
+    if not enabled():
+        return
+    from flask import g, request
+
+    logging.basicConfig()
+    logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def _start_audit():
+        g.query_audit = track_queries(f"{request.method} {request.path}")
+        g.query_log = g.query_audit.__enter__()
+
+    @app.teardown_request
+    def _finish_audit(exc):
+        audit = g.pop("query_audit", None)
+        if audit is None:
+            return
+        audit.__exit__(None, None, None)
+        _warn_if_repeated(g.pop("query_log"))
@@ -1,39 +1,124 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context
 from flask_cors import CORS
 from flask_login import LoginManager, login_required, current_user
 from ai_engine import BettingEngine, SportsPredictionModel, get_upcoming_games
-from models import db, User, Betlist, Pick
+from models import db, User, Betlist, Pick, saved_betlists, toggle_follow, toggle_saved_betlist
+from db_config import SerializedWriter, init_db, upgrade_schema
+from grading import auto_grade_bets, roi_listeners
+from leaderboard import DEFAULT_MIN_PICKS, WINDOWS, ALL_SPORTS, leaderboard_from_env, refresh_on_profile_change
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from odds_ingest import start_ingestion_from_env, get_snapshot, thaw
+from odds_store import OddsSnapshotStore
+from prediction_board import PredictionBoard, predict_many
+from inference import batcher_from_env, coerce_features
+from live_updates import UpdateBroadcaster, format_sse
+import metrics
+import query_audit
+from user_cache import cache_from_env, invalidate_on_commit
 import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 app = Flask(__name__)
 # Enable CORS so the React app running on a different port can fetch data
 CORS(app)
 
-app.config['SECRET_KEY'] = 'picklabs_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///picklabs.db'
+app.config['SECRET_KEY'] = os.environ.get('PICKLABS_SECRET_KEY', 'picklabs_secret_key')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('PICKLABS_DATABASE_URI', 'sqlite:///picklabs.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db.init_app(app)
+# WAL, busy_timeout and a per-worker pool (see db_config.py)
+init_db(app, db)
+
+# Every write runs on this one thread, so request threads only ever read
+db_writer = SerializedWriter(app, db)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
 
+# Per-route latency and SQL counts for /metrics; PICKLABS_PROFILE_SLOW_MS also
+# dumps sampled stacks for slow requests (see metrics.py). PICKLABS_METRICS=0
+# leaves the hooks out, which load_test.py --metrics-overhead compares against.
+if os.environ.get('PICKLABS_METRICS', '1') != '0':
+    metrics.init_app(app, profiler=metrics.profiler_from_env())
+# PICKLABS_QUERY_AUDIT=1 logs requests that repeat a statement shape (N+1)
+query_audit.audit_app(app)
+
+# current_user is a cached, read-only UserSnapshot rather than an ORM instance;
+# handlers use current_user.id and query anything else they need
+user_cache = cache_from_env()
+invalidate_on_commit(user_cache, User)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(int(user_id), lambda uid: db.session.get(User, uid))
 
 with app.app_context():
     db.create_all()
+    # Adds columns newer than an existing picklabs.db (e.g. picks.sport, picks.graded_at)
+    upgrade_schema(db)
     # Mock user if none exists
     if not User.query.first():
         mock_user = User(username='MarcusLocks', email='marcus@example.com', is_public=True, verified_roi=12.5)
         db.session.add(mock_user)
         db.session.commit()
 
-# Initialize the AI model once when the server starts
+# Initialize the AI model once when the server starts. Under gunicorn with
+# preload_app (see gunicorn.conf.py) this runs once in the master process and
+# the forked workers share the trained model copy-on-write.
 print("Initializing AI Model...")
 ai_model = SportsPredictionModel()
 ai_model.train("historical_sports_data.csv")
+ai_model.warm_up()
+
+# Concurrent /api/predict requests share one predict_proba call per small time window
+inference_batcher = batcher_from_env(ai_model)
+
+# Every snapshot is diffed against the last one, and only games whose odds
+# moved are re-predicted into the cached board.
+odds_store = OddsSnapshotStore()
+prediction_board = PredictionBoard(ai_model, odds_store, bankroll=1000)
+
+# Board changes are computed once and pushed to every /api/stream client.
+# PICKLABS_MAX_STREAMS caps open streams per process (see gunicorn.conf.py).
+broadcaster = UpdateBroadcaster(max_subscribers=int(os.environ.get("PICKLABS_MAX_STREAMS", "0")))
+prediction_board.listeners.append(
+    lambda updated, removed: broadcaster.publish("predictions", {"updated": updated, "removed": removed})
+)
+
+# Ranked in memory; grading and ROI updates move only the creators they touched,
+# and a creator going private drops off as soon as the change commits
+leaderboard = leaderboard_from_env()
+roi_listeners.append(leaderboard.refresh_users)
+refresh_on_profile_change(leaderboard, User)
+
+odds_ingestor = None
+
+def start_background_services():
+    """
+    Starts the per-process background threads. Threads do not survive a fork,
+    so gunicorn calls this from post_fork in every worker instead of at import.
+    """
+    global odds_ingestor
+    # Keep the odds snapshot fresh in the background (no-op unless PICKLABS_ODDS_SOURCES is set).
+    # Under gunicorn one worker fetches and the others follow its snapshot file.
+    odds_ingestor = start_ingestion_from_env(listeners=[odds_store.apply])
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify({"status": "ok"})
+
+@app.route('/ready')
+def ready():
+    """Readiness: only green once the model is trained and has served a warm-up prediction."""
+    is_ready = ai_model.is_trained and ai_model.is_warm
+    return jsonify({
+        "status": "ready" if is_ready else "starting",
+        "model_trained": ai_model.is_trained,
+        "model_warm": ai_model.is_warm
+    }), 200 if is_ready else 503
 
 @app.route('/api/predictions', methods=['GET'])
 def get_predictions():
@@ -41,38 +126,16 @@ def get_predictions():
     Returns the live upcoming games with their AI-calculated probabilities
     and suggested betting amounts across 3 strategies.
     """
-    todays_games = get_upcoming_games()
-    bankroll = 1000 # Example bankroll for calculations
-    betting_engine = BettingEngine(bankroll)
-    
-    results = []
-    
-    for game in todays_games:
-        match_name = game['match']
-        odds = game['odds']
-        
-        # Calculate AI Win Probability
-        ai_win_prob = ai_model.predict_probability(game['stats'])
-        
-        # Calculate 3 Strategy Bets
-        kelly_amount = betting_engine.kelly_bet(ai_win_prob, odds)
-        fixed_amount = betting_engine.fixed_unit_bet(unit_percent=0.02)
-        target_amount = betting_engine.target_profit_bet(target_amount=50, odds=odds)
-        
-        # Calculate edge
-        edge = (odds - 1) * ai_win_prob - (1 - ai_win_prob)
-        
-        results.append({
-            "match": match_name,
-            "odds": odds,
-            "ai_probability": round(ai_win_prob * 100, 1),
-            "edge": round(edge * 100, 2),
-            "suggestions": {
-                "kelly": kelly_amount,
-                "fixed": fixed_amount,
-                "target": target_amount
-            }
-        })
+    bankroll = prediction_board.bankroll
+
+    has_board = prediction_board.has_data()
+    metrics.record_cache("prediction_board", has_board)
+    if has_board:
+        results = prediction_board.predictions()
+    else:
+        # No live snapshot yet: score the demo slate directly
+        betting_engine = BettingEngine(bankroll)
+        results = predict_many(ai_model, betting_engine, get_upcoming_games())
         
     return jsonify({
         "status": "success",
@@ -80,6 +143,42 @@ def get_predictions():
         "predictions": results
     })
 
+@app.route('/api/stream')
+def stream_predictions():
+    """
+    Server-Sent Events feed of the prediction board. Clients receive the full
+    board once as a `snapshot` event, then `predictions` events carrying only
+    the games whose probability, edge or stakes changed.
+    """
+    q = broadcaster.subscribe()
+    if q is None:
+        # Every stream pins a request thread; past the cap, keep the rest for the API
+        return jsonify({"status": "error", "message": "Too many open streams"}), 503, {"Retry-After": "30"}
+    initial = format_sse("snapshot", {
+        "bankroll": prediction_board.bankroll,
+        "predictions": prediction_board.predictions()
+    })
+    return Response(
+        stream_with_context(broadcaster.stream(q, initial)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def score_pending_game(future, stats):
+    """
+    Waits for a game queued on the inference batcher. If the batcher is stuck
+    or its batch failed, the game is scored again on the request thread;
+    predict_batch pins the training column order, so stats keys may arrive in
+    any order, or be missing or extra.
+    """
+    try:
+        return future.result(timeout=inference_batcher.result_timeout)
+    except FutureTimeoutError:
+        print("⚠️ Inference batcher timed out; scoring on the request thread.")
+    except Exception as e:
+        print(f"⚠️ Batched prediction failed ({e}); scoring on the request thread.")
+    return ai_model.predict_batch([coerce_features(stats)])[0]
+
 @app.route('/api/predict', methods=['POST'])
 def predict_games():
     """
@@ -92,17 +191,32 @@ def predict_games():
     betting_engine = BettingEngine(bankroll)
     results = {}
     
+    # Games that carry real features are queued on the shared inference batcher
+    # up front, so this request's games and other threads' games score together.
+    pending = {}
+    for game in games:
+        if game.get('id') and game.get('stats'):
+            try:
+                pending[game['id']] = inference_batcher.submit(game['stats'])
+            except ValueError as e:
+                return jsonify({"status": "error", "message": f"Game {game['id']}: {e}"}), 400
+    
     for game in games:
         game_id = game.get('id')
         if not game_id:
             continue
             
-        # Optional: mock features derived from teams or passing real features
-        # Note: Scikit-learn random stats based on names if empty, or hardcode
-        # For full app-wide integration, we mock a robust win probability from 40% to 65% loosely based on id
-        import hashlib
-        hash_val = int(hashlib.sha256(str(game_id).encode('utf-8')).hexdigest(), 16)
-        ai_win_prob = 0.40 + (hash_val % 25) / 100.0  # e.g., 0.40 to 0.64
+        if game_id in pending:
+            try:
+                ai_win_prob = score_pending_game(pending[game_id], game['stats'])
+            except Exception as e:
+                return jsonify({"status": "error", "message": f"Game {game_id} could not be scored: {e}"}), 422
+        else:
+            # Optional: mock features derived from teams or passing real features
+            # For full app-wide integration, we mock a robust win probability from 40% to 65% loosely based on id
+            import hashlib
+            hash_val = int(hashlib.sha256(str(game_id).encode('utf-8')).hexdigest(), 16)
+            ai_win_prob = 0.40 + (hash_val % 25) / 100.0  # e.g., 0.40 to 0.64
         
         odds = game.get('odds', 1.90)  # Default -110 in decimal
         
@@ -128,29 +242,118 @@ def predict_games():
         "predictions": results
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target: latency, SQL, model and cache metrics for this process."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/inference/stats', methods=['GET'])
+def inference_stats():
+    """Batch size and queue-wait metrics for the shared inference batcher."""
+    return jsonify({"status": "success", "batcher": inference_batcher.stats()})
+
+@app.route('/api/odds/status', methods=['GET'])
+def odds_status():
+    """Reports the age of the current odds snapshot and per-source fetch/parse latency."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({"status": "empty", "sources": {}})
+
+    return jsonify({
+        "status": "success",
+        "fetched_at": snapshot.fetched_at,
+        "age_seconds": round(time.time() - snapshot.fetched_at, 1),
+        "games": len(snapshot.games),
+        "sources": thaw(snapshot.latency)
+    })
+
+@app.route('/api/odds/history/<game_id>', methods=['GET'])
+def odds_history(game_id):
+    """Line movement for one game, keyed by "market:book"."""
+    market = request.args.get('market')
+    book = request.args.get('book')
+    return jsonify({
+        "status": "success",
+        "game_id": game_id,
+        "history": odds_store.history(game_id, market=market, book=book)
+    })
+
+def _leaderboard_args():
+    window = request.args.get('window', 'season')
+    sport = request.args.get('sport', ALL_SPORTS)
+    min_picks = max(request.args.get('min_picks', DEFAULT_MIN_PICKS, type=int), 1)
+    return window, sport, min_picks
+
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """
+    Top creators by ROI. Query params: window (7d, 30d, season, all),
+    sport (e.g. NBA, default all), min_picks (graded picks required) and limit.
+    """
+    window, sport, min_picks = _leaderboard_args()
+    if window not in WINDOWS:
+        return jsonify({"status": "error", "message": f"window must be one of {', '.join(WINDOWS)}"}), 400
+    limit = min(max(request.args.get('limit', 25, type=int), 1), 100)
+
+    total, leaders = leaderboard.top(window, sport, min_picks, limit)
+    return jsonify({
+        "status": "success",
+        "window": window,
+        "sport": sport.upper(),
+        "min_picks": min_picks,
+        "total": total,
+        "leaders": leaders
+    })
+
+@app.route('/api/leaderboard/rank/<int:user_id>', methods=['GET'])
+def get_leaderboard_rank(user_id):
+    """One creator's rank on a leaderboard; takes the same window, sport and min_picks params."""
+    window, sport, min_picks = _leaderboard_args()
+    if window not in WINDOWS:
+        return jsonify({"status": "error", "message": f"window must be one of {', '.join(WINDOWS)}"}), 400
+
+    total, entry = leaderboard.rank(user_id, window, sport, min_picks)
+    if entry is None:
+        return jsonify({"status": "not_ranked", "user_id": user_id, "total": total}), 404
+    return jsonify({"status": "success", "window": window, "sport": sport.upper(),
+                    "min_picks": min_picks, "total": total, "entry": entry})
+
 @app.route('/save_betlist/<int:betlist_id>', methods=['POST'])
 @login_required
 def toggle_save_betlist(betlist_id):
     """Handles saving or unsaving a Betlist to the user's personal library."""
-    betlist = Betlist.query.get_or_404(betlist_id)
-    
-    if betlist in current_user.saved_lists:
-        current_user.saved_lists.remove(betlist)
-        action = 'unsaved'
-        message = 'Removed from Library'
-    else:
-        current_user.saved_lists.append(betlist)
+    Betlist.query.get_or_404(betlist_id)
+
+    if db_writer.call(toggle_saved_betlist, current_user.id, betlist_id):
         action = 'saved'
         message = 'Saved to Library'
-        
-    db.session.commit()
-    
+    else:
+        action = 'unsaved'
+        message = 'Removed from Library'
+
     return jsonify({
         'status': 'success', 
         'action': action,
         'message': message
     })
 
+@app.route('/follow/<int:user_id>', methods=['POST'])
+@login_required
+def toggle_follow_user(user_id):
+    """Follows or unfollows another creator."""
+    if user_id == current_user.id:
+        return jsonify({'status': 'error', 'message': "You can't follow yourself"}), 400
+    # EXISTS rather than loading the row: load_user's SELECT on users may already
+    # have run in this request, and the audit would flag the same shape twice
+    if not db.session.query(db.exists().where(User.id == user_id)).scalar():
+        return jsonify({'status': 'error', 'message': 'User not found'}), 404
+
+    following = db_writer.call(toggle_follow, current_user.id, user_id)
+    return jsonify({
+        'status': 'success',
+        'action': 'followed' if following else 'unfollowed'
+    })
+
 @app.route('/my-library')
 @login_required
 def my_library():
@@ -158,12 +361,31 @@ def my_library():
     Fetches every single Betlist the user has clicked 'Save' on,
     and sends it to their personal library page.
     """
-    saved_lists = current_user.saved_lists.all()
-    return render_template('library.html', betlists=saved_lists, user=current_user)
+    # Creators are joined in and pick counts come from one grouped query, so the
+    # page costs the same number of statements however many lists are saved
+    saved_lists = (
+        Betlist.query.join(saved_betlists, saved_betlists.c.betlist_id == Betlist.id)
+        .filter(saved_betlists.c.user_id == current_user.id)
+        .options(joinedload(Betlist.creator))
+        .all()
+    )
+    pick_counts = dict(
+        db.session.query(Pick.betlist_id, func.count(Pick.id))
+        .filter(Pick.betlist_id.in_([betlist.id for betlist in saved_lists]))
+        .group_by(Pick.betlist_id)
+    ) if saved_lists else {}
+    return render_template('library.html', betlists=saved_lists, pick_counts=pick_counts, user=current_user)
 
 @app.route('/social-feed')
 def social_feed():
     return render_template('social-feed.html')
 
+@app.cli.command('grade')
+def grade_command():
+    """Nightly grading: flask --app server grade. Runs on the writer thread like every other write."""
+    db_writer.call(auto_grade_bets)
+
 if __name__ == '__main__':
+    # Development server. For production use gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+    start_background_services()
     app.run(port=8005, debug=False, threaded=True)
@@ -0,0 +1,172 @@
+"""
+SQLite concurrency stress test: default settings vs. the db_config tuning.
+
+    python stress_db.py [--readers 16] [--writers 8] [--duration 10] [--users 500] [--betlists 2000]
+
+Runs the same workload twice, each time in a fresh process with a freshly
+seeded database: once with PICKLABS_SQLITE_TUNING=0 (rollback journal,
+writes on the request threads) and once tuned (WAL, synchronous=NORMAL,
+mmap, busy_timeout, single writer thread). The workload is:
+
+  - reader threads loading /my-library for random users
+  - writer threads toggling /save_betlist and /follow
+  - one thread re-running update_all_user_rois, standing in for the grader
+
+Everything goes through Flask's test client, so no sockets are involved.
+Reports throughput, p50/p99 latency and failed requests ("database is
+locked" surfaces as HTTP 500) for each mode.
+"""
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {"default": "0", "tuned": "1"}
+
+
+def _pct(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+
+def _summary(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ordered),
+        "ops_per_s": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(_pct(ordered, 50) * 1000, 2),
+        "p99_ms": round(_pct(ordered, 99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+def run_workload(args):
+    """Child process: seed, hammer the app from many threads, print one JSON line."""
+    import load_test
+    import server
+    from grading import update_all_user_rois
+
+    rng = random.Random(load_test.SEED)
+    with server.app.app_context():
+        user_ids = load_test.seed_database(server.db, args.users, args.betlists, 2, 5, 10, rng)
+
+    stop = threading.Event()
+    results = {"read": ([], [0]), "write": ([], [0]), "grade": ([], [0])}
+    lock = threading.Lock()
+
+    def record(kind, elapsed, ok):
+        latencies, errors = results[kind]
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[0] += 1
+
+    def client_for(user_id):
+        client = server.app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+        return client
+
+    def reader(seed):
+        r = random.Random(seed)
+        clients = [client_for(r.choice(user_ids)) for _ in range(4)]
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = r.choice(clients).get("/my-library")
+            record("read", time.perf_counter() - started, response.status_code == 200)
+
+    def writer(seed):
+        r = random.Random(seed)
+        clients = [(user_id, client_for(user_id)) for user_id in r.sample(user_ids, 4)]
+        while not stop.is_set():
+            user_id, client = r.choice(clients)
+            if r.random() < 0.5:
+                url = f"/save_betlist/{r.randint(1, args.betlists)}"
+            else:
+                url = f"/follow/{r.choice([u for u in user_ids[:50] if u != user_id])}"
+            started = time.perf_counter()
+            response = client.post(url)
+            record("write", time.perf_counter() - started, response.status_code == 200)
+
+    def grader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                server.db_writer.call(update_all_user_rois)
+                record("grade", time.perf_counter() - started, True)
+            except Exception:
+                record("grade", time.perf_counter() - started, False)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(args.writers)]
+    threads.append(threading.Thread(target=grader))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {kind: _summary(latencies, errors[0], elapsed) for kind, (latencies, errors) in results.items()}
+
+
+def run_mode(mode, args):
+    workdir = tempfile.mkdtemp(prefix=f"picklabs-stress-{mode}-")
+    env = dict(
+        os.environ,
+        PICKLABS_SQLITE_TUNING=MODES[mode],
+        PICKLABS_DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'stress.db')}",
+        PICKLABS_THREADS=str(args.readers + args.writers),
+    )
+    env.pop("PICKLABS_ODDS_SOURCES", None)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker",
+           "--readers", str(args.readers), "--writers", str(args.writers), "--duration", str(args.duration),
+           "--users", str(args.users), "--betlists", str(args.betlists)]
+    try:
+        # No training data in workdir, so importing server skips the model fit
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            sys.exit(f"{mode} run failed:\n{proc.stderr}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="SQLite concurrency stress test")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--betlists", type=int, default=2000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        logging.disable(logging.CRITICAL)  # failed requests are counted, not logged
+        result = run_workload(args)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    print(f"--- 🔥 {args.readers} readers, {args.writers} writers, 1 grader, {args.duration:.0f}s per mode ---")
+    results = {mode: run_mode(mode, args) for mode in MODES}
+    for mode, result in results.items():
+        for kind, s in result.items():
+            print(f"  {mode:<8} {kind:<6} {s['ops_per_s']:>8} ops/s  p50 {s['p50_ms']:>8} ms  "
+                  f"p99 {s['p99_ms']:>9} ms  errors {s['errors']}")
+    for kind in ("read", "write"):
+        before, after = results["default"][kind]["ops_per_s"], results["tuned"][kind]["ops_per_s"]
+        if before:
+            print(f"  {kind} throughput: {after / before:.2f}x")
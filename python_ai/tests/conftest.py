@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The app modules import each other as top-level modules (e.g. `from models import db`),
+# and so do the ui-ux-pro-max skill scripts (`from core import search`)
+sys.path.insert(0, os.path.join(ROOT, "python_ai"))
+sys.path.insert(1, os.path.join(ROOT, ".agent", "skills", "ui-ux-pro-max", "scripts"))
+
+
+@pytest.fixture(scope="session")
+def trained_model(tmp_path_factory):
+    from ai_engine import SportsPredictionModel, build_synthetic_data
+
+    csv_path = str(tmp_path_factory.mktemp("data") / "historical_sports_data.csv")
+    build_synthetic_data(csv_path)
+    model = SportsPredictionModel()
+    assert model.train(csv_path)
+    return model
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The Flask app module on a throwaway SQLite database, imported once per run."""
+    workdir = tmp_path_factory.mktemp("server")
+    os.environ["PICKLABS_DATABASE_URI"] = f"sqlite:///{workdir / 'test.db'}"
+    os.environ.pop("PICKLABS_ODDS_SOURCES", None)
+    cwd = os.getcwd()
+    os.chdir(workdir)  # no training data here, so the import skips the model fit
+    try:
+        import server
+    finally:
+        os.chdir(cwd)
+    return server
@@ -0,0 +1,33 @@
+import pytest
+
+import odds_ingest
+from ai_engine import get_upcoming_games
+from odds_ingest import OddsSnapshot, normalize
+
+
+@pytest.fixture
+def live_snapshot():
+    # Stats keys deliberately out of training order, like a third-party feed
+    rows = normalize({"book": "draftkings", "market": "moneyline"}, [{
+        "game_id": "nba-lal-bos", "sport": "NBA", "home": "Lakers", "away": "Celtics", "odds": 1.95,
+        "stats": {"avg_points_diff": 4.5, "away_win_rate": 0.55, "home_win_rate": 0.65},
+    }])
+    odds_ingest.publish_snapshot(OddsSnapshot(rows, {"draftkings:moneyline": {"status": "ok"}}))
+    yield
+    odds_ingest.publish_snapshot(None)
+
+
+def test_scores_games_from_a_published_snapshot(trained_model, live_snapshot):
+    games = get_upcoming_games()
+    assert games[0]["match"] == "Lakers vs Celtics"
+
+    single = trained_model.predict_probability(games[0]["stats"])
+    batch = trained_model.predict_batch([games[0]["stats"]])
+    assert 0.0 <= single <= 1.0
+    assert single == pytest.approx(batch[0])
+
+
+def test_key_order_does_not_change_the_score(trained_model):
+    stats = {"home_win_rate": 0.65, "away_win_rate": 0.55, "avg_points_diff": 4.5}
+    reordered = dict(reversed(list(stats.items())))
+    assert trained_model.predict_probability(stats) == trained_model.predict_probability(reordered)
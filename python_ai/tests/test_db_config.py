@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from db_config import SerializedWriter, init_db
+
+THREADS = 16
+WRITES_PER_THREAD = 25
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    """A WAL database whose pool is smaller than the number of request threads, as under load."""
+    monkeypatch.setenv("PICKLABS_SQLITE_TUNING", "1")
+    monkeypatch.setenv("PICKLABS_DB_POOL_SIZE", "2")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'stress.db'}"
+    # Fail fast instead of after the default 30s when the pool runs dry
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_timeout": 5}
+    db = SQLAlchemy()
+    counters = db.Table("counters", db.Column("id", db.Integer, primary_key=True), db.Column("n", db.Integer))
+    init_db(app, db)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(counters.insert(), [{"id": i, "n": 0} for i in range(THREADS)])
+        db.session.commit()
+    yield app, db, counters
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_concurrent_writes_through_the_writer(app_db):
+    app, db, counters = app_db
+    writer = SerializedWriter(app, db, inline=False)
+    errors = []
+
+    def bump(row_id):
+        db.session.execute(counters.update().where(counters.c.id == row_id).values(n=counters.c.n + 1))
+
+    def request_thread(row_id):
+        # Like a route: read through the session (checking out a pooled
+        # connection), then wait on the writer for the write
+        with app.app_context():
+            try:
+                for _ in range(WRITES_PER_THREAD):
+                    db.session.execute(counters.select().where(counters.c.id == row_id)).one()
+                    writer.call(bump, row_id)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=request_thread, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, errors[:3]  # "database is locked", or a QueuePool timeout
+    with app.app_context():
+        assert dict(db.session.execute(counters.select()).all()) == {i: WRITES_PER_THREAD for i in range(THREADS)}
+    assert writer.jobs == THREADS * WRITES_PER_THREAD
+
+
+def test_a_failed_write_is_rolled_back(app_db):
+    app, db, counters = app_db
+    writer = SerializedWriter(app, db, inline=False)
+
+    def bump_then_fail():
+        db.session.execute(counters.update().values(n=counters.c.n + 1))
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        writer.call(bump_then_fail)
+    with app.app_context():
+        assert {n for _, n in db.session.execute(counters.select())} == {0}
@@ -0,0 +1,24 @@
+import grading
+from models import Betlist, Pick, User, db
+
+
+def test_picks_without_a_betlist_are_graded(server):
+    with server.app.app_context():
+        creator = User(username="grading_creator", email="grading_creator@example.com", is_public=True)
+        db.session.add(creator)
+        db.session.flush()
+        betlist = Betlist(user_id=creator.id, title="Grading test")
+        db.session.add(betlist)
+        db.session.flush()
+        listed = Pick(betlist_id=betlist.id, game_id="g1", units_risked=2.0)
+        loose = Pick(betlist_id=None, game_id="g2")
+        db.session.add_all([listed, loose])
+        db.session.commit()
+        ids = listed.id, loose.id
+
+        grading.auto_grade_bets()
+
+        for pick_id in ids:
+            pick = db.session.get(Pick, pick_id)
+            assert pick.status == "Won" and pick.graded_at is not None
+        assert db.session.get(User, creator.id).verified_roi == 50.0
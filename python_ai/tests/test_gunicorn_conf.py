@@ -0,0 +1,38 @@
+import os
+import runpy
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def load_conf(monkeypatch, **env):
+    for name in ("PICKLABS_THREADS", "PICKLABS_MAX_STREAMS", "PICKLABS_ODDS_SHARED"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONF)
+
+
+def test_preloaded_gthread_workers(monkeypatch):
+    conf = load_conf(monkeypatch, PICKLABS_THREADS="8")
+    assert conf["preload_app"] is True
+    assert conf["worker_class"] == "gthread"
+    assert conf["threads"] == 8
+    # Streams leave one request thread free, and every worker shares one odds file
+    assert os.environ["PICKLABS_MAX_STREAMS"] == "7"
+    assert os.environ["PICKLABS_ODDS_SHARED"].endswith(f"picklabs-odds-{os.getpid()}.json")
+
+
+def test_explicit_stream_cap_is_kept(monkeypatch):
+    load_conf(monkeypatch, PICKLABS_THREADS="1", PICKLABS_MAX_STREAMS="50")
+    assert os.environ["PICKLABS_MAX_STREAMS"] == "50"
+    load_conf(monkeypatch, PICKLABS_THREADS="1")
+    assert os.environ["PICKLABS_MAX_STREAMS"] == "1"
+
+
+def test_on_exit_removes_the_shared_snapshot(monkeypatch, tmp_path):
+    shared = tmp_path / "odds.json"
+    conf = load_conf(monkeypatch, PICKLABS_ODDS_SHARED=str(shared))
+    shared.write_text("{}")
+    (tmp_path / "odds.json.lock").write_text("")
+    conf["on_exit"](None)
+    assert list(tmp_path.iterdir()) == []
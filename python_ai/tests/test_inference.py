@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from inference import InferenceBatcher, coerce_features
+
+
+class FakeModel:
+    """Scores x directly; any x above 1 breaks predict_batch, like a bad feature would."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict_batch(self, features_list):
+        self.release.wait()
+        if any(features["x"] > 1 for features in features_list):
+            raise ValueError("x out of range")
+        return [features["x"] for features in features_list]
+
+
+def test_coerce_features():
+    assert coerce_features({"x": "0.7", "y": 2}) == {"x": 0.7, "y": 2.0}
+    for bad in ({"x": "oops"}, {"x": None}, {"x": True}, {"x": [1]}, ["x"]):
+        with pytest.raises(ValueError):
+            coerce_features(bad)
+
+
+def test_submit_rejects_non_numeric_features():
+    batcher = InferenceBatcher(FakeModel())
+    with pytest.raises(ValueError):
+        batcher.submit({"x": "oops"})
+    assert batcher.predict({"x": 0.7}, timeout=2) == 0.7
+
+
+def test_bad_game_fails_only_its_own_caller():
+    model = FakeModel()
+    batcher = InferenceBatcher(model, max_batch=8, max_latency_ms=50)
+    batcher.predict({"x": 0.1}, timeout=2)  # start the scheduler
+
+    model.release.clear()  # hold the scheduler so the next two share a batch
+    blocker = batcher.submit({"x": 0.2})
+    good = batcher.submit({"x": 0.7})
+    bad = batcher.submit({"x": 5})
+    model.release.set()
+
+    assert blocker.result(timeout=2) == 0.2
+    assert good.result(timeout=2) == 0.7
+    with pytest.raises(ValueError):
+        bad.result(timeout=2)
+    assert batcher.stats()["batches"] >= 2
+
+
+def test_dead_scheduler_is_replaced():
+    batcher = InferenceBatcher(FakeModel())
+    batcher.predict({"x": 0.3}, timeout=2)
+    batcher._thread = threading.Thread(target=lambda: None)  # stands in for a scheduler that died
+    batcher._thread.start()
+    batcher._thread.join()
+    assert batcher.predict({"x": 0.4}, timeout=2) == 0.4
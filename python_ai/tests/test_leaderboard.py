@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from datetime import datetime
+
+from leaderboard import Leaderboard, RankedBoard
+from models import Betlist, Pick, User, db
+
+
+def entry(user_id, roi, picks):
+    return {"user_id": user_id, "username": f"user{user_id}", "roi": roi, "profit": 0.0, "picks": picks}
+
+
+def test_ranked_board_matches_a_sorted_list():
+    rng = random.Random(7)
+    board, current = RankedBoard(), {}
+    for _ in range(2000):
+        user_id = rng.randrange(200)
+        if rng.random() < 0.2:
+            board.remove(user_id)
+            current.pop(user_id, None)
+        else:
+            e = entry(user_id, rng.choice([-5.0, 0.0, 3.5, 12.0]), rng.randrange(1, 5))
+            board.upsert(e)
+            current[user_id] = e
+    expected = sorted(current.values(), key=lambda e: (-e["roi"], -e["picks"], e["user_id"]))
+    assert len(board) == len(expected)
+    assert board.top(len(expected)) == [e["user_id"] for e in expected]
+    for user_id in range(200):
+        ranks = [i + 1 for i, e in enumerate(expected) if e["user_id"] == user_id]
+        assert board.rank(user_id) == (ranks[0] if ranks else None)
+
+
+class GatedLeaderboard(Leaderboard):
+    """Aggregates from a dict instead of SQL; a full query can be held open mid-flight."""
+
+    def __init__(self, rows):
+        super().__init__(check_seconds=3600)
+        self.rows = rows  # user id -> roi
+        self.gate = None
+
+    def _latest_graded_at(self):
+        return None
+
+    def _query(self, user_ids=None):
+        snapshot = {user_id: entry(user_id, roi, 10) for user_id, roi in self.rows.items()
+                    if user_ids is None or user_id in user_ids}
+        if user_ids is None and self.gate is not None:
+            in_query, release = self.gate
+            in_query.set()
+            release.wait(5)
+        return {("all", "ALL"): snapshot}
+
+
+def test_refresh_during_a_rebuild_is_not_lost():
+    board = GatedLeaderboard({1: 10.0, 2: 5.0})
+    board.rebuild()
+    in_query, release = threading.Event(), threading.Event()
+    board.gate = (in_query, release)
+
+    rebuild = threading.Thread(target=board.rebuild)
+    rebuild.start()
+    assert in_query.wait(5)
+    # The grader moves user 2 while the rebuild's (older) query is in flight
+    board.rows[2] = 20.0
+    refresh = threading.Thread(target=board.refresh_users, args=([2],))
+    refresh.start()
+    time.sleep(0.1)
+    release.set()
+    rebuild.join(5)
+    refresh.join(5)
+
+    assert board.rank(2, "all", min_picks=1) == (2, dict(entry(2, 20.0, 10), rank=1))
+
+
+def test_going_private_drops_a_creator_before_the_next_rebuild(server):
+    leaderboard = server.leaderboard
+    with server.app.app_context():
+        creator = User(username="privacy_creator", email="privacy_creator@example.com", is_public=True)
+        db.session.add(creator)
+        db.session.flush()
+        betlist = Betlist(user_id=creator.id, title="Privacy test")
+        db.session.add(betlist)
+        db.session.flush()
+        db.session.add(Pick(betlist_id=betlist.id, game_id="g1", sport="NBA", status="Won",
+                            units_risked=1.0, units_won=1.0, graded_at=datetime.utcnow()))
+        db.session.commit()
+        leaderboard.rebuild()
+        assert leaderboard.rank(creator.id, "all", min_picks=1)[1]["roi"] == 100.0
+
+        creator.is_public = False
+        db.session.commit()
+        assert leaderboard.rank(creator.id, "all", min_picks=1)[1] is None
+        assert creator.id not in [row["user_id"] for row in leaderboard.top("all", min_picks=1, limit=1000)[1]]
+
+        creator.is_public = True
+        creator.username = "privacy_creator_renamed"
+        db.session.commit()
+        assert leaderboard.rank(creator.id, "all", min_picks=1)[1]["username"] == "privacy_creator_renamed"
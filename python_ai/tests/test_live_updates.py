@@ -0,0 +1,63 @@
+import json
+
+from live_updates import UpdateBroadcaster, format_sse
+
+
+def test_format_sse():
+    assert format_sse("predictions", {"updated": {"g1": 1}, "removed": []}, 7) == \
+        'id: 7\nevent: predictions\ndata: {"updated":{"g1":1},"removed":[]}\n\n'
+    assert format_sse("snapshot", []) == "event: snapshot\ndata: []\n\n"
+
+
+def test_every_subscriber_gets_the_same_frame():
+    broadcaster = UpdateBroadcaster()
+    queues = [broadcaster.subscribe() for _ in range(3)]
+    broadcaster.publish("predictions", {"updated": {"g1": {"edge": 2.5}}, "removed": []})
+    frames = [q.get_nowait() for q in queues]
+    assert frames[0] is frames[1] is frames[2]  # serialized once
+    assert json.loads(frames[0].split("data: ")[1]) == {"updated": {"g1": {"edge": 2.5}}, "removed": []}
+
+
+def test_slow_subscriber_is_dropped_and_its_stream_ends():
+    broadcaster = UpdateBroadcaster(max_queue=2)
+    fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+    for i in range(3):
+        broadcaster.publish("predictions", {"n": i})
+        fast.get_nowait()
+    assert broadcaster.subscriber_count == 1
+
+    frames = list(broadcaster.stream(slow, "event: snapshot\ndata: {}\n\n"))
+    assert frames[0].startswith("event: snapshot")
+    assert len(frames) == 1  # no backlog: the client reconnects for a fresh snapshot
+
+
+def test_stream_sends_keep_alives_until_unsubscribed():
+    broadcaster = UpdateBroadcaster(heartbeat_seconds=0.01)
+    q = broadcaster.subscribe()
+    stream = broadcaster.stream(q)
+    assert next(stream) == ": keep-alive\n\n"
+    broadcaster.publish("predictions", {"n": 1})
+    assert next(stream).startswith("id: 1\nevent: predictions")
+    stream.close()
+    assert broadcaster.subscriber_count == 0
+
+
+def test_subscriber_cap():
+    broadcaster = UpdateBroadcaster(max_subscribers=2)
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    assert broadcaster.subscribe() is None
+    broadcaster.unsubscribe(first)
+    assert broadcaster.subscribe() is not None
+
+
+def test_stream_endpoint_returns_503_past_the_cap(server, monkeypatch):
+    monkeypatch.setattr(server, "broadcaster", UpdateBroadcaster(max_subscribers=1))
+    client = server.app.test_client()
+    response = client.get("/api/stream", buffered=False)
+    try:
+        assert next(response.response).startswith(b"event: snapshot")
+        refused = client.get("/api/stream")
+        assert refused.status_code == 503 and refused.headers["Retry-After"] == "30"
+    finally:
+        response.close()
+    assert server.broadcaster.subscriber_count == 0
@@ -0,0 +1,58 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import load_test
+
+
+def test_budget_by_count_and_by_deadline():
+    budget = load_test.Budget(3, None)
+    assert [budget.take() for _ in range(5)] == [True, True, True, False, False]
+    assert not load_test.Budget(100, 1e-9).take()
+
+
+def test_summarize():
+    samples = [(i / 1000, i % 3, 0.5, 0.0) for i in range(1, 101)]  # 1..100 ms
+    summary = load_test.summarize(samples, {"500": 2}, elapsed=2.0)
+    assert summary["requests"] == 100 and summary["errors"] == {"500": 2}
+    assert summary["throughput_rps"] == 50.0
+    assert summary["latency_ms"] == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "mean": 50.5, "max": 100.0}
+    assert summary["queries_per_request"] == {"mean": 1.0, "max": 2}
+    assert load_test.summarize([], {"ConnectionError": 1}, 1.0) == {"requests": 0, "errors": {"ConnectionError": 1}}
+
+
+def test_session_cookie_logs_the_user_in(server, monkeypatch):
+    monkeypatch.setitem(server.app.config, "SECRET_KEY", load_test.BENCH_SECRET_KEY)
+    with server.app.app_context():
+        user_id = server.User.query.first().id
+    client = server.app.test_client()
+    assert client.get("/my-library").status_code in (302, 401)
+    client.set_cookie("session", load_test.session_cookie(user_id))
+    assert client.get("/my-library").status_code == 200
+
+
+def test_build_request_covers_every_endpoint():
+    rng = random.Random(1)
+    ctx = {"slate": load_test.synthetic_slate(3, rng), "betlists": 10, "user_ids": [7, 8]}
+    for endpoint in load_test.ENDPOINTS:
+        method, path, body, user_id = load_test.build_request(endpoint, ctx, rng)
+        assert method in ("GET", "POST") and path.startswith("/")
+        assert (user_id is not None) == (endpoint in ("save", "library"))
+    assert len(load_test.build_request("predict", ctx, rng)[2]["games"]) == 3
+    with pytest.raises(ValueError):
+        load_test.build_request("nope", ctx, rng)
+
+
+def test_small_run_end_to_end(tmp_path):
+    output = tmp_path / "report.json"
+    subprocess.run([sys.executable, load_test.__file__, "--requests", "40", "--concurrency", "4",
+                    "--users", "20", "--betlists", "40", "--slate-size", "5", "-o", str(output)],
+                   check=True, capture_output=True, cwd=os.path.dirname(load_test.__file__), timeout=120)
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert set(report["endpoints"]) == set(load_test.ENDPOINTS)
+    for endpoint, result in report["endpoints"].items():
+        assert result["requests"] == 40 and not result["errors"], endpoint
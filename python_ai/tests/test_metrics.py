@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import metrics
+
+
+def series(histogram, **labels):
+    key = tuple(str(labels[name]) for name in histogram.labels)
+    return histogram._series.get(key)
+
+
+def test_requests_are_timed_by_route(server):
+    before = series(metrics.REQUEST_LATENCY, route="/healthz", method="GET", status=200)
+    count = before[2] if before else 0
+    assert server.app.test_client().get("/healthz").status_code == 200
+    assert series(metrics.REQUEST_LATENCY, route="/healthz", method="GET", status=200)[2] == count + 1
+    assert "picklabs_request_duration_seconds_count" in server.app.test_client().get("/metrics").get_data(as_text=True)
+
+
+def test_open_streams_are_not_latency_samples(server):
+    response = server.app.test_client().get("/api/stream", buffered=False)
+    assert b"event: snapshot" in next(response.response)
+    response.close()
+
+    # (a stream refused with a 503 is an ordinary response, and is timed)
+    assert series(metrics.REQUEST_LATENCY, route="/api/stream", method="GET", status=200) is None
+    assert series(metrics.REQUEST_QUERIES, route="/api/stream") is not None
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/a")
+    assert histogram.render() == [
+        "# HELP test_seconds Test",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 3.65',
+        'test_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_and_cache_hit_ratio(monkeypatch):
+    lookups = metrics.Counter("test_lookups_total", "Test", ["cache", "result"])
+    monkeypatch.setattr(metrics, "CACHE_LOOKUPS", lookups)
+    metrics.record_cache("users", True, 3)
+    metrics.record_cache("users", False)
+    assert lookups.value(cache="users", result="hit") == 3
+    assert 'picklabs_cache_hit_ratio{cache="users"} 0.75' in metrics._cache_ratios()
+
+
+def test_phase_timer_records_time_since_the_previous_mark(monkeypatch):
+    phases = metrics.Histogram("test_phase_seconds", "Test", ["job", "phase"])
+    monkeypatch.setattr(metrics, "JOB_PHASE", phases)
+    clock = iter([10.0, 10.5, 12.0])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    timer = metrics.PhaseTimer("grading")
+    timer.mark("load")
+    timer.mark("grade")
+    assert series(phases, job="grading", phase="load")[1] == 0.5
+    assert series(phases, job="grading", phase="grade")[1] == 1.5
+
+
+def test_failed_statement_leaves_no_start_time_behind(server):
+    from sqlalchemy import text
+
+    with server.app.app_context():
+        with server.db.engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert "metrics_started" not in conn.info
+            conn.execute(text("SELECT 1"))
+            assert "metrics_started" not in conn.info
+
+
+def test_slow_requests_are_profiled(tmp_path):
+    profiler = metrics.SlowRequestProfiler(threshold_ms=20, directory=str(tmp_path), interval_ms=1)
+    profiler.begin()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    path = profiler.end("GET /api/slow", 0.05)
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert "test_slow_requests_are_profiled" in "".join(lines)
+
+    profiler.begin()
+    assert profiler.end("GET /api/fast", 0.001) is None
+    assert profiler.dumped == 1
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import odds_ingest
+from odds_ingest import (
+    DEFAULT_STATS, FixtureServer, OddsIngestor, OddsSnapshot, SharedIngestion, build_games,
+    fixture_sources, normalize, parse_html_table, parse_json_feed, thaw,
+)
+from odds_store import OddsSnapshotStore
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "odds")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def ingest(sources):
+    ingestor = OddsIngestor(sources, timeout=5.0)
+    try:
+        return asyncio.run(ingestor.ingest_once())
+    finally:
+        ingestor.parse_pool.shutdown()
+
+
+@pytest.fixture
+def fixture_server():
+    with FixtureServer(FIXTURES) as server:
+        yield server
+    odds_ingest.publish_snapshot(None)
+
+
+def test_parse_json_feed():
+    rows = parse_json_feed(read_fixture("draftkings_moneyline.json"))
+    assert [row["game_id"] for row in rows] == ["nba-lal-bos", "epl-mci-ars", "nba-nyk-chi", "nba-mia-orl"]
+    assert rows[0]["odds"] == 1.95
+    assert rows[0]["stats"]["avg_points_diff"] == 4.5
+
+
+def test_parse_html_table():
+    rows = parse_html_table(read_fixture("fanduel_moneyline.html"))
+    assert len(rows) == 4  # the header row has no data-game-id
+    assert rows[1] == {
+        "game_id": "epl-mci-ars", "sport": "EPL", "home": "Man City", "away": "Arsenal",
+        "odds": 2.35, "stats": None,
+    }
+
+
+def test_build_games_merges_books_and_markets():
+    rows = normalize({"book": "draftkings", "market": "moneyline"}, parse_json_feed(read_fixture("draftkings_moneyline.json")))
+    rows += normalize({"book": "draftkings", "market": "spread"}, parse_json_feed(read_fixture("draftkings_spread.json")))
+    rows += normalize({"book": "fanduel", "market": "moneyline"}, parse_html_table(read_fixture("fanduel_moneyline.html")))
+
+    games = {game["id"]: game for game in build_games(rows)}
+    lakers = games["nba-lal-bos"]
+    assert lakers["match"] == "Lakers vs Celtics"
+    assert lakers["markets"] == {"moneyline": {"draftkings": 1.95, "fanduel": 1.98}, "spread": {"draftkings": 1.91}}
+    assert lakers["odds"] == 1.98  # best moneyline price across books
+    assert lakers["stats"]["home_win_rate"] == 0.65
+
+
+def test_build_games_falls_back_to_default_stats():
+    rows = normalize({"book": "fanduel", "market": "moneyline"}, parse_html_table(read_fixture("fanduel_moneyline.html")))
+    assert all(game["stats"] == DEFAULT_STATS for game in build_games(rows))
+
+
+def test_snapshot_is_read_only():
+    rows = normalize({"book": "draftkings", "market": "moneyline"}, parse_json_feed(read_fixture("draftkings_moneyline.json")))
+    snapshot = OddsSnapshot(rows, {"draftkings:moneyline": {"status": "ok"}})
+    with pytest.raises(TypeError):
+        snapshot.games[0]["odds"] = 9.99
+    with pytest.raises(TypeError):
+        snapshot.games[0]["stats"]["home_win_rate"] = 1.0
+    with pytest.raises(AttributeError):
+        snapshot.rows.append({})
+    assert rows[0]["odds"] == 1.95  # the caller's rows are copied, not wrapped
+
+
+def test_ingest_once_over_fixtures(fixture_server):
+    snapshot = ingest(fixture_sources(FIXTURES, fixture_server.url))
+    assert odds_ingest.get_snapshot() is snapshot
+    assert {stats["status"] for stats in snapshot.latency.values()} == {"ok"}
+    assert len(snapshot.games) == 4
+    assert len(snapshot.rows) == 11
+
+
+def test_failed_source_keeps_other_books_and_last_known_prices(fixture_server):
+    sources = fixture_sources(FIXTURES, fixture_server.url)
+    store = OddsSnapshotStore()
+    store.apply(ingest(sources))
+
+    broken = [dict(s, url=f"{fixture_server.url}/missing.html") if s["book"] == "fanduel" else s for s in sources]
+    snapshot = ingest(broken)
+    assert snapshot.latency["fanduel:moneyline"]["status"] == "error"
+    assert snapshot.latency["draftkings:moneyline"]["status"] == "ok"
+    assert len(snapshot.games) == 4
+
+    # Rows from the failed book are not reported as pulled lines
+    assert store.apply(snapshot) == []
+    assert {game["id"] for game in store.games()} == {game["id"] for game in snapshot.games}
+
+
+def test_one_worker_ingests_and_the_others_follow(fixture_server, tmp_path):
+    path = str(tmp_path / "odds.json")
+    sources = fixture_sources(FIXTURES, fixture_server.url)
+    leader_snapshots, follower_snapshots = [], []
+    leader = SharedIngestion(path, sources, interval=60, listeners=[leader_snapshots.append])
+    follower = SharedIngestion(path, sources, interval=60, listeners=[follower_snapshots.append])
+    try:
+        assert leader._try_lead() and leader.is_leader
+        assert not follower._try_lead() and not follower.is_leader
+        deadline = time.monotonic() + 10
+        # The leader's listeners run just before it writes the file
+        while not (leader_snapshots and os.path.exists(path)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        follower._follow()
+        follower._follow()  # unchanged file: not published twice
+        assert len(follower_snapshots) == 1
+        assert odds_ingest.get_snapshot() is follower_snapshots[0]
+        assert thaw(follower_snapshots[0].games) == thaw(leader_snapshots[0].games)
+
+        # The OS drops the flock with the leader, and the next poll takes over
+        leader.stop()
+        assert follower._try_lead()
+    finally:
+        leader.stop()
+        follower.stop()
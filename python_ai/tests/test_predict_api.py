@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from inference import InferenceBatcher
+
+STATS = {"home_win_rate": 0.65, "away_win_rate": 0.55, "avg_points_diff": 4.5}
+
+
+class StuckModel:
+    """Never finishes a batch, like a scheduler wedged behind a slow predict_proba."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict_batch(self, features_list):
+        self.release.wait()
+        return [0.5] * len(features_list)
+
+
+class BrokenModel:
+    def predict_batch(self, features_list):
+        raise RuntimeError("predictor crashed")
+
+
+@pytest.fixture
+def predict(server, trained_model, monkeypatch):
+    monkeypatch.setattr(server, "ai_model", trained_model)
+    client = server.app.test_client()
+
+    def post(games, batch_model):
+        monkeypatch.setattr(server, "inference_batcher", InferenceBatcher(batch_model, result_timeout_ms=50))
+        return client.post("/api/predict", json={"games": games})
+
+    return post
+
+
+def test_batched_prediction(predict, trained_model):
+    response = predict([{"id": "g1", "odds": 1.95, "stats": STATS}], trained_model)
+    assert response.status_code == 200
+    expected = trained_model.predict_batch([STATS])[0]
+    assert response.json["predictions"]["g1"]["ai_probability"] == round(expected * 100, 1)
+
+
+@pytest.mark.parametrize("stats", [
+    dict(reversed(list(STATS.items()))),  # keys in another order
+    {"home_win_rate": 0.65, "away_win_rate": 0.55},  # a feature missing
+    dict(STATS, rest_days=2),  # an extra feature
+])
+def test_stuck_batcher_falls_back_to_the_request_thread(predict, stats):
+    stuck = StuckModel()
+    try:
+        response = predict([{"id": "g1", "odds": 1.95, "stats": stats}], stuck)
+    finally:
+        stuck.release.set()
+    assert response.status_code == 200
+    assert 0 <= response.json["predictions"]["g1"]["ai_probability"] <= 100
+
+
+def test_failed_batch_falls_back_to_the_request_thread(predict):
+    response = predict([{"id": "g1", "odds": 1.95, "stats": STATS}], BrokenModel())
+    assert response.status_code == 200
+    assert 0 <= response.json["predictions"]["g1"]["ai_probability"] <= 100
+
+
+def test_non_numeric_stats_are_rejected(predict, trained_model):
+    response = predict([{"id": "g1", "odds": 1.95, "stats": {"home_win_rate": "high"}}], trained_model)
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+from ai_engine import BettingEngine
+from odds_ingest import OddsSnapshot, normalize
+from odds_store import OddsSnapshotStore
+from prediction_board import PredictionBoard, predict_many
+
+DRAFTKINGS = {"book": "draftkings", "market": "moneyline"}
+OK = {"draftkings:moneyline": {"status": "ok"}}
+
+
+def game(game_id, odds, home_win_rate=0.6):
+    return {"game_id": game_id, "sport": "NBA", "home": f"{game_id} home", "away": f"{game_id} away", "odds": odds,
+            "stats": {"home_win_rate": home_win_rate, "away_win_rate": 0.5, "avg_points_diff": 2.0}}
+
+
+def snapshot(*games, latency=OK):
+    return OddsSnapshot(normalize(DRAFTKINGS, list(games)), latency)
+
+
+class CountingModel:
+    """Scores home_win_rate as the probability and remembers every game it was asked about."""
+
+    def __init__(self):
+        self.scored = []
+
+    def predict_batch(self, features_list):
+        self.scored.extend(features_list)
+        return [features["home_win_rate"] for features in features_list]
+
+
+def test_apply_reports_only_what_changed():
+    store = OddsSnapshotStore()
+    first = store.apply(snapshot(game("a", 1.9), game("b", 2.1)))
+    assert {(c["game_id"], c["change"], c["previous"]) for c in first} == {("a", "new", None), ("b", "new", None)}
+
+    assert store.apply(snapshot(game("a", 1.9), game("b", 2.1))) == []
+
+    moved = store.apply(snapshot(game("a", 1.85), game("b", 2.1)))
+    assert [(c["game_id"], c["change"], c["previous"], c["odds"]) for c in moved] == [("a", "moved", 1.9, 1.85)]
+
+    restated = store.apply(snapshot(game("a", 1.85), game("b", 2.1, home_win_rate=0.7)))
+    assert [(c["game_id"], c["market"], c["change"]) for c in restated] == [("b", "stats", "moved")]
+
+    removed = store.apply(snapshot(game("b", 2.1, home_win_rate=0.7)))
+    assert [(c["game_id"], c["change"], c["odds"]) for c in removed] == [("a", "removed", None)]
+    assert [g["id"] for g in store.games()] == ["b"]
+    assert [odds for _, odds in store.history("a")["moneyline:draftkings"]] == [1.9, 1.85, None]
+
+
+def test_failed_source_does_not_remove_its_lines():
+    store = OddsSnapshotStore()
+    store.apply(snapshot(game("a", 1.9)))
+    assert store.apply(snapshot(latency={"draftkings:moneyline": {"status": "error"}})) == []
+    assert [g["id"] for g in store.games()] == ["a"]
+
+
+def test_board_repredicts_only_moved_games():
+    store, model = OddsSnapshotStore(), CountingModel()
+    board = PredictionBoard(model, store, bankroll=1000)
+    notified = []
+    board.listeners.append(lambda updated, removed: notified.append((sorted(updated), removed)))
+
+    store.apply(snapshot(game("a", 1.9), game("b", 2.1), game("c", 2.5)))
+    assert board.recomputed == 3
+    model.scored.clear()
+
+    store.apply(snapshot(game("a", 1.9), game("b", 2.2), game("c", 2.5)))
+    assert board.recomputed == 4 and len(model.scored) == 1
+
+    store.apply(snapshot(game("a", 1.9), game("b", 2.2)))
+    assert notified == [(["a", "b", "c"], []), (["b"], []), ([], ["c"])]
+
+    # The incrementally maintained board equals scoring every game from scratch
+    expected = predict_many(CountingModel(), BettingEngine(1000), store.games())
+    assert board.predictions() == expected
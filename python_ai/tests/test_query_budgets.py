@@ -0,0 +1,93 @@
+"""
+Data-access regressions: every endpoint and job has a SQL statement budget.
+
+Each route runs through Flask's test client as a logged-in user on a seeded
+database (see load_test.seed_database), and so do the grading jobs. Anything
+that issues more statements than its budget, or runs the same statement shape
+twice (which is how an N+1 shows up), fails. Budgets are per call and must not
+depend on how much data is seeded.
+"""
+import random
+
+import pytest
+
+import load_test
+from query_audit import assert_max_queries
+
+# (method, path, max statements). The logged-in user comes from the user cache.
+ENDPOINT_BUDGETS = [
+    ("GET", "/api/predictions", 0),
+    ("POST", "/api/predict", 0),
+    ("GET", "/my-library", 2),
+    ("POST", "/save_betlist/{betlist_id}", 3),
+    ("POST", "/follow/{user_id}", 3),
+    # Served from memory; the warm-up requests materialize the boards
+    ("GET", "/api/leaderboard?window=30d&sport=NBA&min_picks=3", 0),
+    ("GET", "/api/leaderboard/rank/{ranked_user_id}?window=season&min_picks=1", 0),
+]
+
+# (job name, max statements). Both include one leaderboard refresh for the creators they changed.
+JOB_BUDGETS = [
+    ("update_all_user_rois", 4),
+    ("auto_grade_bets", 6),
+]
+
+PREDICT_PAYLOAD = {"games": [{"id": "g1", "odds": 1.95, "stats": {"home_win_rate": 0.6, "away_win_rate": 0.5, "avg_points_diff": 2.0}}]}
+BETLISTS = 600
+
+
+@pytest.fixture(scope="module")
+def seeded(server):
+    rng = random.Random(load_test.SEED)
+    with server.app.app_context():
+        user_ids = load_test.seed_database(server.db, users=200, betlists=BETLISTS, picks=5,
+                                           follows=10, saves=25, rng=rng)
+    # Writes normally run on the writer thread; run them here so they are counted
+    inline = server.db_writer.inline
+    server.db_writer.inline = True
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_ids[0])
+        session["_fresh"] = True
+    # Warm-up so one-off work (template compilation, first connection) is not counted
+    client.get("/my-library")
+    ranked_user_id = client.get("/api/leaderboard?window=season&min_picks=1").json["leaders"][0]["user_id"]
+    client.get("/api/leaderboard?window=30d&sport=NBA&min_picks=3")
+    yield {"client": client, "user_ids": user_ids, "ranked_user_id": ranked_user_id, "rng": rng}
+    server.db_writer.inline = inline
+
+
+@pytest.mark.parametrize("method, path, budget", ENDPOINT_BUDGETS, ids=[f"{m} {p}" for m, p, _ in ENDPOINT_BUDGETS])
+def test_endpoint_query_budget(seeded, method, path, budget):
+    url = path.format(betlist_id=seeded["rng"].randint(1, BETLISTS), user_id=seeded["user_ids"][-1],
+                      ranked_user_id=seeded["ranked_user_id"])
+    with assert_max_queries(budget, f"{method} {path}", repeat_threshold=2):
+        response = seeded["client"].open(url, method=method, json=PREDICT_PAYLOAD if method == "POST" else None)
+    assert response.status_code < 400
+
+
+@pytest.mark.parametrize("job, budget", JOB_BUDGETS, ids=[job for job, _ in JOB_BUDGETS])
+def test_job_query_budget(server, seeded, job, budget):
+    import grading
+
+    with server.app.app_context():
+        with assert_max_queries(budget, job, repeat_threshold=2):
+            getattr(grading, job)()
+
+
+def test_one_query_per_row_is_caught(server, seeded):
+    from models import Betlist
+    from query_audit import QueryBudgetExceeded, statement_shape
+
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT * FROM t WHERE id IN (?, ?)")
+    with server.app.app_context():
+        betlists = Betlist.query.limit(3).all()
+        # Within budget, but the same statement once per betlist is still an N+1
+        with pytest.raises(QueryBudgetExceeded, match="repeated statements"):
+            with assert_max_queries(10, "picks per betlist", repeat_threshold=2):
+                for betlist in betlists:
+                    betlist.picks.count()
+        with pytest.raises(QueryBudgetExceeded, match="over budget of 2"):
+            with assert_max_queries(2, "picks per betlist"):
+                for betlist in betlists:
+                    betlist.picks.count()
@@ -0,0 +1,28 @@
+import json
+import subprocess
+import sys
+
+import benchmark
+
+
+def test_small_run_reports_every_metric(tmp_path):
+    output = tmp_path / "results.json"
+    subprocess.run([sys.executable, benchmark.__file__, "--sizes", "200", "--queries", "20", "-o", str(output)],
+                   check=True, capture_output=True, cwd=tmp_path)
+    report = json.loads(output.read_text(encoding="utf-8"))
+    metrics = report["results"]["200"]
+    for name in ("search_csv", "search", "search_stack", "generate"):
+        assert set(metrics[name]) == {"p50_ms", "p95_ms", "p99_ms", "mean_ms"}
+    assert metrics["fit_s"] > 0 and metrics["batch_qps"] > 0 and metrics["max_rss_mb"] > 0
+    assert report["meta"]["queries"] == 20
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = {"results": {"1000": {"fit_s": 1.0, "batch_qps": 100.0, "search": {"p99_ms": 2.0}, "index_mb": 0}}}
+    current = {"results": {"1000": {"fit_s": 1.2, "batch_qps": 70.0, "search": {"p99_ms": 3.0}, "index_mb": 5}}}
+    assert benchmark.compare(baseline, current, 0.25) == [
+        "1000 rows: batch_qps 100.0 -> 70.0 (+43%)",
+        "1000 rows: search.p99_ms 2.0 -> 3.0 (+50%)",
+    ]
+    assert benchmark.compare(baseline, current, 0.6) == []
+    assert benchmark.compare({"results": {}}, current, 0.0) == []  # a size the baseline never ran
@@ -0,0 +1,170 @@
+import os
+import random
+from math import log
+
+import pytest
+
+import core
+from core import BM25
+
+np = pytest.importorskip("numpy")
+core._numpy()  # BM25Matrix expects NumPy to have been loaded through core
+
+
+def reference_scores(documents, query, k1=1.5, b=0.75):
+    """Textbook BM25 over every document, no postings or precomputation."""
+    tokenize = BM25().tokenize
+    docs = [tokenize(doc) for doc in documents]
+    avgdl = sum(len(doc) for doc in docs) / len(docs)
+    freqs = {token: sum(1 for doc in docs if token in doc) for token in tokenize(query)}
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for token in tokenize(query):
+            freq = freqs[token]
+            tf = doc.count(token)
+            if tf:
+                idf = log((len(docs) - freq + 0.5) / (freq + 0.5) + 1)
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+        scores.append(score)
+    return scores
+
+
+def reference_top_k(documents, query, k):
+    scores = reference_scores(documents, query)
+    ranked = sorted((idx for idx, score in enumerate(scores) if score > 0), key=lambda idx: (-scores[idx], idx))
+    return [(idx, scores[idx]) for idx in ranked[:k]]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(7)
+    words = [f"term{i}" for i in range(60)]
+    documents = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 25))) for _ in range(400)]
+    queries = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    queries += ["", "unknown words only", "term1 term1 term2"]  # no terms, no matches, a repeated term
+    bm25 = BM25()
+    bm25.fit(documents)
+    return documents, queries, bm25
+
+
+def assert_same_ranking(actual, expected):
+    assert [idx for idx, _ in actual] == [idx for idx, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+def test_top_k_matches_brute_force(corpus):
+    documents, queries, bm25 = corpus
+    for query in queries:
+        assert_same_ranking(bm25.top_k(query, 5), reference_top_k(documents, query, 5))
+
+
+def test_batched_top_k_is_identical_to_the_scalar_path(corpus):
+    _, queries, bm25 = corpus
+    matrix = core.BM25Matrix(bm25, chunk_size=16)  # several chunks, the last one partial
+    for k in (1, 5, 1000):
+        assert matrix.top_k_many(queries, k) == [bm25.top_k(query, k) for query in queries]
+
+
+def test_batched_scores_stay_sparse(corpus):
+    _, queries, bm25 = corpus
+    rows, docs, scores = core.BM25Matrix(bm25)._score_chunk(queries)
+    assert len(scores) < len(queries) * bm25.N
+    assert np.all(scores > 0)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(core, "INDEX_DIR", tmp_path / ".index")
+    core.clear_caches()
+    rng = random.Random(11)
+    words = [f"term{i}" for i in range(40)]
+    with open(tmp_path / "items.csv", "w", encoding="utf-8") as f:
+        f.write("Name,Keywords\n")
+        for i in range(300):
+            f.write(f"item{i},{' '.join(rng.choice(words) for _ in range(8))}\n")
+    yield tmp_path
+    core.clear_caches()
+
+
+def test_persisted_index_is_memory_mapped(data_dir):
+    filepath, cols = data_dir / "items.csv", ["Name", "Keywords"]
+    rows, built = core.load_index(filepath, cols)
+    core.clear_caches()
+    loaded_rows, loaded = core.load_index(filepath, cols)
+
+    assert loaded_rows == rows
+    assert isinstance(loaded.post_docs, memoryview) and loaded.post_docs.readonly
+    for query in ("term1 term2", "term3", "missing"):
+        assert loaded.top_k(query, 10) == built.top_k(query, 10)
+
+
+def test_stale_or_corrupt_index_is_rebuilt(data_dir):
+    filepath, cols = data_dir / "items.csv", ["Name", "Keywords"]
+    core.load_index(filepath, cols)
+    index_path = core._index_path(filepath, cols)
+    stat = filepath.stat()
+    assert core._read_index(index_path, filepath, stat) is not None
+
+    index_path.write_bytes(index_path.read_bytes()[:100])  # truncated write
+    assert core._read_index(index_path, filepath, stat) is None
+    index_path.write_bytes(b"")
+    assert core._read_index(index_path, filepath, stat) is None
+
+    core.clear_caches()
+    core.load_index(filepath, cols)
+    assert core._read_index(index_path, filepath, stat) is not None
+
+
+def test_concurrent_index_writes_do_not_collide(data_dir):
+    import threading
+
+    filepath, cols = data_dir / "items.csv", ["Name", "Keywords"]
+    data, bm25 = core._build_index(filepath, cols)
+    index_path = core._index_path(filepath, cols)
+    stat = filepath.stat()
+    threads = [threading.Thread(target=core._write_index, args=(index_path, filepath, stat, data, bm25))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert core._read_index(index_path, filepath, stat) is not None
+    assert [p.name for p in (data_dir / ".index").iterdir()] == [index_path.name]
+
+
+def test_persisted_index_is_reused_until_the_csv_changes(data_dir, monkeypatch):
+    filepath, cols = data_dir / "items.csv", ["Name", "Keywords"]
+    rows, built = core.load_index(filepath, cols)
+    assert core._index_path(filepath, cols).exists()
+    assert core._index_path(filepath, ["Name"]) != core._index_path(filepath, cols)
+
+    def no_refit(self, documents):
+        raise AssertionError("index was refitted")
+
+    fit = BM25.fit
+    monkeypatch.setattr(BM25, "fit", no_refit)
+    core.clear_caches()
+    assert core.load_index(filepath, cols)[1].top_k("term1", 5) == built.top_k("term1", 5)
+
+    # A checkout or copy moves mtime without changing the content: the sha1 still matches
+    os.utime(filepath, ns=(filepath.stat().st_atime_ns, filepath.stat().st_mtime_ns + 10**9))
+    core.clear_caches()
+    core.load_index(filepath, cols)
+
+    monkeypatch.setattr(BM25, "fit", fit)
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write("extra,term1 term1 term1\n")
+    core.clear_caches()
+    rows, _ = core.load_index(filepath, cols)
+    assert rows[-1]["Name"] == "extra"
+
+
+def test_unwritable_index_dir_still_searches(data_dir, monkeypatch):
+    blocked = data_dir / "blocked"
+    blocked.write_text("a file where the index directory should be")
+    monkeypatch.setattr(core, "INDEX_DIR", blocked / ".index")
+    rows, bm25 = core.load_index(data_dir / "items.csv", ["Name", "Keywords"])
+    assert len(rows) == 300 and bm25.top_k("term1", 3)
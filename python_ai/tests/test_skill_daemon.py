@@ -0,0 +1,79 @@
+import http.client
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+import core
+import daemon
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((daemon.HOST, 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("UIPROMAX_DAEMON_PORT", str(free_port()))
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while daemon.call_daemon("search", {"query": "warm-up"}) is None:
+        assert time.monotonic() < deadline and thread.is_alive(), "daemon did not start"
+        time.sleep(0.05)
+    yield thread
+    daemon.stop_daemon()
+    thread.join(10)
+
+
+def raw_request(method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(daemon.HOST, daemon.daemon_port(), timeout=10)
+    try:
+        conn.request(method, path, body, headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_no_daemon_means_in_process_search(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("UIPROMAX_DAEMON_PORT", str(free_port()))
+    assert daemon.call_daemon("search", {"query": "saas"}) is None
+    # A token left behind by a dead daemon is not enough
+    os.makedirs(os.path.dirname(daemon.token_path()))
+    with open(daemon.token_path(), "w") as f:
+        f.write("stale")
+    assert daemon.call_daemon("search", {"query": "saas"}) is None
+
+
+def test_daemon_answers_like_in_process_search(running_daemon):
+    assert stat.S_IMODE(os.stat(daemon.token_path()).st_mode) == 0o600
+    payload = {"query": "saas dashboard", "domain": "product", "max_results": 2}
+    assert daemon.call_daemon("search", payload) == core.search("saas dashboard", "product", 2)
+    assert daemon.call_daemon("search_stack", {"query": "hooks", "stack": "react"}) == core.search_stack("hooks", "react")
+
+
+def test_requests_need_the_token_and_json(running_daemon):
+    token = daemon._read_token()
+    body = json.dumps({"query": "saas"})
+    assert raw_request("POST", "/search", body, {"Content-Type": "application/json"})[0] == 403
+    assert raw_request("GET", "/health", headers={daemon.TOKEN_HEADER: "wrong"})[0] == 403
+    assert raw_request("POST", "/search", body, {"Content-Type": "text/plain", daemon.TOKEN_HEADER: token})[0] == 415
+    assert raw_request("POST", "/persist", body, {"Content-Type": "application/json", daemon.TOKEN_HEADER: token})[0] == 404
+    status, health = raw_request("GET", "/health", headers={daemon.TOKEN_HEADER: token})
+    assert status == 200 and health["pid"] == os.getpid()
+
+
+def test_stop_removes_the_token(running_daemon):
+    assert daemon.stop_daemon()
+    running_daemon.join(10)
+    assert not running_daemon.is_alive()
+    assert not os.path.exists(daemon.token_path())
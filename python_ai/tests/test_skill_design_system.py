@@ -0,0 +1,158 @@
+import json
+import os
+import stat
+
+import pytest
+
+import design_system
+from design_system import DesignSystemGenerator, persist_design_system
+
+
+@pytest.fixture(scope="module")
+def generated():
+    return DesignSystemGenerator(parallel=False).generate("saas dashboard", "Test Project")
+
+
+def file_modes(directory):
+    return {
+        os.path.relpath(os.path.join(root, name), directory): stat.S_IMODE(os.stat(os.path.join(root, name)).st_mode)
+        for root, _, names in os.walk(directory) for name in names
+    }
+
+
+def test_persisted_files_get_the_default_file_mode(generated, tmp_path):
+    persist_design_system(generated, "home", str(tmp_path), "saas dashboard")
+    modes = file_modes(tmp_path / "design-system" / "test-project")
+    assert set(modes) == {"MASTER.md", "pages/home.md", ".manifest.json"}
+    assert set(modes.values()) == {0o666 & ~design_system._UMASK}
+
+
+def test_rewritten_files_keep_their_mode(generated, tmp_path):
+    persist_design_system(generated, None, str(tmp_path))
+    master = tmp_path / "design-system" / "test-project" / "MASTER.md"
+    master.write_text("edited by hand\n", encoding="utf-8")
+    os.chmod(master, 0o640)
+
+    result = persist_design_system(generated, None, str(tmp_path))
+    assert str(master) not in result["unchanged_files"]
+    assert stat.S_IMODE(os.stat(master).st_mode) == 0o640
+
+
+@pytest.mark.parametrize("query", ["saas dashboard", "fintech crypto exchange dark", "wellness spa booking", "qqqq"])
+def test_parallel_generation_matches_sequential(query):
+    sequential = DesignSystemGenerator(parallel=False).generate(query, "Test Project")
+    parallel = DesignSystemGenerator(parallel=True).generate(query, "Test Project")
+    seq_timings, par_timings = sequential.pop("timings"), parallel.pop("timings")
+    assert parallel == sequential
+    assert set(par_timings) == set(seq_timings) == set(design_system.SEARCH_CONFIG) | {"reasoning", "total"}
+
+
+def reference_find(rows, category):
+    """The original three linear scans over ui-reasoning.csv."""
+    category_lower = category.lower()
+    for rule in rows:
+        if rule.get("UI_Category", "").lower() == category_lower:
+            return rule
+    for rule in rows:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if ui_cat in category_lower or category_lower in ui_cat:
+            return rule
+    for rule in rows:
+        keywords = rule.get("UI_Category", "").lower().replace("/", " ").replace("-", " ").split()
+        if any(kw in category_lower for kw in keywords):
+            return rule
+    return {}
+
+
+def test_reasoning_lookup_matches_linear_scan():
+    rules = design_system.load_reasoning_rules()
+    categories = [rule["UI_Category"] for rule in rules.rows]
+    probes = categories + [c.upper() for c in categories] + [c[: len(c) // 2] for c in categories] + [
+        "SaaS", "Fintech / Crypto Dashboard", "my e-commerce store", "Health", "qqqq", "", "a",
+    ]
+    generator = DesignSystemGenerator(parallel=False)
+    for category in probes:
+        assert generator._find_reasoning_rule(category) == reference_find(rules.rows, category), category
+
+
+def test_reasoning_is_memoized_but_returned_as_a_copy():
+    rules = design_system.load_reasoning_rules()
+    category = rules.rows[0]["UI_Category"]
+    first = rules.reasoning(category)
+    first["style_priority"].append("mutated")
+    first["decision_rules"]["mutated"] = True
+    assert rules.reasoning(category) == rules._reasoning[0]
+    assert rules.reasoning("qqqq") == design_system.DEFAULT_REASONING
+    assert design_system.load_reasoning_rules() is rules  # unchanged CSV, same compiled rules
+
+
+def write_manifest(tmp_path, entries):
+    path = tmp_path / "batch.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return str(path)
+
+
+def test_batch_manifest_is_normalized(tmp_path):
+    path = write_manifest(tmp_path, {"projects": [
+        {"query": "sportsbook dark", "project": "Skin A", "pages": ["dashboard", {"name": "checkout", "query": "payment form"}]},
+        {"query": "saas landing"},
+    ]})
+    assert design_system.load_batch_manifest(path) == [
+        {"query": "sportsbook dark", "project": "Skin A",
+         "pages": [("dashboard", "sportsbook dark"), ("checkout", "payment form")]},
+        {"query": "saas landing", "project": None, "pages": []},
+    ]
+    with pytest.raises(ValueError):
+        design_system.load_batch_manifest(write_manifest(tmp_path, [{"project": "no query"}]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_writes_every_project_in_manifest_order(tmp_path, workers):
+    entries = [
+        {"query": "sportsbook dark", "project": "Skin A", "pages": [("dashboard", "live odds dashboard")]},
+        {"query": "saas landing", "project": None, "pages": []},
+    ]
+    results = design_system.generate_batch(entries, str(tmp_path), workers=workers)
+    assert [(r["status"], r["project"]) for r in results] == [("success", "Skin A"), ("success", "SAAS LANDING")]
+    assert (tmp_path / "design-system" / "skin-a" / "pages" / "dashboard.md").exists()
+    assert (tmp_path / "design-system" / "saas-landing" / "MASTER.md").exists()
+
+    # Single entries persist exactly what a one-off --persist run would
+    single = tmp_path / "single"
+    generated = DesignSystemGenerator(parallel=False).generate("sportsbook dark", "Skin A")
+    persist_design_system(generated, "dashboard", str(single), "live odds dashboard")
+    for name in ("MASTER.md", "pages/dashboard.md"):
+        batch_text = (tmp_path / "design-system" / "skin-a" / name).read_text(encoding="utf-8")
+        single_text = (single / "design-system" / "skin-a" / name).read_text(encoding="utf-8")
+        assert design_system._content_hash(batch_text) == design_system._content_hash(single_text)
+
+
+def test_unchanged_batch_entries_skip_generation(tmp_path, monkeypatch):
+    entries = [{"query": "sportsbook dark", "project": "Skin A", "pages": [("dashboard", "live odds")]}]
+    first = design_system.generate_batch(entries, str(tmp_path), workers=1)[0]
+    assert first["generated"] and not first["unchanged_files"]
+
+    def no_generate(self, query, project_name=None):
+        raise AssertionError("regenerated an unchanged entry")
+
+    monkeypatch.setattr(DesignSystemGenerator, "generate", no_generate)
+    second = design_system.generate_batch(entries, str(tmp_path), workers=1)[0]
+    assert second["status"] == "success" and not second["generated"]
+    assert second["unchanged_files"] == second["created_files"] == first["created_files"]
+    monkeypatch.undo()
+
+    # A hand-edited file, or a different page query, brings generation back
+    master = tmp_path / "design-system" / "skin-a" / "MASTER.md"
+    master.write_text("edited\n", encoding="utf-8")
+    third = design_system.generate_batch(entries, str(tmp_path), workers=1)[0]
+    assert third["generated"] and str(master) not in third["unchanged_files"]
+    entries[0]["pages"] = [("dashboard", "live odds and parlays")]
+    assert design_system.generate_batch(entries, str(tmp_path), workers=1)[0]["generated"]
+
+
+def test_batch_rejects_two_entries_for_one_project(tmp_path):
+    entries = [{"query": "sportsbook dark", "project": "Skin A", "pages": []},
+               {"query": "sportsbook light", "project": "skin-a", "pages": []}]
+    with pytest.raises(ValueError, match="design-system/skin-a/"):
+        design_system.generate_batch(entries, str(tmp_path), workers=1)
+    assert not (tmp_path / "design-system").exists()
@@ -0,0 +1,175 @@
+import re
+from math import log
+
+import pytest
+
+import core
+
+# Queries across every domain, plus edge cases: nothing known, repeated terms, punctuation
+QUERIES = [
+    "saas dashboard", "glassmorphism dark mode", "fintech trust blue palette", "accessibility contrast wcag",
+    "animation performance mobile", "pricing page hero cta", "serif heading font", "lucide svg icon",
+    "react suspense waterfall", "aria focus outline form", "bar chart trend", "e-commerce luxury",
+    "", "qqqq zzzz", "dashboard dashboard dashboard", "next.js / tailwind #hex",
+]
+
+
+def reference_tokenize(text):
+    """The original tokenizer: punctuation to spaces, split, drop words of 2 chars or fewer."""
+    text = re.sub(r"[^\w\s]", " ", str(text).lower())
+    return [w for w in text.split() if len(w) > 2]
+
+
+def reference_search(rows, search_cols, output_cols, query, max_results, k1=1.5, b=0.75):
+    """BM25 over every row with no index, postings or caches, as search() worked originally."""
+    docs = [reference_tokenize(" ".join(str(row.get(col, "")) for col in search_cols)) for row in rows]
+    avgdl = sum(len(doc) for doc in docs) / len(docs)
+    idf = {}
+    for word in {word for doc in docs for word in doc}:
+        freq = sum(1 for doc in docs if word in doc)
+        idf[word] = log((len(docs) - freq + 0.5) / (freq + 0.5) + 1)
+    scores = []
+    for idx, doc in enumerate(docs):
+        score = 0
+        for token in reference_tokenize(query):
+            if token in idf:
+                tf = doc.count(token)
+                score += idf[token] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+        scores.append((idx, score))
+    ranked = sorted(scores, key=lambda x: x[1], reverse=True)[:max_results]
+    return [{col: rows[idx].get(col, "") for col in output_cols if col in rows[idx]}
+            for idx, score in ranked if score > 0]
+
+
+def reference_detect_domain(query):
+    scores = {domain: sum(1 for kw in keywords if kw in query.lower())
+              for domain, keywords in core.DOMAIN_KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else core.FALLBACK_DOMAIN
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    core.clear_caches()
+    yield
+    core.clear_caches()
+
+
+@pytest.mark.parametrize("domain", sorted(core.CSV_CONFIG))
+def test_search_matches_brute_force(domain):
+    config = core.CSV_CONFIG[domain]
+    rows = core._load_csv(core.DATA_DIR / config["file"])
+    for query in QUERIES:
+        expected = reference_search(rows, config["search_cols"], config["output_cols"], query, 3)
+        assert core.search(query, domain)["results"] == expected, query
+
+
+def test_stack_search_matches_brute_force():
+    cols = core._STACK_COLS
+    for stack in ("react", "flutter"):
+        rows = core._load_csv(core.DATA_DIR / core.STACK_CONFIG[stack]["file"])
+        for query in QUERIES:
+            expected = reference_search(rows, cols["search_cols"], cols["output_cols"], query, 3)
+            assert core.search_stack(query, stack)["results"] == expected, (stack, query)
+
+
+@pytest.mark.parametrize("domain", ["style", "ux", "product"])
+def test_search_many_matches_search(domain):
+    pytest.importorskip("numpy")
+    batched = core.search_many(QUERIES, domain, max_results=5)
+    core.clear_caches()
+    assert batched == [core.search(query, domain, max_results=5) for query in QUERIES]
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = core.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a is now the most recent
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "hit_ratio": 0.75}
+
+
+def test_cached_results_are_copies():
+    first = core.search("saas dashboard", "product")
+    first["results"][0]["Product Type"] = "mutated"
+    first["results"].clear()
+    again = core.search("saas dashboard", "product")
+    assert again["results"] and again["results"][0]["Product Type"] != "mutated"
+    assert core.cache_stats()["results"]["hits"] == 1
+
+
+def test_result_memo_is_invalidated_when_the_csv_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(core, "INDEX_DIR", tmp_path / ".index")
+    csv_path = tmp_path / "styles.csv"
+    csv_path.write_text("Style Category,Keywords\nNeon,glow bright\nPaper,matte calm\n", encoding="utf-8")
+    assert [r["Style Category"] for r in core.search("glow", "style")["results"]] == ["Neon"]
+
+    csv_path.write_text("Style Category,Keywords\nNeon,glow bright\nPaper,matte calm glow glow\n", encoding="utf-8")
+    assert [r["Style Category"] for r in core.search("glow", "style")["results"]] == ["Paper", "Neon"]
+
+
+def test_detect_domain_matches_substring_scan():
+    queries = QUERIES + ["color palette for a chart", "icons icons", "Dark Mode UI", "#", "rsc server component"]
+    for query in queries:
+        assert core.detect_domain(query) == reference_detect_domain(query), query
+
+
+def test_keyword_automaton_matches_substring_scan():
+    patterns = ["he", "she", "his", "hers", "s", "", "ushers"]
+    automaton = core.KeywordAutomaton(patterns)
+    for text in ["ushers", "", "xyz", "hishers", "shhe"]:
+        assert automaton.matches(text) == {p for p in patterns if p in text}
+
+
+def test_rank_domains_confidence_and_limits():
+    ranked = core.rank_domains("saas dashboard with a dark mode style")
+    assert ranked[0] == ("product", 0.5)
+    assert sum(confidence for _, confidence in ranked) == pytest.approx(1.0, abs=0.01)
+    assert core.rank_domains("qqqq") == [(core.FALLBACK_DOMAIN, 0.0)]
+    with pytest.raises(ValueError):
+        core.rank_domains("saas", 0)
+    with pytest.raises(ValueError):
+        core.search("saas", top_domains=0)
+
+
+def test_search_across_top_domains_merges_per_domain_results():
+    merged = core.search("saas dashboard dark mode style", top_domains=2)
+    assert [d["domain"] for d in merged["domains"]] == ["product", "style"]
+    for domain in ("product", "style"):
+        own = core.search("saas dashboard dark mode style", domain)["results"]
+        assert [dict(row, Domain=domain) for row in own] == [row for row in merged["results"] if row["Domain"] == domain]
+
+
+def test_federated_stack_search_ranks_one_combined_corpus():
+    stacks = ["react", "vue", "svelte"]
+    rows, tags = [], []
+    for stack in stacks:
+        data = core._load_csv(core.DATA_DIR / core.STACK_CONFIG[stack]["file"])
+        rows.extend(data)
+        tags.extend([stack] * len(data))
+    cols = core._STACK_COLS
+
+    for query in ("state management", "accessibility focus", "list rendering keys"):
+        result = core.search_stacks(query, stacks, max_results=2)
+        # The global ranking, capped at max_results per stack
+        expected, per_stack = [], {}
+        for row in reference_search([dict(r, _tag=t) for r, t in zip(rows, tags)], cols["search_cols"],
+                                    cols["output_cols"] + ["_tag"], query, len(rows)):
+            stack = row.pop("_tag")
+            if per_stack.get(stack, 0) < 2:
+                per_stack[stack] = per_stack.get(stack, 0) + 1
+                expected.append({"Stack": stack, **row})
+        assert result["results"] == expected, query
+        assert result["by_stack"] == {s: [r for r in expected if r["Stack"] == s]
+                                      for s in dict.fromkeys(r["Stack"] for r in expected)}
+
+
+def test_federated_stack_search_dedupes_and_rejects_unknown_stacks():
+    once = core.search_stacks("hooks", ["react"])
+    twice = core.search_stacks("hooks", ["react", "react"])
+    assert twice["results"] == once["results"] and twice["stacks"] == ["react"]
+    assert "error" in core.search_stacks("hooks", ["react", "cobol"])
@@ -0,0 +1,20 @@
+import bench_startup
+
+
+def test_plain_search_does_not_import_heavy_modules():
+    for query in ("glassmorphism dark mode", "saas dashboard"):
+        _, _, modules = bench_startup.measure(query, [])
+        assert not modules & set(bench_startup.LAZY_MODULES), query
+        assert "core" in modules
+
+
+def test_importtime_parsing_keeps_top_level_imports_only():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   _io",
+        "import time:       300 |        900 | core",
+        "import time:        40 |         40 |     csv",
+        "something else on stderr",
+    ])
+    assert bench_startup.parse_importtime(stderr) == {"core": 900}
+    assert bench_startup.all_imported(stderr) == {"_io", "core", "csv"}
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from user_cache import UserCache
+
+
+def make_user(user_id, roi):
+    return SimpleNamespace(id=user_id, username=f"u{user_id}", email=f"u{user_id}@example.com",
+                           is_public=True, verified_roi=roi)
+
+
+def test_hit_skips_load():
+    cache = UserCache(ttl_seconds=60)
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return make_user(user_id, 1.0)
+
+    assert cache.get(1, load).verified_roi == 1.0
+    assert cache.get(1, load).verified_roi == 1.0
+    assert loads == [1]
+
+
+def test_invalidate_during_load_is_not_cached():
+    cache = UserCache(ttl_seconds=60)
+    rows = {1: make_user(1, 1.0)}
+
+    def stale_load(user_id):
+        # The commit lands (and invalidates) after this request read the old row
+        old = rows[user_id]
+        rows[user_id] = make_user(user_id, 2.0)
+        cache.invalidate(user_id)
+        return old
+
+    assert cache.get(1, stale_load).verified_roi == 1.0
+    assert cache.get(1, lambda user_id: rows[user_id]).verified_roi == 2.0
+
+
+def test_clear_during_load_is_not_cached():
+    cache = UserCache(ttl_seconds=60)
+    rows = {1: make_user(1, 1.0)}
+
+    def stale_load(user_id):
+        old = rows[user_id]
+        rows[user_id] = make_user(user_id, 2.0)
+        cache.clear()
+        return old
+
+    assert cache.get(1, stale_load).verified_roi == 1.0
+    assert cache.get(1, lambda user_id: rows[user_id]).verified_roi == 2.0
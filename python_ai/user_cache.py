@@ -0,0 +1,126 @@
+"""
+Per-process cache of the logged-in user for flask-login's user_loader.
+
+Without it every authenticated request starts with a SELECT on users just to
+identify the caller. The cache holds UserSnapshot objects: plain immutable
+copies of the columns, never ORM instances, so any request thread can share
+them without touching another thread's session.
+
+A user's entry is dropped when a commit updates or deletes that row through
+the ORM (ROI refreshes, privacy toggles). Core-level UPDATE statements and
+other processes do not trigger that, so entries also expire after
+PICKLABS_USER_CACHE_TTL seconds (default 60; 0 disables the cache).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import record_cache
+
+
+class UserSnapshot:
+    """Read-only stand-in for models.User that satisfies flask-login's user interface."""
+
+    __slots__ = ("id", "username", "email", "is_public", "verified_roi")
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, user):
+        for name in self.__slots__:
+            object.__setattr__(self, name, getattr(user, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot is read-only")
+
+    def get_id(self):
+        return str(self.id)
+
+
+class UserCache:
+    """A TTL + LRU map of user id -> UserSnapshot, safe to share across threads."""
+
+    def __init__(self, ttl_seconds=60.0, max_size=10000):
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user id -> (expires_at, snapshot)
+        # Bumped by invalidate()/clear() so a load that straddles one is not cached
+        self._generations = {}  # user id -> int
+        self._epoch = 0
+
+    def get(self, user_id, load):
+        """Returns the cached snapshot, or calls load(user_id) and caches a snapshot of what it returns."""
+        if self.ttl <= 0:
+            user = load(user_id)
+            return UserSnapshot(user) if user is not None else None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                record_cache("session_user", True)
+                return entry[1]
+            generation = (self._epoch, self._generations.get(user_id, 0))
+
+        record_cache("session_user", False)
+        user = load(user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot(user)
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(user_id, 0)):
+                # Invalidated while loading; what we read may predate the change
+                return snapshot
+            self._entries[user_id] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+
+def cache_from_env():
+    return UserCache(ttl_seconds=float(os.environ.get("PICKLABS_USER_CACHE_TTL", "60")))
+
+
+def invalidate_on_commit(cache, user_model):
+    """
+    Drops a user's entry once a commit that updated or deleted the row lands.
+    Invalidating at flush time instead would let a concurrent request re-cache
+    the old row before the commit becomes visible. A request that read the old
+    row just before the commit does not cache it either: invalidate() bumps the
+    user's generation and get() only stores when it is unchanged.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    def _remember(mapper, connection, target):
+        session = Session.object_session(target)
+        if session is not None:
+            session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+    def _after_commit(session):
+        for user_id in session.info.pop("changed_user_ids", ()):
+            cache.invalidate(user_id)
+
+    def _after_rollback(session):
+        session.info.pop("changed_user_ids", None)
+
+    event.listen(user_model, "after_update", _remember)
+    event.listen(user_model, "after_delete", _remember)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
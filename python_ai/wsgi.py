@@ -0,0 +1,9 @@
+"""
+Production entry point:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing server trains and warms the model, so with preload_app this
+happens exactly once in the gunicorn master before workers are forked.
+"""
+from server import app